@@ -0,0 +1,145 @@
+import ctypes
+import math
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from src.indicators.atr import ATR
+from src.indicators.bollingerbands import BollingerBands
+from src.indicators.cci import CCI
+from src.indicators.kernels import Workspace
+from src.indicators.stochastic import Stochastic
+from apps.backtest.check_indicators import make_indicator_data
+
+try:
+    import resource
+except ImportError:  # Windows: không đếm được page fault, chỉ đo bộ nhớ đỉnh
+    resource = None
+
+# So sánh calculate() (chuỗi phép tính pandas) với calculate_into() (kernel gộp, ghi vào mảng cấp sẵn,
+# bộ nhớ tạm lấy từ Workspace dùng lại) cho bộ CCI, BollingerBands, Stochastic, ATR trên N_BENCH nến:
+#   - Số mảng cỡ n được cấp phát mỗi lần tính cả bộ: đo bằng số page fault (Linux/glibc, ngưỡng mmap cố định nên
+#     mỗi mảng lớn là 1 vùng nhớ mới), quy ra số mảng float64 dài n. Hệ điều hành khác in n/a.
+#   - Bộ nhớ đỉnh (tracemalloc) và thời gian (lần nhanh nhất trong REPEAT lần).
+# Báo lỗi nếu kết quả 2 cách lệch nhau hoặc calculate_into() còn cấp phát mảng cỡ n sau lần gọi đầu.
+# Chạy từ thư mục gốc project:
+#     python -m apps.backtest.bench_indicator_kernels
+
+N_BENCH = 1000000
+REPEAT = 3
+M_MMAP_THRESHOLD = -3  # mallopt() của glibc
+
+
+def fix_mmap_threshold():
+    # glibc tự nâng ngưỡng mmap sau khi giải phóng mảng lớn (mảng sau lấy lại từ heap, không phát sinh page fault).
+    # Cố định ngưỡng để mọi mảng >= 64KB là 1 vùng mmap mới, tắt hugepage để mỗi trang 4KB là 1 page fault
+    if resource is None:
+        return False
+    try:
+        libc = ctypes.CDLL('libc.so.6')
+    except OSError:
+        return False
+    # Hàm private của numpy (np.core đổi tên thành np._core từ numpy 2); không tắt được hugepage thì không đếm
+    # (1 page fault có thể là cả trang 2MB, số mảng đếm được sẽ thấp hơn thực tế)
+    try:
+        core = np._core if hasattr(np, '_core') else np.core
+        core.multiarray._set_madvise_hugepage(False)
+    except AttributeError:
+        return False
+    return libc.mallopt(M_MMAP_THRESHOLD, 64 * 1024) == 1
+
+
+def count_arrays(func, n):
+    # Số mảng float64 dài n được cấp phát (và ghi) trong 1 lần gọi func
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_minflt
+    func()
+    faults = resource.getrusage(resource.RUSAGE_SELF).ru_minflt - before
+    return faults * resource.getpagesize() / (n * 8)
+
+
+def peak_memory(func):
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def best_time(func):
+    best = math.inf
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def same(actual, expected):
+    actual = np.asarray(actual, dtype=float)
+    expected = np.asarray(expected, dtype=float)
+    return np.allclose(actual, expected, rtol=1e-9, atol=1e-9, equal_nan=True)
+
+
+if __name__ == '__main__':
+    df = make_indicator_data(N_BENCH, seed=1)
+    n = len(df)
+    atr, cci, bb, stoch = ATR(14), CCI(20), BollingerBands(20, 2), Stochastic(14, 3)
+
+    def pandas_set():
+        return {
+            'atr': atr.calculate(df),
+            'cci': cci.calculate(df),
+            'bb': bb.calculate(df),
+            'stoch': stoch.calculate(df),
+        }
+
+    # Mảng kết quả và bộ nhớ tạm cấp 1 lần, dùng lại cho mọi lần tính
+    workspace = Workspace()
+    out = {
+        'atr': np.empty(n),
+        'cci': np.empty(n),
+        'bb': {'upper': np.empty(n), 'middle': np.empty(n), 'lower': np.empty(n)},
+        'stoch': {'%K': np.empty(n), '%D': np.empty(n)},
+    }
+
+    def kernel_set():
+        return {
+            'atr': atr.calculate_into(df, out=out['atr'], workspace=workspace),
+            'cci': cci.calculate_into(df, out=out['cci'], workspace=workspace),
+            'bb': bb.calculate_into(df, out=out['bb'], workspace=workspace),
+            'stoch': stoch.calculate_into(df, out=out['stoch'], workspace=workspace),
+        }
+
+    expected = pandas_set()
+    actual = kernel_set()
+    checks = {
+        'ATR': same(actual['atr'], expected['atr']),
+        'CCI': same(actual['cci'], expected['cci']),
+        'BollingerBands': all(same(actual['bb'][k], expected['bb'][k]) for k in ('upper', 'middle', 'lower')),
+        'Stochastic': all(same(actual['stoch'][k], expected['stoch'][k]) for k in ('%K', '%D')),
+    }
+    failed = 0
+    for name, ok in checks.items():
+        print(f"[{'OK' if ok else 'FAILED'}] {name:<16} calculate_into() khớp calculate()")
+        failed += 0 if ok else 1
+    preallocated = sum(a.nbytes for v in out.values() for a in (v.values() if isinstance(v, dict) else [v]))
+    print(f"[INFO] Cấp sẵn {preallocated / 2 ** 20:.1f} MB kết quả + {workspace.nbytes / 2 ** 20:.1f} MB bộ nhớ tạm "
+          f"({workspace.allocations} mảng) cho {n} nến")
+
+    counted = fix_mmap_threshold()
+    for name, func in (('calculate()', pandas_set), ('calculate_into()', kernel_set)):
+        arrays = count_arrays(func, n) if counted else None
+        peak = peak_memory(func)
+        elapsed = best_time(func)
+        arrays_text = f"{arrays:6.1f}" if arrays is not None else '   n/a'
+        print(f"[RESULT] {name:<17} {arrays_text} mảng cỡ n cấp phát/lần, bộ nhớ đỉnh {peak / 2 ** 20:7.1f} MB, "
+              f"{elapsed * 1000:7.1f} ms / {n} nến")
+        if name == 'calculate_into()' and arrays is not None and arrays >= 1:
+            print("[ERROR] calculate_into() vẫn cấp phát mảng cỡ n khi đã có out/workspace")
+            failed += 1
+    if failed:
+        sys.exit(1)
+    print("[INFO] Kernel gộp khớp pandas và không cấp phát thêm mảng cỡ n khi dùng lại out/workspace")
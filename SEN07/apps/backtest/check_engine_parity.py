@@ -0,0 +1,260 @@
+import sys
+import numpy as np
+import pandas as pd
+
+from src.backtest.engine import BacktestEngine
+from src.backtest.metrics import MetricsReport
+from src.backtest.monte_carlo import run_monte_carlo, trade_returns_from_result
+from src.backtest.streaming import StreamingBacktestEngine
+from src.backtest.walk_forward import make_windows, run_walk_forward
+from src.strategies.combo import ComboStrategy
+from src.strategies.ma_cross import MACrossStrategy
+from src.strategies.rules import RuleSet, RuleStrategy
+from src.strategies.base import Strategy
+from src.utils.synthetic_data import make_ohlcv
+from src.utils.ohlcv_frame import OHLCVFrame
+
+# So sánh BacktestEngine mode='vectorized' và StreamingBacktestEngine với mode='loop' (bản tham chiếu)
+# (kể cả run_monte_carlo nhận thẳng kết quả run() trên OHLCVFrame)
+# trên dữ liệu giả lập; BatchResult.metrics(price=...) với MetricsReport từng bộ tham số (có cả giá thiếu NaN);
+# lợi nhuận từng cửa sổ OOS của walk-forward với loop trên cửa sổ đó (lệnh còn mở đóng ở nến cuối);
+# run_batch / generate_signals_batch với run(mode='loop') từng bộ tham số, cả trên dữ liệu có đoạn giá đứng yên
+# (SMA nhiều chu kỳ bằng nhau đúng tuyệt đối, so sánh fast > slow không được đảo do sai số làm tròn).
+# Chạy từ thư mục gốc project:
+#     python -m apps.backtest.check_engine_parity
+
+N_BARS = 5000
+FEE_PERC = 0.0002
+# Rule tương đương ComboStrategy mặc định: tín hiệu RuleStrategy phải trùng ComboStrategy
+MA_GRID = [{'fast': fast, 'slow': slow} for fast in (5, 10, 20) for slow in (30, 50)]
+COMBO_GRID = [{'ma_period': ma, 'macd_fast': fast, 'macd_slow': slow, 'macd_signal': 5}
+              for ma in (10, 20, 50) for fast, slow in ((5, 25), (12, 26))]
+N_PRICE_GAPS = 200  # số nến bị xóa giá close (NaN) trong kiểm tra metrics
+N_FLAT_SEGMENTS = 8  # số đoạn giá đứng yên (50-500 nến) trong kiểm tra run_batch
+WF_IS_BARS = 1000
+WF_OOS_BARS = 500
+# Rule chỉ gồm prev(...) của 1 điều kiện (không bọc trong and/or), so với mảng numpy dịch tay
+SHIFTED_RULES = {
+    'prev_up': 'prev(close > open)',
+    'prev2_not_up': 'not prev(close > open, 2)',
+    'prev_prev_cross': 'prev(prev(cross_above(close, sma(20))))',
+}
+COMBO_RULES = {
+    'buy': 'close > open and close > sma(20) and macd_hist(5, 25, 5) > 0',
+    'sell': 'close < open and close < sma(20) and macd_hist(5, 25, 5) < 0',
+}
+
+
+class RandomSignalStrategy(Strategy):
+    # Tín hiệu ngẫu nhiên, có cả chuỗi tín hiệu lặp lại để kiểm tra logic giữ vị thế
+    def generate_signals(self, df):
+        rng = np.random.default_rng(self.params.get('seed', 0))
+        df['signal'] = rng.choice([-1, 0, 0, 0, 1], size=len(df))
+        return df
+
+
+class FixedSignalStrategy(Strategy):
+    # Tín hiệu cho sẵn (mảng cùng độ dài df)
+    def generate_signals(self, df):
+        df['signal'] = self.params['signal']
+        return df
+
+
+def _shifted(values, periods):
+    out = np.zeros_like(values)
+    out[periods:] = values[:-periods]
+    return out
+
+
+def check_shifted_rules(df):
+    close, open_ = df['close'].to_numpy(), df['open'].to_numpy()
+    sma = df['close'].rolling(20).mean().to_numpy()
+    up = close > open_
+    above = close > sma
+    expected = {
+        'prev_up': _shifted(up, 1),
+        'prev2_not_up': ~_shifted(up, 2),
+        'prev_prev_cross': _shifted(above & _shifted(close <= sma, 1), 2),
+    }
+    masks = RuleSet(SHIFTED_RULES).evaluate(df)
+    return all(np.array_equal(masks[name].to_numpy(), expected[name]) for name in SHIFTED_RULES)
+
+
+def check_rule_params(df):
+    # Tham số số thực nguyên (sma(20.0)) cùng key với sma(20), chu kỳ không nguyên bị từ chối khi parse
+    rule_set = RuleSet({'int': 'close > sma(20)', 'float': 'close > sma(20.0)'})
+    masks = rule_set.evaluate(df)
+    ok = rule_set.stats()['nodes'] == 3 and np.array_equal(masks['int'].to_numpy(), masks['float'].to_numpy())
+    try:
+        RuleSet({'bad': 'close > sma(20.5)'})
+        ok = False
+    except ValueError:
+        pass
+    return ok
+
+
+def check_parity(strategy, df, fee_perc=FEE_PERC):
+    ref = BacktestEngine(strategy, df, fee_perc=fee_perc).run(mode='loop')
+    vec = BacktestEngine(strategy, df, fee_perc=fee_perc).run(mode='vectorized')
+    pos_ok = np.array_equal(ref['position'].to_numpy(dtype=int), vec['position'].to_numpy(dtype=int))
+    eq_ok = np.allclose(ref['equity'].to_numpy(dtype=float), vec['equity'].to_numpy(dtype=float), rtol=1e-9, atol=1e-6)
+    ref_tp = pd.to_numeric(ref['trade_price']).to_numpy(dtype=float)
+    vec_tp = vec['trade_price'].to_numpy(dtype=float)
+    tp_ok = np.allclose(ref_tp, vec_tp, equal_nan=True)
+    return pos_ok and eq_ok and tp_ok
+
+
+def check_streaming_parity(strategy, df, fee_perc=FEE_PERC):
+    # Streaming phải khớp chính xác (không sai số) với loop
+    ref = BacktestEngine(strategy, df, fee_perc=fee_perc).run(mode='loop')
+    stream = pd.DataFrame(list(StreamingBacktestEngine(strategy, fee_perc=fee_perc).replay(df)))
+    sig_ok = np.array_equal(ref['signal'].to_numpy(dtype=float), stream['signal'].to_numpy(dtype=float))
+    pos_ok = np.array_equal(ref['position'].to_numpy(dtype=int), stream['position'].to_numpy(dtype=int))
+    eq_ok = np.array_equal(ref['equity'].to_numpy(dtype=float), stream['equity'].to_numpy(dtype=float))
+    return sig_ok and pos_ok and eq_ok
+
+
+def check_frame_parity(strategy, df, fee_perc=FEE_PERC):
+    # BacktestEngine trên OHLCVFrame phải khớp loop trên DataFrame và không copy mảng giá
+    ref = BacktestEngine(strategy, df, fee_perc=fee_perc).run(mode='loop')
+    frame = OHLCVFrame.from_frame(df)
+    out = BacktestEngine(strategy, frame, fee_perc=fee_perc).run(mode='vectorized')
+    pos_ok = np.array_equal(ref['position'].to_numpy(dtype=int), out['position'].to_numpy(dtype=int))
+    eq_ok = np.allclose(ref['equity'].to_numpy(dtype=float), out['equity'].to_numpy(dtype=float), rtol=1e-9, atol=1e-6)
+    shared = np.shares_memory(out.values('close'), frame.values('close'))
+    return isinstance(out, OHLCVFrame) and pos_ok and eq_ok and shared
+
+
+def check_monte_carlo(strategy, df, fee_perc=FEE_PERC):
+    # run_monte_carlo nhận thẳng kết quả run() trên OHLCVFrame, cùng lợi nhuận lệnh với kết quả loop trên DataFrame
+    ref = trade_returns_from_result(BacktestEngine(strategy, df, fee_perc=fee_perc).run(mode='loop'))
+    out = BacktestEngine(strategy, OHLCVFrame.from_frame(df), fee_perc=fee_perc).run()
+    expected = run_monte_carlo(ref, n_paths=200, seed=0)
+    actual = run_monte_carlo(out, n_paths=200, seed=0)
+    return len(ref) > 0 and bool(np.allclose(actual.paths, expected.paths, rtol=1e-9))
+
+
+def check_batch_metrics(df, param_sets=MA_GRID):
+    # Metrics của BatchResult (tính gộp mọi cột) phải khớp MetricsReport của từng bộ tham số
+    strategy = MACrossStrategy()
+    signals = strategy.generate_signals_batch(df.copy(), param_sets)
+    batch = BacktestEngine(strategy, df).run_batch(param_sets).metrics(price=df['close'])
+    ok = True
+    for j in range(len(param_sets)):
+        ref = MetricsReport(df.assign(signal=signals[:, j])).to_dict()
+        for name in batch.columns.drop(list(param_sets[j])):
+            ok &= bool(np.isclose(batch[name].iloc[j], ref[name], rtol=1e-9, atol=1e-12, equal_nan=True))
+    return ok
+
+
+def with_flat_segments(df, seed):
+    # Giá đứng yên nhiều nến liền (ngừng giao dịch, thị trường nghỉ): mọi SMA trong đoạn đều bằng đúng giá đó
+    df = df.copy()
+    rng = np.random.default_rng(seed)
+    for start in rng.choice(len(df) - 600, N_FLAT_SEGMENTS, replace=False):
+        end = start + int(rng.integers(50, 500))
+        df.loc[start:end, ['open', 'high', 'low', 'close']] = df.loc[start, 'close']
+    return df
+
+
+def check_batch_parity(strategy_cls, param_sets, df, fee_perc=FEE_PERC):
+    # run_batch (tín hiệu 2 chiều, simulate_signals 2 chiều) phải khớp run(mode='loop') của từng bộ tham số
+    batch = BacktestEngine(strategy_cls(), df, fee_perc=fee_perc).run_batch(param_sets)
+    signals = strategy_cls().generate_signals_batch(df.copy(), param_sets)
+    ok = True
+    for j, params in enumerate(param_sets):
+        ref = BacktestEngine(strategy_cls(**params), df, fee_perc=fee_perc).run(mode='loop')
+        ok &= np.array_equal(signals[:, j], ref['signal'].to_numpy(dtype=int))
+        ok &= np.array_equal(batch.position[:, j], ref['position'].to_numpy(dtype=int))
+        ok &= np.allclose(batch.equity[:, j], ref['equity'].to_numpy(dtype=float), rtol=1e-9, atol=1e-6)
+    return bool(ok)
+
+
+def check_walk_forward(df, param_sets=MA_GRID):
+    # Lợi nhuận OOS mỗi cửa sổ = loop trên riêng cửa sổ đó (bắt đầu flat) với bộ tham số được chọn, thêm 1 nến lặp lại
+    # nến cuối có tín hiệu ngược vị thế để đóng lệnh còn mở tại giá nến cuối
+    strategy = MACrossStrategy()
+    signals = strategy.generate_signals_batch(df.copy(), param_sets)
+    result = run_walk_forward(strategy, df, param_sets, WF_IS_BARS, WF_OOS_BARS, fee_perc=FEE_PERC, n_jobs=1)
+    ok = True
+    open_at_end = 0
+    for (_, _, oos_start, oos_end), (_, row) in zip(make_windows(len(df), WF_IS_BARS, WF_OOS_BARS), result.windows.iterrows()):
+        best = param_sets.index({name: row[name] for name in param_sets[0]})
+        part = df.iloc[oos_start:oos_end].reset_index(drop=True)
+        signal = signals[oos_start:oos_end, best]
+        last = BacktestEngine(FixedSignalStrategy(signal=signal), part).run(mode='loop')['position'].iloc[-1]
+        open_at_end += int(last != 0)
+        part = pd.concat([part, part.iloc[[-1]]], ignore_index=True)
+        ref = BacktestEngine(FixedSignalStrategy(signal=np.append(signal, -last)), part, initial_balance=1.0,
+                             fee_perc=FEE_PERC).run(mode='loop')
+        ok &= bool(np.isclose(row['oos_return'], ref['equity'].iloc[-1] - 1, rtol=1e-9, atol=1e-12))
+        ok &= bool(result.position.loc[df.index[oos_end - 1]] == 0)
+    ok &= bool(np.isclose(result.total_return(), np.prod(1 + result.windows['oos_return']) - 1, rtol=1e-9))
+    return ok and open_at_end > 0
+
+
+if __name__ == '__main__':
+    cases = [
+        ('ComboStrategy', ComboStrategy()),
+        ('MACrossStrategy', MACrossStrategy(fast=10, slow=20)),
+        ('RandomSignal seed=1', RandomSignalStrategy(seed=1)),
+        ('RandomSignal seed=2', RandomSignalStrategy(seed=2)),
+        ('RuleStrategy combo', RuleStrategy(**COMBO_RULES)),
+    ]
+    failed = 0
+    for seed in (0, 1):
+        df = make_ohlcv(N_BARS, seed=seed)
+        combo_signal = ComboStrategy().generate_signals(df.copy())['signal'].to_numpy()
+        rule_signal = RuleStrategy(**COMBO_RULES).generate_signals(df.copy())['signal'].to_numpy()
+        ok = np.array_equal(combo_signal, rule_signal)
+        print(f"[{'OK' if ok else 'FAILED'}] RuleStrategy khớp ComboStrategy data_seed={seed}")
+        failed += 0 if ok else 1
+        ok = check_shifted_rules(df)
+        print(f"[{'OK' if ok else 'FAILED'}] Rule prev(điều kiện) đứng riêng data_seed={seed}")
+        failed += 0 if ok else 1
+        ok = check_rule_params(df)
+        print(f"[{'OK' if ok else 'FAILED'}] Rule sma(20.0) dùng chung sma(20), sma(20.5) bị từ chối data_seed={seed}")
+        failed += 0 if ok else 1
+        for name, strategy in cases:
+            for fee in (0, FEE_PERC):
+                ok = check_parity(strategy, df, fee_perc=fee)
+                status = 'OK' if ok else 'FAILED'
+                print(f"[{status}] vectorized {name} data_seed={seed} fee={fee}")
+                failed += 0 if ok else 1
+                ok = check_frame_parity(strategy, df, fee_perc=fee)
+                status = 'OK' if ok else 'FAILED'
+                print(f"[{status}] OHLCVFrame {name} data_seed={seed} fee={fee}")
+                failed += 0 if ok else 1
+                ok = check_monte_carlo(strategy, df, fee_perc=fee)
+                print(f"[{'OK' if ok else 'FAILED'}] Monte Carlo từ kết quả OHLCVFrame {name} data_seed={seed} fee={fee}")
+                failed += 0 if ok else 1
+                if isinstance(strategy, (RandomSignalStrategy, RuleStrategy)):
+                    continue
+                ok = check_streaming_parity(strategy, df, fee_perc=fee)
+                status = 'OK' if ok else 'FAILED'
+                print(f"[{status}] streaming {name} data_seed={seed} fee={fee}")
+                failed += 0 if ok else 1
+    for seed in (0, 3):
+        df = make_ohlcv(N_BARS, seed=seed)
+        ok = check_batch_metrics(df)
+        print(f"[{'OK' if ok else 'FAILED'}] BatchResult.metrics khớp MetricsReport data_seed={seed}")
+        failed += 0 if ok else 1
+        for name, strategy_cls, param_sets in (('MACrossStrategy', MACrossStrategy, MA_GRID),
+                                               ('ComboStrategy', ComboStrategy, COMBO_GRID)):
+            for label, data in (('', df), (f' ({N_FLAT_SEGMENTS} đoạn giá đứng yên)', with_flat_segments(df, seed))):
+                ok = check_batch_parity(strategy_cls, param_sets, data)
+                print(f"[{'OK' if ok else 'FAILED'}] run_batch {name} {len(param_sets)} bộ tham số khớp loop "
+                      f"data_seed={seed}{label}")
+                failed += 0 if ok else 1
+        ok = check_walk_forward(df)
+        print(f"[{'OK' if ok else 'FAILED'}] walk-forward lợi nhuận OOS từng cửa sổ khớp loop (đóng lệnh ở nến cuối) data_seed={seed}")
+        failed += 0 if ok else 1
+        gaps = np.random.default_rng(seed).choice(N_BARS, N_PRICE_GAPS, replace=False)
+        df.loc[gaps, 'close'] = np.nan
+        ok = check_batch_metrics(df)
+        print(f"[{'OK' if ok else 'FAILED'}] BatchResult.metrics khớp MetricsReport data_seed={seed} ({N_PRICE_GAPS} giá NaN)")
+        failed += 0 if ok else 1
+    if failed:
+        print(f"[ERROR] {failed} trường hợp không khớp với loop")
+        sys.exit(1)
+    print("[INFO] Vectorized, OHLCVFrame và streaming khớp với loop từng nến, run_batch và metrics gộp khớp từng bộ tham số, walk-forward khớp loop từng cửa sổ OOS")
@@ -0,0 +1,250 @@
+import json
+import math
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.indicators.atr import ATR
+from src.indicators.bollingerbands import BollingerBands
+from src.indicators.cci import CCI
+from src.indicators.ema import EMA
+from src.indicators.fractals import Fractals
+from src.indicators.macd import MACD
+from src.indicators.obv import OBV
+from src.indicators.rsi import RSI
+from src.indicators.sma import SMA
+from src.indicators.stochastic import Stochastic
+from src.backtest.streaming import iter_bars
+from src.utils.synthetic_data import make_ohlcv
+
+# Kiểm tra mọi indicator trong src/indicators:
+#   1. Parity: so với bản tham chiếu viết bằng vòng lặp Python theo đúng định nghĩa (dữ liệu nhỏ)
+#   2. update(): chạy từng nến phải khớp calculate(), kể cả khi lưu/nạp lại trạng thái (json) giữa chừng
+#   3. Benchmark: thời gian calculate() trên N_BENCH nến, báo lỗi nếu chậm hơn MAX_NS_PER_BAR
+#      (chặn việc đưa lại indicator dùng vòng lặp Python theo từng nến)
+#   4. calculate_many() (IndicatorBank) của Bollinger trên dữ liệu có đoạn giá đứng yên: khớp độ lệch chuẩn tính
+#      trực tiếp trên từng cửa sổ, cửa sổ phẳng có độ rộng dải đúng bằng 0
+# Chạy từ thư mục gốc project:
+#     python -m apps.backtest.check_indicators
+
+N_PARITY = 3000
+MANY_PERIODS = (2, 3, 5, 20, 50, 200)
+N_BENCH = 500000
+MAX_NS_PER_BAR = 1000  # vòng lặp Python theo nến thường > 5000 ns/nến
+
+
+def _window_ref(values, period, func):
+    out = [math.nan] * len(values)
+    for i in range(period - 1, len(values)):
+        window = values[i - period + 1:i + 1]
+        out[i] = math.nan if any(math.isnan(v) for v in window) else func(window)
+    return np.array(out)
+
+
+def _mean(window):
+    return sum(window) / len(window)
+
+
+def _std(window):
+    mean = _mean(window)
+    return math.sqrt(sum((v - mean) ** 2 for v in window) / (len(window) - 1))
+
+
+def _ema_ref(values, span):
+    alpha = 2 / (span + 1)
+    out = []
+    ema = values[0]
+    for v in values:
+        ema = alpha * v + (1 - alpha) * ema
+        out.append(ema)
+    return np.array(out)
+
+
+def ref_sma(df, period):
+    return _window_ref(list(df['close']), period, _mean)
+
+
+def ref_ema(df, period):
+    return _ema_ref(list(df['close']), period)
+
+
+def ref_macd(df, fast, slow, signal):
+    macd = _ema_ref(list(df['close']), fast) - _ema_ref(list(df['close']), slow)
+    sig = _ema_ref(list(macd), signal)
+    return np.column_stack([macd, sig, macd - sig])
+
+
+def ref_rsi(df, period):
+    close = list(df['close'])
+    # Nến đầu chưa có delta được tính là 0 (delta.where(...) thay NaN bằng 0)
+    gains = [0] + [max(close[i] - close[i - 1], 0) for i in range(1, len(close))]
+    losses = [0] + [max(close[i - 1] - close[i], 0) for i in range(1, len(close))]
+    gain = _window_ref(gains, period, _mean)
+    loss = _window_ref(losses, period, _mean)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 100 - 100 / (1 + gain / loss)
+
+
+def ref_atr(df, period):
+    high, low, close = list(df['High']), list(df['Low']), list(df['Close'])
+    tr = [high[0] - low[0]]
+    for i in range(1, len(close)):
+        tr.append(max(high[i] - low[i], abs(high[i] - close[i - 1]), abs(low[i] - close[i - 1])))
+    return _window_ref(tr, period, _mean)
+
+
+def ref_bollinger(df, period, num_std):
+    close = list(df['Close'])
+    mid = _window_ref(close, period, _mean)
+    std = _window_ref(close, period, _std)
+    return np.column_stack([mid + num_std * std, mid, mid - num_std * std])
+
+
+def ref_cci(df, period):
+    tp = [(h + l + c) / 3 for h, l, c in zip(df['High'], df['Low'], df['Close'])]
+    ma = _window_ref(tp, period, _mean)
+    dev = [abs(v - m) for v, m in zip(tp, ma)]
+    md = _window_ref(dev, period, _mean)
+    return (np.array(tp) - ma) / (0.015 * md)
+
+
+def ref_stochastic(df, k_period, d_period):
+    low_min = _window_ref(list(df['Low']), k_period, min)
+    high_max = _window_ref(list(df['High']), k_period, max)
+    k = 100 * (df['Close'].to_numpy() - low_min) / (high_max - low_min)
+    d = _window_ref(list(k), d_period, _mean)
+    return np.column_stack([k, d])
+
+
+def ref_fractals(df):
+    high, low = list(df['High']), list(df['Low'])
+    n = len(high)
+    up = [False] * n
+    down = [False] * n
+    for i in range(2, n - 2):
+        around = (i - 2, i - 1, i + 1, i + 2)
+        up[i] = all(high[j] < high[i] for j in around)
+        down[i] = all(low[j] > low[i] for j in around)
+    return np.column_stack([up, down])
+
+
+def ref_obv(df):
+    close, volume = list(df['Close']), list(df['Volume'])
+    obv = [0]
+    for i in range(1, len(close)):
+        if close[i] > close[i - 1]:
+            obv.append(obv[-1] + volume[i])
+        elif close[i] < close[i - 1]:
+            obv.append(obv[-1] - volume[i])
+        else:
+            obv.append(obv[-1])
+    return np.array(obv)
+
+
+# (tên, indicator, bản tham chiếu)
+CASES = [
+    ('SMA(20)', SMA(20), lambda df: ref_sma(df, 20)),
+    ('EMA(20)', EMA(20), lambda df: ref_ema(df, 20)),
+    ('MACD(12,26,9)', MACD(12, 26, 9), lambda df: ref_macd(df, 12, 26, 9)),
+    ('RSI(14)', RSI(14), lambda df: ref_rsi(df, 14)),
+    ('ATR(14)', ATR(14), lambda df: ref_atr(df, 14)),
+    ('BollingerBands(20,2)', BollingerBands(20, 2), lambda df: ref_bollinger(df, 20, 2)),
+    ('CCI(20)', CCI(20), lambda df: ref_cci(df, 20)),
+    ('Stochastic(14,3)', Stochastic(14, 3), lambda df: ref_stochastic(df, 14, 3)),
+    ('Fractals', Fractals(), ref_fractals),
+    ('OBV', OBV(), ref_obv),
+]
+
+
+def make_indicator_data(n, seed=0):
+    # Dữ liệu giả lập có cả cột chữ thường (SMA/EMA/MACD/RSI) và chữ hoa (ATR/BB/CCI/Stochastic/Fractals/OBV)
+    df = make_ohlcv(n, seed=seed)
+    df['volume'] = df['volume'].astype(np.int64)
+    for col in ('open', 'high', 'low', 'close', 'volume'):
+        df[col.capitalize()] = df[col]
+    return df
+
+
+def check_parity(indicator, ref, df):
+    result = indicator.calculate(df)
+    actual = np.asarray(result.to_numpy() if hasattr(result, 'to_numpy') else result, dtype=float)
+    expected = np.asarray(ref(df), dtype=float)
+    return actual.shape == expected.shape and np.allclose(actual, expected, rtol=1e-9, atol=1e-9, equal_nan=True)
+
+
+def _as_row(value):
+    if value is None:
+        return None
+    return list(value.values()) if isinstance(value, dict) else [value]
+
+
+def check_update_parity(indicator, df):
+    # Chạy update() từng nến, ở giữa lưu trạng thái ra json rồi nạp vào 1 instance mới (warm-start).
+    # Fractals trả về giá trị của nến cách 2 nến (chờ xác nhận) nên được dịch lại.
+    expected = indicator.calculate(df)
+    expected = np.asarray(expected.to_numpy() if hasattr(expected, 'to_numpy') else expected, dtype=float)
+    expected = expected.reshape(len(df), -1)
+    delay = 2 if isinstance(indicator, Fractals) else 0
+    current = type(indicator)(**indicator.params)
+    rows = []
+    for i, bar in enumerate(iter_bars(df)):
+        if i == len(df) // 2:
+            state = json.loads(json.dumps(current.get_state()))
+            current = type(indicator)(**indicator.params).set_state(state)
+        row = _as_row(current.update(bar))
+        if row is not None:
+            rows.append(row)
+    actual = np.asarray(rows, dtype=float).reshape(-1, expected.shape[1])
+    expected = expected[:len(expected) - delay]
+    return actual.shape == expected.shape and np.allclose(actual, expected, rtol=1e-7, atol=1e-9, equal_nan=True)
+
+
+def benchmark(indicator, df, repeat=3):
+    best = math.inf
+    for _ in range(repeat):
+        started = time.perf_counter()
+        indicator.calculate(df)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def check_bollinger_many(df):
+    # Chèn các đoạn giá đứng yên (ngừng giao dịch) ở giữa khối và vắt qua ranh giới khối của IndicatorBank
+    close = df['Close'].to_numpy(dtype=float)
+    for at, length in ((700, 300), (2000, 1500), (4090, 260)):
+        close = np.concatenate((close[:at], np.full(length, close[at]), close[at:]))
+    many = BollingerBands.calculate_many(pd.DataFrame({'Close': close}), MANY_PERIODS)
+    ok = True
+    for j, period in enumerate(MANY_PERIODS):
+        windows = np.lib.stride_tricks.sliding_window_view(close, period)
+        std = (many['upper'][period - 1:, j] - many['middle'][period - 1:, j]) / 2
+        flat = windows.max(axis=1) == windows.min(axis=1)
+        ok &= bool(np.all(std[flat] == 0))
+        ok &= bool(np.allclose(std[~flat], windows[~flat].std(axis=1, ddof=1), rtol=1e-6, atol=1e-10))
+    return ok
+
+
+if __name__ == '__main__':
+    parity_df = make_indicator_data(N_PARITY)
+    bench_df = make_indicator_data(N_BENCH, seed=1)
+    failed = 0
+    for name, indicator, ref in CASES:
+        ok = check_parity(indicator, ref, parity_df)
+        update_ok = check_update_parity(indicator, parity_df)
+        elapsed = benchmark(indicator, bench_df)
+        ns_per_bar = elapsed / N_BENCH * 1e9
+        fast = ns_per_bar <= MAX_NS_PER_BAR
+        status = 'OK' if ok and update_ok and fast else 'FAILED'
+        print(f"[{status}] {name:<22} parity={'OK' if ok else 'FAILED':<6} update={'OK' if update_ok else 'FAILED':<6} "
+              f"{elapsed * 1000:8.1f} ms / {N_BENCH} nến ({ns_per_bar:6.1f} ns/nến)")
+        failed += 0 if ok and update_ok and fast else 1
+    ok = check_bollinger_many(parity_df)
+    print(f"[{'OK' if ok else 'FAILED'}] BollingerBands.calculate_many {len(MANY_PERIODS)} chu kỳ khớp std từng cửa sổ, "
+          f"đoạn giá đứng yên có độ rộng 0")
+    failed += 0 if ok else 1
+    if failed:
+        print(f"[ERROR] {failed} indicator sai so với bản tham chiếu/update() hoặc chậm hơn {MAX_NS_PER_BAR} ns/nến")
+        sys.exit(1)
+    print("[INFO] Mọi indicator khớp bản tham chiếu, update() khớp calculate() và đạt ngưỡng tốc độ")
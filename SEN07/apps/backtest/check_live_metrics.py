@@ -0,0 +1,104 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+from src.backtest.engine import BacktestEngine
+from src.backtest.live_metrics import LiveMetrics
+from src.backtest.metrics import batch_metrics
+from src.backtest.streaming import StreamingBacktestEngine
+from src.strategies.combo import ComboStrategy
+from src.utils.synthetic_data import make_ohlcv
+
+# Kiểm tra LiveMetrics (cập nhật từng nến) với batch_metrics tính lại trên toàn bộ lợi nhuận (bản tham chiếu):
+#   - Tích luỹ, cửa sổ N nến, cửa sổ theo thời gian: so tại nhiều điểm trong chuỗi lợi nhuận (có nến NaN).
+#   - Nến lỗ >= 100% (đòn bẩy, short khi giá tăng gấp đôi): không lỗi, total_return = -1, ruined = True;
+#     bản cửa sổ hồi lại khi nến đó rời cửa sổ.
+#   - on_equity với StreamingBacktestEngine: khớp equity của BacktestEngine.
+# Chạy từ thư mục gốc project:
+#     python -m apps.backtest.check_live_metrics
+
+N_BARS = 3000
+WINDOW_BARS = 250
+WINDOW_TIME = '3D'
+CHECKPOINTS = (2, 10, 249, 250, 251, 1000, 2999)  # nến 1 là NaN (chưa có lợi nhuận)
+METRICS = ('total_return', 'max_drawdown', 'sharpe_ratio', 'sortino_ratio', 'profit_factor', 'annualized_return',
+           'time_in_market')
+
+
+def make_returns(seed):
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0, 0.01, N_BARS)
+    returns[rng.random(N_BARS) < 0.2] = 0.0  # nến không giữ lệnh
+    returns[rng.choice(N_BARS, 30, replace=False)] = np.nan
+    returns[0] = np.nan
+    return returns
+
+
+def same(snapshot, reference):
+    return all(np.isclose(snapshot[name], reference[name], rtol=1e-8, atol=1e-12, equal_nan=True) for name in METRICS)
+
+
+def check_against_batch(returns, times, window):
+    tracker = LiveMetrics(window=window)
+    ok = True
+    for i, (ret, time) in enumerate(zip(returns, times)):
+        tracker.update(ret, time=time)
+        if i + 1 not in CHECKPOINTS:
+            continue
+        if window is None:
+            lo = 0
+        elif isinstance(window, int):
+            lo = max(0, i + 1 - window)
+        else:
+            lo = int(np.searchsorted(times, np.datetime64(pd.Timestamp(time) - pd.Timedelta(window)), side='right'))
+        reference = batch_metrics(returns[lo:i + 1]).iloc[0]
+        ok &= same(tracker.snapshot(), reference)
+    return ok
+
+
+def check_ruin():
+    # Short 2 lần đòn bẩy khi giá tăng 60%: lợi nhuận nến -120%
+    ok = True
+    returns = [0.01, -0.02, -1.2, 0.03, 0.01]
+    cumulative, windowed = LiveMetrics(), LiveMetrics(window=2)
+    for ret in returns:
+        cumulative.update(ret)
+        windowed.update(ret)
+        snap = windowed.snapshot()
+    final = cumulative.snapshot()
+    ok &= final['ruined'] and final['total_return'] == -1 and final['max_drawdown'] == -1
+    ok &= not snap['ruined'] and np.isclose(snap['total_return'], 1.03 * 1.01 - 1)
+    first = LiveMetrics()
+    first.update(-1.0)
+    ok &= first.snapshot()['total_return'] == -1 and first.snapshot()['max_drawdown'] == -1
+    return bool(ok)
+
+
+def check_streaming(df):
+    tracker = LiveMetrics()
+    for _ in StreamingBacktestEngine(ComboStrategy(), fee_perc=0.0002, on_equity=tracker.on_equity).replay(df):
+        pass
+    equity = BacktestEngine(ComboStrategy(), df, fee_perc=0.0002).run()['equity'].to_numpy(dtype=float)
+    return bool(np.isclose(tracker.snapshot()['total_return'], equity[-1] / equity[0] - 1, rtol=1e-9))
+
+
+if __name__ == '__main__':
+    failed = 0
+    times = pd.date_range('2024-01-01', periods=N_BARS, freq='15min').to_numpy()
+    for seed in (0, 1):
+        returns = make_returns(seed)
+        for name, window in (('tích luỹ', None), (f'{WINDOW_BARS} nến', WINDOW_BARS), (WINDOW_TIME, WINDOW_TIME)):
+            ok = check_against_batch(returns, times, window)
+            print(f"[{'OK' if ok else 'FAILED'}] LiveMetrics {name} khớp batch_metrics seed={seed}")
+            failed += 0 if ok else 1
+    ok = check_ruin()
+    print(f"[{'OK' if ok else 'FAILED'}] Nến lỗ >= 100%: ruined, total_return = -1, cửa sổ hồi lại khi nến rời cửa sổ")
+    failed += 0 if ok else 1
+    ok = check_streaming(make_ohlcv(N_BARS, seed=0))
+    print(f"[{'OK' if ok else 'FAILED'}] LiveMetrics.on_equity khớp equity của BacktestEngine")
+    failed += 0 if ok else 1
+    if failed:
+        print(f"[ERROR] {failed} kiểm tra LiveMetrics không đạt")
+        sys.exit(1)
+    print("[INFO] LiveMetrics khớp metrics tính lại trên toàn bộ lợi nhuận")
@@ -0,0 +1,86 @@
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.backtest.engine import BacktestEngine
+from src.indicators.cache import IndicatorCache
+from src.strategies.combo import ComboStrategy
+from src.strategies.mtf_filter import TrendFilterStrategy
+from src.utils.multi_timeframe import MultiTimeframeView, resample_ohlcv
+from src.utils.timeframes import TIMEFRAME_MINUTES
+from src.utils.ohlcv_frame import OHLCVFrame
+from src.utils.synthetic_data import make_ohlcv
+
+# Kiểm tra MultiTimeframeView trên dữ liệu giả lập m5 (nến h1/h4/D gộp từ m5):
+#   - Cột ghép khớp pd.merge_asof theo thời điểm đóng nến (bản tham chiếu).
+#   - Không nhìn trước: cắt dữ liệu tại nhiều điểm (nến timeframe cao cuối còn đang chạy), giá trị đã ghép của các
+#     nến trước điểm cắt không đổi.
+#   - Chi phí: backtest ComboStrategy có/không có bộ lọc xu hướng h1 (lần chạy lại dùng cache).
+# Chạy từ thư mục gốc project:
+#     python -m apps.backtest.check_multi_timeframe
+
+N_BARS = 20000
+BASE = 'm5'
+HIGHER = ('h1', 'h4', 'D')
+CUTS = (1, 11, 12, 13, 287, 288, 5000, 12345)
+REPEAT = 5
+
+
+def reference_asof(df, higher, timeframe, column):
+    # Bản tham chiếu: merge_asof trên thời điểm đóng nến (nến gốc thấy nến timeframe cao đóng trước/đúng lúc nó đóng)
+    base_close = df['time'] + pd.Timedelta(minutes=TIMEFRAME_MINUTES[BASE])
+    higher_close = higher['time'] + pd.Timedelta(minutes=TIMEFRAME_MINUTES[timeframe])
+    left = pd.DataFrame({'t': base_close})
+    right = pd.DataFrame({'t': higher_close, 'v': higher[column].to_numpy(dtype=float)})
+    return pd.merge_asof(left, right, on='t', direction='backward')['v'].to_numpy()
+
+
+def best_time(func):
+    best = np.inf
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+if __name__ == '__main__':
+    df = make_ohlcv(N_BARS, seed=3)
+    frames = {tf: resample_ohlcv(df, tf) for tf in HIGHER}
+    view = MultiTimeframeView(frames, BASE, cache=IndicatorCache())
+    failed = 0
+
+    for tf in HIGHER:
+        actual = view.aligned(df, tf, ('col', 'close')).to_numpy()
+        expected = reference_asof(df, frames[tf], tf, 'close')
+        ok = np.array_equal(actual, expected, equal_nan=True)
+        print(f"[{'OK' if ok else 'FAILED'}] {tf} close khớp merge_asof theo thời điểm đóng nến")
+        failed += 0 if ok else 1
+
+    for tf in HIGHER:
+        full = view.aligned(df, tf, ('sma', 20)).to_numpy()
+        ok = True
+        for cut in CUTS:
+            part = df.iloc[:cut]
+            part_view = MultiTimeframeView({tf: resample_ohlcv(part, tf)}, BASE, cache=None)
+            ok &= np.array_equal(part_view.aligned(part, tf, ('sma', 20)).to_numpy(), full[:cut], equal_nan=True)
+        print(f"[{'OK' if ok else 'FAILED'}] {tf} sma(20) không đổi khi cắt dữ liệu tại {len(CUTS)} điểm (không nhìn trước)")
+        failed += 0 if ok else 1
+
+    frame = OHLCVFrame.from_frame(df)
+    base = ComboStrategy()
+    filtered = TrendFilterStrategy(strategy=ComboStrategy(), view=view, timeframe='h1', trend_period=50)
+    out = BacktestEngine(filtered, frame).run()
+    entries = int(np.count_nonzero(base.generate_signals(df.copy())['signal']))
+    kept = int(np.count_nonzero(out['signal'].to_numpy()))
+    print(f"[INFO] Bộ lọc xu hướng h1 giữ {kept}/{entries} tín hiệu của ComboStrategy")
+    base_time = best_time(lambda: BacktestEngine(base, frame).run())
+    filtered_time = best_time(lambda: BacktestEngine(filtered, frame).run())
+    print(f"[RESULT] Backtest {N_BARS} nến m5: ComboStrategy {base_time * 1000:.1f} ms, "
+          f"+ lọc h1 {filtered_time * 1000:.1f} ms (thêm {(filtered_time - base_time) * 1000:.1f} ms, cache {view.cache.stats()['hit_rate']:.0%} hit)")
+    if failed:
+        print(f"[ERROR] {failed} kiểm tra multi-timeframe không đạt")
+        sys.exit(1)
+    print("[INFO] MultiTimeframeView ghép đúng nến đã đóng, không nhìn trước")
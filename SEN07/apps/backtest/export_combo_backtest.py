@@ -1,11 +1,10 @@
 import json
-import pandas as pd
-import sqlalchemy
+import sys
 from datetime import datetime
 from src.strategies.combo import ComboStrategy
 from src.connectors.sql_connector import SQLConnector
-from src.indicators.sma import SMA
-from src.indicators.macd import MACD
+from src.fetchers.sql_fetcher import load_ohlcv
+from src.indicators.cache import default_cache
 import plotly.graph_objs as go
 
 # --- CONFIG ---
@@ -17,58 +16,15 @@ END = '2025-07-01 00:00:00'
 CSV_PATH = f'backtest_{SYMBOL}_{TIMEFRAME}.csv'
 JSON_PATH = f'chart_{SYMBOL}_{TIMEFRAME}.json'
 
-# --- SQL CONFIG ---
-with open("config/config.json", 'r') as f:
-    config = json.load(f)
-sql_cfg = config['sql']
-sql_conn = SQLConnector(sql_cfg)
-engine = sql_conn.get_engine()
-
-def fetch_ohlcv(symbol, timeframe, provider, start, end):
-    with engine.connect() as conn:
-        symbol_id = conn.execute(
-            sqlalchemy.text("SELECT Id FROM Symbols WHERE Symbol = :symbol OR RefName = :symbol"), {"symbol": symbol}
-        ).scalar()
-        provider_id = conn.execute(
-            sqlalchemy.text("SELECT Id FROM DataProviders WHERE Name = :provider"), {"provider": provider}
-        ).scalar()
-        if symbol_id is None:
-            print(f"[ERROR] Không tìm thấy SymbolId cho {symbol}")
-        if provider_id is None:
-            print(f"[ERROR] Không tìm thấy ProviderId cho {provider}")
-        query = sqlalchemy.text(f"""
-            SELECT TimeStamp, [Open], [High], [Low], [Close], Volume
-            FROM [{timeframe}]
-            WHERE SymbolId = :symbol_id AND DataProviderId = :provider_id
-              AND TimeStamp >= :start AND TimeStamp <= :end
-            ORDER BY TimeStamp
-        """)
-        df = pd.read_sql(query, conn, params={
-            "symbol_id": symbol_id,
-            "provider_id": provider_id,
-            "start": start,
-            "end": end
-        })
-    df = df.rename(columns={
-        'TimeStamp': 'time',
-        'Open': 'open',
-        'High': 'high',
-        'Low': 'low',
-        'Close': 'close',
-        'Volume': 'volume'
-    })
-    df['time'] = pd.to_datetime(df['time'])
-    return df
-
 def run_combo_strategy(df):
     strategy = ComboStrategy()
     df = strategy.generate_signals(df)
-    # Tính thêm MA20, MACD hist để xuất ra file/chart
-    df['ma20'] = SMA(period=20).calculate(df)
-    macd_df = MACD(fast=5, slow=25, signal=5).calculate(df)
-    df['macd'] = macd_df['macd']
-    df['macd_signal'] = macd_df['signal']
-    df['macd_hist'] = macd_df['hist']
+    # Thêm MA20, MACD để xuất ra file/chart (cùng pipeline với strategy, lấy lại từ cache vì strategy đã tính khi sinh tín hiệu)
+    indicators = strategy.make_pipeline().run(df, cache=default_cache)
+    df['ma20'] = indicators['ma']
+    df['macd'] = indicators['macd']
+    df['macd_signal'] = indicators['macd_signal']
+    df['macd_hist'] = indicators['macd_hist']
     return df
 
 def export_csv(df, path):
@@ -112,12 +68,19 @@ def show_plotly_chart(df):
     fig.show()
 
 if __name__ == '__main__':
-    df = fetch_ohlcv(SYMBOL, TIMEFRAME, PROVIDER, START, END)
+    # Kết nối SQL khi chạy script (không kết nối lúc import module, vd khi process pool import lại module)
+    with open("config/config.json", 'r') as f:
+        config = json.load(f)
+    engine = SQLConnector(config['sql']).get_engine()
+    # DataFrame (không phải OHLCVFrame): file CSV/JSON và chart dùng trực tiếp các cột thêm vào
+    df = load_ohlcv(engine, SYMBOL, TIMEFRAME, PROVIDER, START, END, compact=config.get('compact_load', False),
+                    as_frame=False)
     print(f"[INFO] Lấy {len(df)} nến từ SQL cho {SYMBOL} {TIMEFRAME}")
     if df.empty:
         print("[ERROR] Không có dữ liệu OHLCV trả về. Kiểm tra lại symbol, provider, timeframe hoặc thời gian truy vấn.")
         sys.exit(1)
     df = run_combo_strategy(df)
+    print(f"[INFO] Indicator cache: {default_cache.stats()}")
     export_csv(df, CSV_PATH)
     export_json(df, JSON_PATH)
     show_plotly_chart(df) 
\ No newline at end of file
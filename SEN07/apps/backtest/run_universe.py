@@ -0,0 +1,57 @@
+import json
+from datetime import datetime
+
+import numpy as np
+import sqlalchemy
+
+from src.strategies.combo import ComboStrategy
+from src.backtest.universe import fetch_active_universe, run_universe
+from src.connectors.sql_connector import SQLConnector
+
+# Chạy strategy trên mọi symbol × timeframe đang active (table_symbols, table_timeframes) song song trên mọi core,
+# gộp metrics của tất cả vào 1 bảng: file CSV_PATH và bảng SQL METRICS_TABLE (mỗi lần chạy thêm các dòng có run_at).
+# Chạy từ thư mục gốc project:
+#     python -m apps.backtest.run_universe
+
+# --- CONFIG ---
+STRATEGY = ComboStrategy
+PARAMS = {}
+PROVIDER = 'FTMO'
+START = '2024-01-01 00:00:00'
+END = '2025-01-01 00:00:00'
+SYMBOLS = None  # None = mọi symbol active, hoặc list tên, vd ['EURUSD', 'GOLD']
+TIMEFRAMES = None  # None = mọi timeframe active, hoặc list tên, vd ['m5', 'h1']
+INITIAL_BALANCE = 100000
+FEE_PERC = 0.0002  # 0.02% mỗi lần vào/ra lệnh
+N_JOBS = None  # None = dùng toàn bộ core
+CSV_PATH = f'universe_{STRATEGY.__name__}.csv'
+METRICS_TABLE = 'table_backtest_metrics'  # None = chỉ lưu CSV
+
+
+if __name__ == '__main__':
+    # Kết nối SQL chỉ trong process chính (lấy danh sách job, ghi kết quả); mỗi worker tự tạo engine riêng
+    with open("config/config.json", 'r') as f:
+        config = json.load(f)
+    sql_cfg = config['sql']
+    engine = SQLConnector(sql_cfg).get_engine()
+    with engine.connect() as conn:
+        provider_id = conn.execute(
+            sqlalchemy.text("SELECT Id FROM table_dataproviders WHERE Name = :provider"), {"provider": PROVIDER}
+        ).scalar()
+    if provider_id is None:
+        print(f"[ERROR] Không tìm thấy ProviderId cho {PROVIDER}")
+        raise SystemExit(1)
+    jobs = fetch_active_universe(engine, symbols=SYMBOLS, timeframes=TIMEFRAMES)
+    print(f"[INFO] {len(jobs)} job ({jobs['symbol'].nunique()} symbol × {jobs['timeframe'].nunique()} timeframe)")
+    result = run_universe(sql_cfg, jobs, STRATEGY, PARAMS, provider_id=provider_id, start=START, end=END,
+                          n_jobs=N_JOBS, initial_balance=INITIAL_BALANCE, fee_perc=FEE_PERC, compact=config.get('compact_load', False))
+    result.insert(0, 'strategy', STRATEGY.__name__)
+    result.insert(0, 'run_at', datetime.now())
+    result.to_csv(CSV_PATH, index=False)
+    print(f"[RESULT] Đã lưu metrics {len(result)} job ra file CSV: {CSV_PATH}")
+    if METRICS_TABLE:
+        # SQL Server không lưu được inf (vd profit_factor khi không có lệnh lỗ)
+        result.replace([np.inf, -np.inf], np.nan).to_sql(METRICS_TABLE, engine, if_exists='append', index=False)
+        print(f"[RESULT] Đã ghi {len(result)} dòng vào bảng {METRICS_TABLE}")
+    if 'sharpe_ratio' in result.columns:
+        print(result.sort_values('sharpe_ratio', ascending=False).head(10).to_string(index=False))
@@ -0,0 +1,58 @@
+import json
+import time
+
+import pandas as pd
+import sqlalchemy
+
+from src.connectors.sql_connector import SQLConnector
+from src.fetchers.sql_fetcher import SQLFetcher, load_ohlcv
+from src.strategies.rules import RuleSet, evaluate_library, library_rules
+
+# Quét toàn bộ thư viện rule (bảng table_trading_rules, Active = 1) trên mọi symbol đang active:
+# các rule biên dịch chung thành 1 kế hoạch (biểu thức con/indicator trùng nhau chỉ tính 1 lần mỗi symbol),
+# in số nến thỏa từng rule ở mỗi symbol và lưu ra CSV_PATH.
+# Chạy từ thư mục gốc project:
+#     python -m apps.backtest.scan_rules
+
+# --- CONFIG ---
+TIMEFRAME = 'm5'
+PROVIDER = 'FTMO'
+START = '2024-01-01 00:00:00'
+END = '2024-07-01 00:00:00'
+CSV_PATH = f'scan_rules_{TIMEFRAME}.csv'
+
+
+def fetch_active_symbols(engine):
+    with engine.connect() as conn:
+        return pd.read_sql(sqlalchemy.text("SELECT Id, Symbol FROM table_symbols WHERE Active = 1 ORDER BY Id"), conn)
+
+
+if __name__ == '__main__':
+    # Kết nối SQL khi chạy script (không kết nối lúc import module, vd khi process pool import lại module)
+    with open("config/config.json", 'r') as f:
+        config = json.load(f)
+    engine = SQLConnector(config['sql']).get_engine()
+    rows = SQLFetcher(engine.url).fetch_trading_rules()
+    if rows.empty:
+        print("[ERROR] Không có rule nào Active = 1 trong table_trading_rules")
+        raise SystemExit(1)
+    rule_set = RuleSet(library_rules(rows))
+    stats = rule_set.stats()
+    print(f"[INFO] {len(rows)} rule ({stats['rules']} điều kiện buy/sell): {stats['references']} biểu thức con, "
+          f"{stats['nodes']} node sau khi gộp")
+    symbols = fetch_active_symbols(engine)
+    frames = {}
+    for symbol in symbols['Symbol']:
+        df = load_ohlcv(engine, symbol, TIMEFRAME, PROVIDER, START, END, compact=config.get('compact_load', False))
+        if len(df):
+            frames[symbol] = df
+    started = time.perf_counter()
+    masks = evaluate_library(rule_set, frames)
+    elapsed = time.perf_counter() - started
+    bars = sum(len(df) for df in frames.values())
+    print(f"[RESULT] {stats['rules']} điều kiện × {len(frames)} symbol ({bars} nến) trong {elapsed:.2f}s")
+    summary = pd.DataFrame({symbol: mask.sum() for symbol, mask in masks.items()}).T
+    summary.index.name = 'symbol'
+    print(summary.to_string())
+    summary.to_csv(CSV_PATH)
+    print(f"[INFO] Đã lưu số nến thỏa từng rule vào {CSV_PATH}")
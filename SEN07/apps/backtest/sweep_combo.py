@@ -0,0 +1,53 @@
+import json
+
+from src.strategies.combo import ComboStrategy
+from src.strategies.ma_cross import MACrossStrategy
+from src.backtest.sweep import run_sweep
+from src.connectors.sql_connector import SQLConnector
+from src.fetchers.sql_fetcher import load_ohlcv
+
+# Quét tham số cho ComboStrategy / MACrossStrategy trên process pool.
+# Chạy từ thư mục gốc project:
+#     python -m apps.backtest.sweep_combo
+
+# --- CONFIG ---
+SYMBOL = 'EURUSD'
+TIMEFRAME = 'm5'
+PROVIDER = 'FTMO'
+START = '2024-01-01 00:00:00'
+END = '2025-01-01 00:00:00'
+INITIAL_BALANCE = 100000
+FEE_PERC = 0.0002  # 0.02% mỗi lần vào/ra lệnh
+N_JOBS = None  # None = dùng toàn bộ core
+STRATEGY = 'combo'  # 'combo' hoặc 'ma_cross'
+CSV_PATH = f'sweep_{STRATEGY}_{SYMBOL}_{TIMEFRAME}.csv'
+
+GRIDS = {
+    'combo': (ComboStrategy, {
+        'ma_period': [10, 20, 30, 50, 100],
+        'macd_fast': [3, 5, 8, 12],
+        'macd_slow': [20, 25, 26, 35],
+        'macd_signal': [5, 9],
+    }),
+    'ma_cross': (MACrossStrategy, {
+        'fast': [5, 10, 15, 20, 30],
+        'slow': [40, 50, 100, 150, 200],
+    }),
+}
+
+
+if __name__ == '__main__':
+    # Kết nối SQL chỉ trong process chính, worker chỉ nhận DataFrame đã nạp sẵn
+    with open("config/config.json", 'r') as f:
+        config = json.load(f)
+    engine = SQLConnector(config['sql']).get_engine()
+    # Nạp dữ liệu 1 lần cho symbol/timeframe, dùng chung cho mọi tổ hợp tham số
+    # OHLCVFrame: mỗi BacktestEngine trong worker chỉ copy danh sách cột, không copy dữ liệu giá
+    df = load_ohlcv(engine, SYMBOL, TIMEFRAME, PROVIDER, START, END, compact=config.get('compact_load', False))
+    print(f"[INFO] Lấy {len(df)} nến từ SQL cho {SYMBOL} {TIMEFRAME}")
+    strategy_cls, grid = GRIDS[STRATEGY]
+    result = run_sweep(strategy_cls, df, grid, n_jobs=N_JOBS, initial_balance=INITIAL_BALANCE, fee_perc=FEE_PERC)
+    result = result.sort_values('sharpe_ratio', ascending=False)
+    result.to_csv(CSV_PATH, index=False)
+    print(f"[RESULT] Đã lưu kết quả sweep ({len(result)} bộ tham số) ra file CSV: {CSV_PATH}")
+    print(result.head(10).to_string(index=False))
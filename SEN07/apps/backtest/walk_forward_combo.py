@@ -0,0 +1,47 @@
+import json
+
+from src.strategies.combo import ComboStrategy
+from src.backtest.sweep import expand_grid
+from src.backtest.walk_forward import run_walk_forward
+from src.connectors.sql_connector import SQLConnector
+from src.fetchers.sql_fetcher import load_ohlcv
+
+# Walk-forward cho ComboStrategy: tối ưu trên in-sample, kiểm tra trên out-of-sample kế tiếp.
+# Chạy từ thư mục gốc project:
+#     python -m apps.backtest.walk_forward_combo
+
+# --- CONFIG ---
+SYMBOL = 'EURUSD'
+TIMEFRAME = 'm15'
+PROVIDER = 'FTMO'
+START = '2020-01-01 00:00:00'
+END = '2025-01-01 00:00:00'
+INITIAL_BALANCE = 100000
+FEE_PERC = 0.0002  # 0.02% mỗi lần vào/ra lệnh
+IS_BARS = 96 * 250  # ~1 năm nến m15
+OOS_BARS = 96 * 60  # ~3 tháng nến m15
+ANCHORED = False
+OBJECTIVE = 'total_return'
+N_JOBS = None  # None = dùng toàn bộ core
+CSV_PATH = f'walk_forward_combo_{SYMBOL}_{TIMEFRAME}.csv'
+GRID = {
+    'ma_period': [10, 20, 30, 50, 100],
+    'macd_fast': [3, 5, 8, 12],
+    'macd_slow': [20, 25, 26, 35],
+    'macd_signal': [5, 9],
+}
+
+if __name__ == '__main__':
+    with open("config/config.json", 'r') as f:
+        config = json.load(f)
+    engine = SQLConnector(config['sql']).get_engine()
+    df = load_ohlcv(engine, SYMBOL, TIMEFRAME, PROVIDER, START, END, compact=config.get('compact_load', False))
+    print(f"[INFO] Lấy {len(df)} nến từ SQL cho {SYMBOL} {TIMEFRAME}")
+    result = run_walk_forward(
+        ComboStrategy(), df, expand_grid(GRID), IS_BARS, OOS_BARS, anchored=ANCHORED, objective=OBJECTIVE,
+        initial_balance=INITIAL_BALANCE, fee_perc=FEE_PERC, n_jobs=N_JOBS
+    )
+    result.windows.to_csv(CSV_PATH, index=False)
+    print(result.windows.to_string(index=False))
+    print(f"[RESULT] Lợi nhuận out-of-sample nối liền: {result.total_return():.4f}")
+    print(f"[RESULT] Đã lưu kết quả walk-forward ra file CSV: {CSV_PATH}")
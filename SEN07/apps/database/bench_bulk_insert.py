@@ -0,0 +1,149 @@
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+import sqlalchemy
+
+from src.connectors.bulk_writer import OHLCV_COLUMNS, OHLCV_KEY, BulkWriter, to_rows
+from src.utils.synthetic_data import make_ohlcv
+
+# Benchmark ghi nến vào bảng data_<timeframe> trên SQLite (thay cho SQL Server, không cần server):
+#   - từng dòng 1 lệnh INSERT (như to_sql qua pyodbc không bật fast_executemany)
+#   - df.to_sql(if_exists='append')
+#   - BulkWriter với các batch size khác nhau
+# In số dòng/giây và kiểm tra dữ liệu ghi vào giống nhau. Trên SQL Server chênh lệch lớn hơn nhiều vì mỗi lệnh
+# INSERT từng dòng là 1 round-trip mạng, còn BulkWriter + fast_executemany gửi cả lô 1 lần.
+# Phần 2: đồng bộ 1 lần fetch (SYNC_BARS nến, phần lớn đã có trong bảng) khi bảng đã có lịch sử dài dần:
+#   - cách cũ: đọc toàn bộ timestamp đã lưu của symbol về Python, lọc, rồi ghi (chi phí tăng theo lịch sử)
+#   - BulkWriter.upsert: bảng tạm + anti-join trên khóa chính (chi phí theo số nến gửi lên)
+# Chạy từ thư mục gốc project:
+#     python -m apps.database.bench_bulk_insert
+
+N_BARS = 20000
+N_SYMBOLS = 10
+BATCH_SIZES = (500, 5000, 50000)
+SYNC_BARS = 20000
+NEW_BARS = 500
+HISTORY_BARS = (50000, 200000, 800000)
+
+CREATE_TABLE = '''CREATE TABLE data_m5 (
+    SymbolId INT NOT NULL,
+    DataProviderId INT NOT NULL,
+    TimeframeId INT NOT NULL,
+    TimeStamp DATETIME NOT NULL,
+    [Open] FLOAT NOT NULL,
+    [High] FLOAT NOT NULL,
+    [Low] FLOAT NOT NULL,
+    [Close] FLOAT NOT NULL,
+    Volume BIGINT,
+    Exchange NVARCHAR(50),
+    PRIMARY KEY (SymbolId, DataProviderId, TimeframeId, TimeStamp)
+)'''
+
+
+def make_rows(n_bars, n_symbols):
+    parts = []
+    for symbol_id in range(1, n_symbols + 1):
+        df = make_ohlcv(n_bars, seed=symbol_id)
+        parts.append(pd.DataFrame({
+            'SymbolId': symbol_id, 'DataProviderId': 1, 'TimeframeId': 3, 'TimeStamp': df['time'],
+            'Open': df['open'], 'High': df['high'], 'Low': df['low'], 'Close': df['close'],
+            'Volume': df['volume'].astype('int64'), 'Exchange': 'FTMO',
+        }))
+    return pd.concat(parts, ignore_index=True)[OHLCV_COLUMNS]
+
+
+def fresh_engine(path):
+    if os.path.exists(path):
+        os.remove(path)
+    engine = sqlalchemy.create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        conn.exec_driver_sql(CREATE_TABLE)
+    return engine
+
+
+def row_by_row(engine, df):
+    sql = BulkWriter(engine).insert_sql('data_m5', OHLCV_COLUMNS)
+    with engine.begin() as conn:
+        for row in to_rows(df):
+            conn.exec_driver_sql(sql, row)
+
+
+def read_back(engine):
+    # SQLite lưu datetime dạng chuỗi (to_sql có thêm phần micro giây), so sánh sau khi đổi lại datetime
+    with engine.connect() as conn:
+        df = pd.read_sql(sqlalchemy.text("SELECT * FROM data_m5 ORDER BY SymbolId, TimeStamp"), conn)
+    df['TimeStamp'] = pd.to_datetime(df['TimeStamp'])
+    return df
+
+
+def existing_then_write(engine, df):
+    # Cách cũ của historical_mt5_to_sql: đọc mọi timestamp của symbol/provider rồi lọc trong Python
+    with engine.connect() as conn:
+        existing = set(pd.to_datetime(pd.read_sql(
+            sqlalchemy.text("SELECT TimeStamp FROM data_m5 WHERE SymbolId = :s AND DataProviderId = :p"),
+            conn, params={"s": 1, "p": 1})['TimeStamp']))
+    new = df[~df['TimeStamp'].isin(existing)]
+    BulkWriter(engine, verbose=False).write(new, 'data_m5')
+    return len(new)
+
+
+def bench_sync(path):
+    failed = 0
+    for history in HISTORY_BARS:
+        stored = make_rows(history, 1)
+        # Lần fetch: SYNC_BARS nến cuối, NEW_BARS nến trong đó chưa có trong bảng
+        incoming = make_rows(history + NEW_BARS, 1).iloc[-SYNC_BARS:]
+        results = {}
+        for name, method in (('đọc timestamp + lọc', existing_then_write),
+                             ('upsert', lambda engine, df: BulkWriter(engine, verbose=False).upsert(df, 'data_m5', OHLCV_KEY))):
+            engine = fresh_engine(path)
+            BulkWriter(engine, batch_size=50000, verbose=False).write(stored, 'data_m5')
+            started = time.perf_counter()
+            inserted = method(engine, incoming)
+            elapsed = time.perf_counter() - started
+            # Chạy lại lần 2: không có nến mới
+            again = method(engine, incoming)
+            results[name] = read_back(engine)
+            engine.dispose()
+            ok = inserted == NEW_BARS and again == 0
+            failed += 0 if ok else 1
+            print(f"[RESULT] Lịch sử {history:>7} nến, {name:<20} {inserted} nến mới trong {elapsed * 1000:7.1f} ms"
+                  f"{'' if ok else '  [FAILED] số nến mới sai'}")
+        if not results['upsert'].equals(results['đọc timestamp + lọc']):
+            print("[FAILED] upsert cho dữ liệu khác cách cũ")
+            failed += 1
+    return failed
+
+
+if __name__ == '__main__':
+    df = make_rows(N_BARS, N_SYMBOLS)
+    path = os.path.join(tempfile.gettempdir(), 'sen07_bench_bulk_insert.db')
+    methods = [
+        ('INSERT từng dòng', lambda engine: row_by_row(engine, df)),
+        ('df.to_sql', lambda engine: df.to_sql('data_m5', engine, if_exists='append', index=False)),
+    ]
+    for batch_size in BATCH_SIZES:
+        methods.append((f'BulkWriter batch={batch_size}',
+                        lambda engine, b=batch_size: BulkWriter(engine, batch_size=b, verbose=False).write(df, 'data_m5')))
+    reference = None
+    failed = 0
+    for name, method in methods:
+        engine = fresh_engine(path)
+        started = time.perf_counter()
+        method(engine)
+        elapsed = time.perf_counter() - started
+        stored = read_back(engine)
+        engine.dispose()
+        reference = stored if reference is None else reference
+        ok = len(stored) == len(df) and stored.equals(reference)
+        failed += 0 if ok else 1
+        print(f"[RESULT] {name:<24} {len(df)} dòng trong {elapsed:6.2f}s ({len(df) / elapsed:10,.0f} dòng/s)"
+              f"{'' if ok else '  [FAILED] dữ liệu ghi vào khác'}")
+    failed += bench_sync(path)
+    os.remove(path)
+    if failed:
+        sys.exit(1)
+    print("[INFO] Mọi cách ghi cho cùng dữ liệu trong bảng, upsert chỉ thêm nến mới và chạy lại không ghi trùng")
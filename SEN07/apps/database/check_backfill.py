@@ -0,0 +1,164 @@
+import sys
+import types
+
+import numpy as np
+import pandas as pd
+
+# Kiểm tra MT5Fetcher.backfill trên nguồn MT5 giả lập (không cần terminal MT5, chạy được cả ngoài Windows):
+#   - DB rỗng, DB có 1 đoạn giữa: sau backfill có đủ mọi nến đã đóng, không có nến đang hình thành.
+#   - Ngắt giữa chừng: dữ liệu đã lưu luôn liền mạch, chạy lại từ watermark mới lấy đủ.
+#   - since: không lấy nến cũ hơn since.
+#   - Khoảng trống dữ liệu (nguồn ngừng 20 ngày) dài hơn 1 khối: không bị coi là hết lịch sử.
+#   - W/M với chunk_bars mặc định: khối bị giới hạn BACKFILL_MAX_SPAN, không lỗi tràn pd.Timedelta.
+# Chạy từ thư mục gốc project:
+#     python -m apps.database.check_backfill
+
+CHUNK_BARS = 2000
+RATES_DTYPE = [('time', 'i8'), ('open', 'f8'), ('high', 'f8'), ('low', 'f8'), ('close', 'f8'), ('tick_volume', 'u8')]
+
+
+class SimulatedMT5:
+    # Các hàm MetaTrader5 mà MT5Fetcher dùng, trả về nến có sẵn trong times (thời điểm mở nến, tăng dần).
+    # Nến cuối cùng là nến đang hình thành
+    TIMEFRAME_M1, TIMEFRAME_M5, TIMEFRAME_M15, TIMEFRAME_H1, TIMEFRAME_H4 = 1, 5, 15, 16385, 16388
+    TIMEFRAME_D1, TIMEFRAME_W1, TIMEFRAME_MN1 = 16408, 32769, 49153
+
+    def __init__(self, times):
+        self.epoch = pd.DatetimeIndex(times).asi8 // 10 ** 9
+        self.calls = 0
+
+    def _rates(self, mask):
+        arr = np.zeros(int(mask.sum()), dtype=RATES_DTYPE)
+        arr['time'] = self.epoch[mask]
+        arr['close'] = self.epoch[mask] % 1000
+        return arr
+
+    def copy_rates_range(self, symbol, timeframe, date_from, date_to):
+        self.calls += 1
+        return self._rates((self.epoch >= int(date_from.timestamp())) & (self.epoch <= int(date_to.timestamp())))
+
+    def copy_rates_from(self, symbol, timeframe, date_from, count):
+        self.calls += 1
+        hi = int(np.searchsorted(self.epoch, int(date_from.timestamp()), side='right'))
+        mask = np.zeros(len(self.epoch), dtype=bool)
+        mask[max(hi - count, 0):hi] = True
+        return self._rates(mask)
+
+    def last_error(self):
+        return (1, 'Success')
+
+
+# MetaTrader5 chỉ cài được trên Windows: ở nơi khác đăng ký module rỗng để import được mt5_fetcher,
+# mọi lần gọi MT5 trong kiểm tra đều qua SimulatedMT5
+try:
+    import MetaTrader5  # noqa: F401
+except ImportError:
+    sys.modules['MetaTrader5'] = types.ModuleType('MetaTrader5')
+
+from src.fetchers import mt5_fetcher
+from src.fetchers.mt5_fetcher import MT5Fetcher
+
+
+def weekday_bars(start, end, freq):
+    times = pd.date_range(start, end, freq=freq)
+    return times[times.dayofweek < 5] if freq.endswith('min') else times
+
+
+class Store:
+    # DB giả: tập thời điểm nến đã lưu, save() idempotent như upsert; fail_after: ngắt sau số khối này
+    def __init__(self, times=(), fail_after=None):
+        self.times = set(times)
+        self.fail_after = fail_after
+        self.chunks = 0
+        self.max_chunk = 0
+
+    def save(self, df):
+        if self.fail_after is not None and self.chunks >= self.fail_after:
+            raise KeyboardInterrupt
+        self.chunks += 1
+        self.max_chunk = max(self.max_chunk, len(df))
+        self.times.update(df['time'])
+
+    def run(self, fetcher, timeframe, until, chunk_bars=CHUNK_BARS, since=None):
+        oldest = min(self.times) if self.times else None
+        newest = max(self.times) if self.times else None
+        try:
+            fetcher.backfill('SIM', timeframe, self.save, oldest=oldest, newest=newest, since=since, until=until,
+                             chunk_bars=chunk_bars)
+        except KeyboardInterrupt:
+            return False
+        return True
+
+    def contiguous(self, closed):
+        # Các nến đã lưu là 1 đoạn liền của closed (không thiếu nến ở giữa)
+        stored = sorted(self.times)
+        lo = closed.searchsorted(stored[0])
+        return stored == list(closed[lo:lo + len(stored)])
+
+
+def check(name, ok):
+    print(f"[{'OK' if ok else 'FAILED'}] {name}")
+    return 0 if ok else 1
+
+
+def use_source(times):
+    source = SimulatedMT5(times)
+    mt5_fetcher.mt5 = source
+    return source, times[:-1], times[-1] + pd.Timedelta(seconds=1)
+
+
+if __name__ == '__main__':
+    fetcher = MT5Fetcher(None)
+    failed = 0
+
+    source, closed, until = use_source(weekday_bars('2024-01-01', '2024-03-01', '5min'))
+    store = Store()
+    store.run(fetcher, 'm5', until)
+    failed += check(f"DB rỗng: {len(store.times)}/{len(closed)} nến m5, {source.calls} lần gọi MT5, khối lớn nhất "
+                    f"{store.max_chunk} nến", sorted(store.times) == list(closed) and store.max_chunk <= CHUNK_BARS + 1)
+
+    store = Store(closed[5000:7000])
+    store.run(fetcher, 'm5', until)
+    failed += check("DB có 1 đoạn giữa: lấp đủ nến mới rồi lùi về đầu lịch sử", sorted(store.times) == list(closed))
+
+    store = Store(closed[5000:7000], fail_after=3)
+    ok = not store.run(fetcher, 'm5', until) and store.contiguous(closed)
+    store.fail_after = 2
+    ok &= not store.run(fetcher, 'm5', until) and store.contiguous(closed)
+    store.fail_after = None
+    ok &= store.run(fetcher, 'm5', until) and sorted(store.times) == list(closed)
+    failed += check("Ngắt giữa chừng 2 lần: dữ liệu luôn liền mạch, chạy lại lấy đủ", ok)
+
+    since = pd.Timestamp('2024-01-20')
+    store = Store(closed[5000:7000])
+    store.run(fetcher, 'm5', until, since=since)
+    failed += check("since: chỉ lấy nến từ since", sorted(store.times) == list(closed[closed >= since]))
+
+    # Nguồn ngừng 20 ngày (dài hơn 1 khối 2000 nến m5 ~ 7 ngày): phần lịch sử trước khoảng trống vẫn phải lấy được
+    times = weekday_bars('2025-05-01', '2025-08-01', '5min')
+    times = times[(times < '2025-06-03') | (times >= '2025-06-23')]
+    source, closed, until = use_source(times)
+    store = Store(closed[closed >= '2025-07-01'])
+    store.run(fetcher, 'm5', until)
+    failed += check(f"Khoảng trống 20 ngày: {len(store.times)}/{len(closed)} nến, không dừng ở khoảng trống",
+                    sorted(store.times) == list(closed))
+    store = Store()
+    store.run(fetcher, 'm5', until)
+    failed += check("Khoảng trống 20 ngày, DB rỗng", sorted(store.times) == list(closed))
+
+    for timeframe, freq, start in (('W', 'W-MON', '1995-01-02'), ('M', 'MS', '1990-01-01'), ('D', 'B', '2000-01-03')):
+        source, closed, until = use_source(pd.date_range(start, '2026-01-01', freq=freq))
+        store = Store(closed[-10:])
+        try:
+            store.run(fetcher, timeframe, until, chunk_bars=mt5_fetcher.BACKFILL_CHUNK_BARS)
+            ok = sorted(store.times) == list(closed)
+        except OverflowError as e:
+            print(f"[ERROR] {timeframe}: {e}")
+            ok = False
+        failed += check(f"{timeframe} với chunk_bars={mt5_fetcher.BACKFILL_CHUNK_BARS}: {len(store.times)}/{len(closed)} nến, "
+                        f"{source.calls} lần gọi MT5", ok)
+
+    if failed:
+        print(f"[ERROR] {failed} kiểm tra backfill không đạt")
+        sys.exit(1)
+    print("[INFO] Backfill lấy đủ lịch sử, liền mạch khi ngắt giữa chừng, bỏ qua khoảng trống dữ liệu")
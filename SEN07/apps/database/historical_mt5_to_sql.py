@@ -6,7 +6,8 @@ from datetime import datetime
 
 from src.connectors.mt5_connector import MT5Connector
 from src.connectors.sql_connector import SQLConnector
-from src.fetchers.mt5_fetcher import MT5Fetcher
+from src.connectors.bulk_writer import BulkWriter, DEFAULT_BATCH_SIZE, OHLCV_KEY
+from src.fetchers.mt5_fetcher import MT5Fetcher, BACKFILL_CHUNK_BARS
 from src.config.config_manager import ConfigManager
 
 def log_sync(engine, symbol_id, timeframe_name, provider_id, records_count, status, error_message=None, sync_duration=0):
@@ -33,6 +34,11 @@ def log_sync(engine, symbol_id, timeframe_name, provider_id, records_count, stat
 config = ConfigManager("config/config.json")
 sql_cfg = config.get_sql_config()
 mt5_cfg = config.get_mt5_config()
+# Số dòng mỗi lô khi ghi nến vào SQL (BulkWriter)
+bulk_batch_size = config.config.get("bulk_insert_batch_size", DEFAULT_BATCH_SIZE)
+# Backfill: số nến mỗi lần gọi MT5, và mốc thời gian cũ nhất cần lấy (None = tới khi MT5 hết lịch sử)
+backfill_chunk_bars = config.config.get("backfill_chunk_bars", BACKFILL_CHUNK_BARS)
+backfill_since = config.config.get("backfill_since")
 
 # Khởi tạo connector
 mt5_conn = MT5Connector(
@@ -43,6 +49,7 @@ mt5_conn = MT5Connector(
 )
 sql_conn = SQLConnector(sql_cfg)
 engine = sql_conn.get_engine()
+writer = BulkWriter(engine, batch_size=bulk_batch_size)
 
 # Kết nối MT5
 if not mt5_conn.connect():
@@ -80,29 +87,25 @@ def get_last_bar_time(engine, table_name, symbol_id, provider_id):
         ).fetchone()
         return pd.to_datetime(row[0]) if row else None
 
-def get_existing_timestamps(engine, table_name, symbol_id, provider_id):
+def get_bar_range(engine, table_name, symbol_id, provider_id):
+    # Watermark của symbol: nến cũ nhất và mới nhất đã lưu (MIN/MAX seek theo khóa chính, không đọc lịch sử)
     with engine.connect() as conn:
-        return set(
-            row[0] for row in conn.execute(
-                sqlalchemy.text(f"SELECT TimeStamp FROM [data_{table_name}] WHERE SymbolId = :symbol_id AND DataProviderId = :provider_id"),
-                {"symbol_id": symbol_id, "provider_id": provider_id}
-            )
-        )
+        row = conn.execute(
+            sqlalchemy.text(f"SELECT MIN(TimeStamp), MAX(TimeStamp) FROM [data_{table_name}] WHERE SymbolId = :symbol_id AND DataProviderId = :provider_id"),
+            {"symbol_id": symbol_id, "provider_id": provider_id}
+        ).fetchone()
+    if row is None or row[0] is None:
+        return None, None
+    return pd.to_datetime(row[0]), pd.to_datetime(row[1])
 
-def save_historical(engine, df, table_name, symbol_id, provider_id, provider, timeframe_id):
+def save_historical(engine, df, table_name, symbol_id, provider_id, provider, timeframe_id, drop_last=True):
     if df.empty:
         print(f"[DEBUG] Không có nến nào fetch được từ MT5 cho {table_name}")
         return 0
-    # Loại bỏ nến cuối cùng (nến đang hình thành)
-    if len(df) > 1:
+    # Loại bỏ nến cuối cùng (nến đang hình thành); backfill đã tự bỏ nến này nên truyền drop_last=False
+    if drop_last and len(df) > 1:
         df = df.iloc[:-1]
-    # Lọc chỉ giữ nến chưa có trong DB (so sánh toàn bộ timestamp)
-    existing_times = get_existing_timestamps(engine, table_name, symbol_id, provider_id)
     before = len(df)
-    df = df[~df['time'].isin(existing_times)]
-    if df.empty:
-        print(f"[DEBUG] Không có nến mới cho {table_name}")
-        return 0
     rename_dict = {
         'time': 'TimeStamp',
         'open': 'Open',
@@ -131,28 +134,44 @@ def save_historical(engine, df, table_name, symbol_id, provider_id, provider, ti
     for col in ['SymbolId', 'DataProviderId', 'TimeframeId', 'Volume']:
         if col in df.columns:
             df[col] = df[col].astype('int64')
-    df.to_sql(f"data_{table_name}", engine, if_exists='append', index=False)
-    print(f"[INFO] Đã lưu {len(df)} nến mới cho {table_name} (trước lọc: {before})")
-    return len(df)
+    # Upsert: chỉ thêm nến chưa có (anti-join theo khóa chính trên SQL), không đọc toàn bộ timestamp đã lưu
+    inserted = writer.upsert(df, f"data_{table_name}", OHLCV_KEY)
+    if inserted == 0:
+        print(f"[DEBUG] Không có nến mới cho {table_name}")
+        return 0
+    print(f"[INFO] Đã lưu {inserted} nến mới cho {table_name} (trước lọc: {before})")
+    return inserted
 
+jobs = []
 for symbol in symbols:
     for timeframe in supported_timeframes:
-        print(f"[INFO] Đang lấy dữ liệu cho {symbol} {timeframe} {provider}")
+        with engine.connect() as conn:
+            symbol_id = conn.execute(
+                sqlalchemy.text("SELECT Id FROM table_symbols WHERE Symbol = :symbol OR RefName = :symbol"), {"symbol": symbol}
+            ).scalar()
+            timeframe_id = conn.execute(
+                sqlalchemy.text("SELECT Id FROM table_timeframes WHERE Name = :name"), {"name": timeframe}
+            ).scalar()
+        jobs.append((symbol, timeframe, symbol_id, timeframe_id))
+
+# Backfill theo khoảng thời gian (copy_rates_range) từ watermark đã lưu, không bị giới hạn 20000 nến của copy_rates_from_pos.
+# Ưu tiên: lượt 1 lấp phần nến gần nhất còn thiếu (forward) cho mọi symbol/timeframe, lượt 2 mới lùi về lịch sử cũ
+# (backward; symbol chưa có dữ liệu được lấy từ hiện tại lùi dần ở lượt này). Mỗi khối được upsert ngay nên ngắt
+# giữa chừng thì chạy lại sẽ tiếp tục từ watermark mới.
+for direction in ('forward', 'backward'):
+    for symbol, timeframe, symbol_id, timeframe_id in jobs:
+        print(f"[INFO] Backfill {direction} cho {symbol} {timeframe} {provider}")
         try:
-            with engine.connect() as conn:
-                symbol_id = conn.execute(
-                    sqlalchemy.text("SELECT Id FROM table_symbols WHERE Symbol = :symbol OR RefName = :symbol"), {"symbol": symbol}
-                ).scalar()
-                timeframe_id = conn.execute(
-                    sqlalchemy.text("SELECT Id FROM table_timeframes WHERE Name = :name"), {"name": timeframe}
-                ).scalar()
             table_name = timeframe
-            # Fetch toàn bộ dữ liệu lịch sử (lấy 20000 nến)
-            df = fetcher.fetch(symbol, timeframe, bars=20000)
-            if df is not None and not df.empty:
-                save_historical(engine, df, table_name, symbol_id, provider_id, provider, timeframe_id)
+            oldest, newest = get_bar_range(engine, table_name, symbol_id, provider_id)
+            fetcher.backfill(
+                symbol, timeframe,
+                lambda df: save_historical(engine, df, table_name, symbol_id, provider_id, provider, timeframe_id, drop_last=False),
+                oldest=oldest, newest=newest, since=backfill_since, chunk_bars=backfill_chunk_bars, direction=direction
+            )
         except Exception as e:
             print(f"[ERROR] Lỗi khi lấy dữ liệu cho {symbol} {timeframe}: {e}")
-            log_sync(engine, symbol_id if 'symbol_id' in locals() else 0, timeframe_id if 'timeframe_id' in locals() else 0, provider_id if 'provider_id' in locals() else 0, 0, 'FAILED', str(e), 0)
+            log_sync(engine, symbol_id or 0, timeframe_id or 0, provider_id or 0, 0, 'FAILED', str(e), 0)
 
+print(f"[RESULT] Tổng cộng {writer.total_rows} nến, tốc độ ghi trung bình {writer.rows_per_sec():,.0f} dòng/s")
 mt5_conn.disconnect() 
\ No newline at end of file
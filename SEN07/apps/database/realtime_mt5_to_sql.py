@@ -6,6 +6,7 @@ from datetime import datetime
 from src.config.config_manager import ConfigManager
 from src.connectors.mt5_connector import MT5Connector
 from src.connectors.sql_connector import SQLConnector
+from src.connectors.bulk_writer import BulkWriter, DEFAULT_BATCH_SIZE, OHLCV_KEY
 from src.fetchers.mt5_fetcher import MT5Fetcher
 
 config = ConfigManager("config/config.json")
@@ -14,6 +15,8 @@ sql_cfg = config.get_sql_config()
 
 # Đọc thêm cấu hình fetch schedule
 fetch_schedule = config.config.get("timeframe_fetch_schedule", {})
+# Số dòng mỗi lô khi ghi nến vào SQL (BulkWriter)
+bulk_batch_size = config.config.get("bulk_insert_batch_size", DEFAULT_BATCH_SIZE)
 
 def get_last_bar_time(engine, table_name, symbol_id, provider_id):
     with engine.connect() as conn:
@@ -75,8 +78,9 @@ def fetch_and_save(symbol, timeframe, provider):
         for col in df.columns:
             if str(df[col].dtype).startswith('uint'):
                 df[col] = df[col].astype('int64')
-        df.to_sql(f"data_{timeframe}", engine, if_exists='append', index=False)
-        print(f"[{log_time}] [REALTIME] Đã lưu {len(df)} nến mới cho {symbol} {timeframe} {provider}")
+        # Upsert: nhiều process realtime/historical ghi cùng lúc không bị trùng khóa chính
+        inserted = writer.upsert(df, f"data_{timeframe}", OHLCV_KEY)
+        print(f"[{log_time}] [REALTIME] Đã lưu {inserted} nến mới cho {symbol} {timeframe} {provider}")
 
 def should_fetch(timeframe, now, fetch_config):
     cfg = fetch_config.get(timeframe, {})
@@ -135,6 +139,7 @@ if __name__ == '__main__':
     )
     sql_conn = SQLConnector(sql_cfg)
     engine = sql_conn.get_engine()
+    writer = BulkWriter(engine, batch_size=bulk_batch_size, verbose=False)
     if not mt5_conn.connect():
         raise RuntimeError('Không thể kết nối MT5')
     fetcher = MT5Fetcher(mt5_conn)
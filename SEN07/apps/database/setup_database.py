@@ -54,7 +54,7 @@ def table_exists(conn, table_name):
     )
     return result.fetchone() is not None
 
-# 1. Tạo bảng DataProviders, Timeframes, Symbols ,DataSyncLog nếu chưa có
+# 1. Tạo bảng DataProviders, Timeframes, Symbols ,DataSyncLog, TradingRules nếu chưa có
 CREATE_TABLES = [
     '''CREATE TABLE table_symbols (
         Id INT PRIMARY KEY,
@@ -87,6 +87,15 @@ CREATE_TABLES = [
         ErrorMessage NVARCHAR(500),
         SyncDuration INT,
         CreatedAt DATETIME2 DEFAULT GETDATE()
+    )''',
+    '''CREATE TABLE table_trading_rules (
+        Id INT IDENTITY(1,1) PRIMARY KEY,
+        Name NVARCHAR(100) NOT NULL UNIQUE,
+        BuyRule NVARCHAR(1000) NOT NULL,
+        SellRule NVARCHAR(1000) NOT NULL,
+        Description NVARCHAR(200),
+        Active BIT DEFAULT 1,
+        CreatedAt DATETIME2 DEFAULT GETDATE()
     )'''
 ]
 
@@ -105,7 +114,14 @@ with engine.begin() as conn:
         elif m:
             print(f"[INFO] Bảng {m} đã tồn tại.")
 
-# 2. Insert dữ liệu mẫu vào DataProviders, Timeframes, Symbols
+# 2. Insert dữ liệu mẫu vào DataProviders, Timeframes, Symbols, TradingRules
+SAMPLE_TRADING_RULES = {
+    'combo_ma20_macd': {
+        'buy': 'close > open and close > sma(20) and macd_hist(5, 25, 5) > 0',
+        'sell': 'close < open and close < sma(20) and macd_hist(5, 25, 5) < 0',
+        'description': 'ComboStrategy mặc định',
+    },
+}
 with engine.begin() as conn:
     # DataProviders mẫu
     dataproviders = config.get_dataproviders()
@@ -132,6 +148,14 @@ with engine.begin() as conn:
             })
         except Exception as e:
             print(f"[WARN] Không thể insert Symbol {sym['symbol']}: {e}")
+    # TradingRules mẫu (rule tương đương ComboStrategy mặc định, cú pháp rule: src/strategies/rules.py)
+    for name, rule in SAMPLE_TRADING_RULES.items():
+        try:
+            conn.execute(text("INSERT INTO table_trading_rules (Name, BuyRule, SellRule, Description, Active) SELECT :Name, :BuyRule, :SellRule, :Description, 1 WHERE NOT EXISTS (SELECT 1 FROM table_trading_rules WHERE Name = :Name)"), {
+                "Name": name, "BuyRule": rule["buy"], "SellRule": rule["sell"], "Description": rule["description"]
+            })
+        except Exception as e:
+            print(f"[WARN] Không thể insert TradingRule {name}: {e}")
 
 # 3. Tạo bảng OHLCV cho từng timeframe
 OHLCV_TEMPLATE = '''CREATE TABLE {table_name} (
@@ -40,7 +40,18 @@ CREATE TABLE DataSyncLog (
     CreatedAt DATETIME2 DEFAULT GETDATE()
 );
 
--- 5. Các bảng dữ liệu market data theo timeframe (ví dụ: [1m], [3m], ...)
+-- 5. Bảng TradingRules (thư viện rule giao dịch, cú pháp rule: src/strategies/rules.py)
+CREATE TABLE TradingRules (
+    Id INT IDENTITY(1,1) PRIMARY KEY,
+    Name NVARCHAR(100) NOT NULL UNIQUE,
+    BuyRule NVARCHAR(1000) NOT NULL,
+    SellRule NVARCHAR(1000) NOT NULL,
+    Description NVARCHAR(200),
+    Active BIT DEFAULT 1,
+    CreatedAt DATETIME2 DEFAULT GETDATE()
+);
+
+-- 6. Các bảng dữ liệu market data theo timeframe (ví dụ: [1m], [3m], ...)
 -- (Tạo thủ công hoặc tự động bằng script Python, ví dụ:)
 -- CREATE TABLE [1m] (...), CREATE TABLE [1h] (...), ...
 
@@ -107,6 +118,11 @@ INSERT INTO Symbols (Id, Symbol, RefName, Type, Active) VALUES
 (56, 'GOLD', 'XAUUSD', 'METAL', 1),
 (81, 'BTCUSD', 'BTCUSD', 'CRYPTO', 1);
 
+-- TradingRules (rule tương đương ComboStrategy mặc định)
+INSERT INTO TradingRules (Name, BuyRule, SellRule, Description, Active) VALUES
+('combo_ma20_macd', 'close > open and close > sma(20) and macd_hist(5, 25, 5) > 0',
+ 'close < open and close < sma(20) and macd_hist(5, 25, 5) < 0', N'ComboStrategy mặc định', 1);
+
 -- Ví dụ truy vấn lấy Id từ Name (chuẩn hóa cho ETL/backtest):
 -- SELECT Id FROM DataProviders WHERE Name = 'FTMO';
 -- SELECT Id FROM Timeframes WHERE Name = 'm5';
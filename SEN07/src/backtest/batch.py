@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+from .metrics import _ffill, batch_metrics
+
+
+class BatchResult:
+    # Kết quả BacktestEngine.run_batch(): mỗi cột ứng với 1 bộ tham số trong param_sets
+    def __init__(self, param_sets, position, equity, initial_balance, index=None):
+        self.param_sets = param_sets
+        self.position = position  # (số nến × số bộ tham số)
+        self.equity = equity  # (số nến × số bộ tham số)
+        self.initial_balance = initial_balance
+        self.index = index
+
+    @property
+    def returns(self):
+        # Lợi nhuận từng nến của equity, nến đầu = 0
+        ret = np.zeros_like(self.equity)
+        ret[1:] = self.equity[1:] / self.equity[:-1] - 1
+        return ret
+
+    def num_trades(self):
+        # Số lệnh đã đóng (đảo chiều khi đang có vị thế) của từng cột
+        prev = np.zeros_like(self.position)
+        prev[1:] = self.position[:-1]
+        return ((prev != 0) & (self.position != prev)).sum(axis=0)
+
+    def total_return(self):
+        if len(self.equity) == 0:
+            return np.zeros(self.equity.shape[1])
+        return self.equity[-1] / self.initial_balance - 1
+
+    def max_drawdown(self):
+        if len(self.equity) == 0:
+            return np.zeros(self.equity.shape[1])
+        roll_max = np.maximum.accumulate(self.equity, axis=0)
+        return ((self.equity - roll_max) / roll_max).min(axis=0)
+
+    def metrics(self, price=None, risk_free=0, periods_per_year=252):
+        # Toàn bộ metrics của mọi cột trong 1 lần tính vector hoá (batch_metrics).
+        # Có price: lợi nhuận mark-to-market từng nến (vị thế nến trước × % thay đổi giá), giống MetricsReport;
+        # không có price: lợi nhuận theo equity (chỉ thay đổi khi đóng lệnh).
+        if price is None:
+            returns = self.returns
+        else:
+            # Giá thiếu (NaN) được ffill như MetricsReport (pct_change của pandas)
+            price = _ffill(np.asarray(price, dtype=float))
+            change = np.full(len(price), np.nan)  # nến đầu không có lợi nhuận, như pct_change
+            change[1:] = price[1:] / price[:-1] - 1
+            held = np.zeros_like(self.position)
+            held[1:] = self.position[:-1]
+            returns = held * change[:, None]
+        df = pd.DataFrame(self.param_sets)
+        return pd.concat([df, batch_metrics(returns, held if price is not None else self.position,
+                                            risk_free=risk_free, periods_per_year=periods_per_year)], axis=1)
+
+    def column(self, j, name):
+        # Lấy 1 cột (vd 'equity', 'position') dưới dạng Series theo index gốc
+        return pd.Series(getattr(self, name)[:, j], index=self.index)
+
+    def summary(self):
+        # Bảng tóm tắt: mỗi dòng 1 bộ tham số
+        df = pd.DataFrame(self.param_sets)
+        df['total_return'] = self.total_return()
+        df['max_drawdown'] = self.max_drawdown()
+        df['num_trades'] = self.num_trades()
+        return df
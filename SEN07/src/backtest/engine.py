@@ -1,13 +1,104 @@
+import numpy as np
+
+from .batch import BatchResult
+from .ledger import TradeLedger
+from src.utils.ohlcv_frame import OHLCVFrame
+
+
+def simulate_signals(price, signal, initial_balance=100000, fee_perc=0):
+    # Mô phỏng vị thế, giá vào lệnh và equity bằng mảng numpy, cùng logic đảo chiều/phí với vòng lặp.
+    # signal: mảng 1 chiều (số nến) hoặc 2 chiều (số nến × số bộ tham số), kết quả cùng shape.
+    price = np.asarray(price, dtype=float)
+    raw_signal = np.asarray(signal)
+    one_dim = raw_signal.ndim == 1
+    if one_dim:
+        raw_signal = raw_signal[:, None]
+    n, k = raw_signal.shape
+    # Chỉ 1 / -1 là tín hiệu vào lệnh, còn lại coi như giữ nguyên
+    signal = (raw_signal == 1).astype(np.int8) - (raw_signal == -1)
+    bar_idx = np.arange(n, dtype=np.int32)[:, None]
+    # Vị thế = tín hiệu khác 0 gần nhất (ffill), ban đầu flat
+    last_sig_idx = np.maximum.accumulate(np.where(signal != 0, bar_idx, np.int32(-1)), axis=0)
+    position = np.take_along_axis(signal, np.maximum(last_sig_idx, 0), axis=0)
+    position[last_sig_idx < 0] = 0
+    prev_position = np.zeros_like(position)
+    prev_position[1:] = position[:-1]
+    # Vào lệnh khi có tín hiệu đảo chiều so với vị thế trước đó
+    is_trade = (signal != 0) & (signal != prev_position)
+    # Đóng lệnh cũ tại các điểm đảo chiều khi đang có vị thế, chỉ tính trên các nến có lệnh.
+    # nonzero trên ma trận chuyển vị: lệnh xếp theo cột, trong mỗi cột theo thứ tự thời gian
+    cols, rows = np.nonzero(is_trade.T)
+    closing = prev_position[rows, cols] != 0
+    # Lệnh đầu tiên của mỗi cột không bao giờ là lệnh đóng, nên giá vào lệnh là giá của lệnh liền trước
+    exit_rows, exit_cols = rows[closing], cols[closing]
+    entry_rows = np.roll(rows, 1)[closing]
+    entry = price[entry_rows]
+    exit_ = price[exit_rows]
+    factor = np.ones((n, k))
+    factor[exit_rows, exit_cols] = (
+        1
+        + prev_position[exit_rows, exit_cols] * (exit_ - entry) / entry
+        - np.abs(exit_ - entry) * fee_perc / entry
+    )
+    equity = initial_balance * np.cumprod(factor, axis=0)
+    trade_price = np.where(is_trade, price[:, None], np.nan)
+    if one_dim:
+        return position[:, 0].astype(int), trade_price[:, 0], equity[:, 0]
+    return position, trade_price, equity
+
+
 class BacktestEngine:
+    MODES = ('vectorized', 'loop')
+
     def __init__(self, strategy, df, initial_balance=100000, fee_perc=0):
+        # df: DataFrame hoặc OHLCVFrame; với OHLCVFrame mọi copy() chỉ copy danh sách cột (không copy dữ liệu giá)
+        # và run() trả về OHLCVFrame, đổi sang DataFrame ở bước xuất báo cáo
         self.strategy = strategy
         self.df = df.copy()
         self.initial_balance = initial_balance
         self.fee_perc = fee_perc  # phí giao dịch theo % mỗi lần vào/ra lệnh
+        self.ledger = None  # TradeLedger của lần run() gần nhất, dùng lại cho metrics
 
-    def run(self):
+    def run(self, mode='vectorized'):
+        # mode='vectorized': tính bằng mảng numpy (mặc định)
+        # mode='loop': vòng lặp từng nến, giữ lại làm bản tham chiếu
+        if mode == 'vectorized':
+            df = self._run_vectorized()
+        elif mode == 'loop':
+            df = self._run_loop()
+        else:
+            raise ValueError(f"[ERROR] Backtest mode '{mode}' không hợp lệ, chọn một trong {self.MODES}")
+        self.ledger = TradeLedger.from_signals(df)
+        return df
+
+    def run_batch(self, param_sets):
+        # Chạy nhiều bộ tham số cùng lúc: strategy sinh ma trận tín hiệu (số nến × số bộ tham số),
+        # vị thế/equity của mọi cột được tính trong 1 lần mô phỏng
+        signals = self.strategy.generate_signals_batch(self.df.copy(), param_sets)
+        position, trade_price, equity = simulate_signals(
+            self.df['close'].to_numpy(dtype=float), signals, self.initial_balance, self.fee_perc
+        )
+        return BatchResult(list(param_sets), position, equity, self.initial_balance, index=self.df.index)
+
+    def _run_vectorized(self):
         df = self.strategy.generate_signals(self.df)
         df = df.copy()
+        position, trade_price, equity = simulate_signals(
+            df['close'].to_numpy(dtype=float), df['signal'].to_numpy(), self.initial_balance, self.fee_perc
+        )
+        df['position'] = position
+        df['trade_price'] = trade_price
+        df['equity'] = equity
+        return df
+
+    def _run_loop(self):
+        df = self.strategy.generate_signals(self.df)
+        if isinstance(df, OHLCVFrame):
+            # Vòng lặp tham chiếu cần iterrows/at của DataFrame, kết quả đổi lại OHLCVFrame như mode vectorized
+            return OHLCVFrame.from_frame(self._loop(df.to_frame()))
+        return self._loop(df.copy())
+
+    def _loop(self, df):
         df['position'] = 0
         df['trade_price'] = None
         df['equity'] = self.initial_balance
@@ -39,4 +130,4 @@ class BacktestEngine:
             # Nếu không có tín hiệu đảo chiều, giữ nguyên vị thế
             df.at[i, 'position'] = position
             df.at[i, 'equity'] = equity
-        return df 
\ No newline at end of file
+        return df
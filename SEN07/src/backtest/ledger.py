@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+
+TRADE_DTYPE = np.dtype([
+    ('side', np.int8),
+    ('entry_idx', np.int64),
+    ('entry_time', 'datetime64[ns]'),
+    ('entry_price', np.float64),
+    ('exit_idx', np.int64),
+    ('exit_time', 'datetime64[ns]'),
+    ('exit_price', np.float64),
+    ('ret', np.float64),
+])
+
+
+class TradeLedger:
+    # Danh sách lệnh dạng mảng numpy có cấu trúc (TRADE_DTYPE), trích 1 lần từ cột signal,
+    # dùng chung cho mọi metrics theo lệnh (winrate, expectancy, avg win/loss, chuỗi thắng/thua)
+    def __init__(self, trades):
+        self.trades = trades
+
+    @classmethod
+    def from_signals(cls, df, signal_col='signal', price_col='close', time_col='time'):
+        # Lệnh mở ở tín hiệu khác 0 đầu tiên, đóng (và mở lệnh mới) ở tín hiệu khác 0 kế tiếp khác chiều
+        signal = df[signal_col].to_numpy()
+        price = df[price_col].to_numpy(dtype=float)
+        idx = np.flatnonzero(signal != 0)
+        sig = signal[idx]
+        # Bỏ tín hiệu lặp lại cùng chiều với lệnh đang mở
+        keep = np.ones(len(idx), dtype=bool)
+        keep[1:] = sig[1:] != sig[:-1]
+        idx = idx[keep]
+        entry_idx, exit_idx = idx[:-1], idx[1:]
+        trades = np.empty(max(len(idx) - 1, 0), dtype=TRADE_DTYPE)
+        side = signal[entry_idx]
+        trades['side'] = side
+        trades['entry_idx'] = entry_idx
+        trades['exit_idx'] = exit_idx
+        entry_price = price[entry_idx]
+        exit_price = price[exit_idx]
+        trades['entry_price'] = entry_price
+        trades['exit_price'] = exit_price
+        trades['ret'] = np.where(side == 1, (exit_price - entry_price) / entry_price, (entry_price - exit_price) / entry_price)
+        if time_col in df.columns:
+            times = pd.to_datetime(df[time_col]).to_numpy(dtype='datetime64[ns]')
+            trades['entry_time'] = times[entry_idx]
+            trades['exit_time'] = times[exit_idx]
+        else:
+            trades['entry_time'] = np.datetime64('NaT')
+            trades['exit_time'] = np.datetime64('NaT')
+        return cls(trades)
+
+    def __len__(self):
+        return len(self.trades)
+
+    @property
+    def wins(self):
+        t = self.trades
+        return ((t['side'] == 1) & (t['exit_price'] > t['entry_price'])) | ((t['side'] == -1) & (t['exit_price'] < t['entry_price']))
+
+    @property
+    def losses(self):
+        t = self.trades
+        return ((t['side'] == 1) & (t['exit_price'] < t['entry_price'])) | ((t['side'] == -1) & (t['exit_price'] > t['entry_price']))
+
+    def winrate(self):
+        total = len(self.trades)
+        winrate = self.wins.sum() / total if total > 0 else 0
+        return winrate, total
+
+    def expectancy(self):
+        return np.mean(self.trades['ret']) if len(self.trades) else 0
+
+    def avg_win_loss(self):
+        t = self.trades
+        wins = self.wins
+        losses = self.losses
+        # Lệnh thắng long/lệnh thua long tính theo chiều long, còn lại tính theo chiều short (giống công thức cũ)
+        long_ret = (t['exit_price'] - t['entry_price']) / t['entry_price']
+        short_ret = (t['entry_price'] - t['exit_price']) / t['entry_price']
+        is_long_win = (t['side'] == 1) & (t['exit_price'] > t['entry_price'])
+        is_long_loss = (t['side'] == 1) & (t['exit_price'] < t['entry_price'])
+        win_rets = np.where(is_long_win, long_ret, short_ret)[wins]
+        loss_rets = np.where(is_long_loss, long_ret, short_ret)[losses]
+        avg_win = np.mean(win_rets) if len(win_rets) else 0
+        avg_loss = np.mean(loss_rets) if len(loss_rets) else 0
+        return avg_win, avg_loss
+
+    def max_consecutive_wins_losses(self):
+        # Độ dài chuỗi liên tiếp dài nhất của lệnh thắng / không thắng
+        wins = self.wins
+        if len(wins) == 0:
+            return 0, 0
+        change = np.flatnonzero(wins[1:] != wins[:-1]) + 1
+        starts = np.concatenate(([0], change))
+        lengths = np.diff(np.concatenate((starts, [len(wins)])))
+        run_is_win = wins[starts]
+        max_win = lengths[run_is_win].max() if run_is_win.any() else 0
+        max_loss = lengths[~run_is_win].max() if (~run_is_win).any() else 0
+        return int(max_win), int(max_loss)
+
+    def to_frame(self):
+        return pd.DataFrame(self.trades)
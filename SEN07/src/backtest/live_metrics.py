@@ -0,0 +1,296 @@
+import math
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+
+def _growth_return(log_growth):
+    # exp(log_growth) - 1; annualize vài nến đầu có thể vượt giới hạn float -> inf như numpy trong metrics.py
+    try:
+        return math.expm1(log_growth)
+    except OverflowError:
+        return np.inf
+
+
+class _Moments:
+    # Mean/variance online (Welford), thêm và bớt phần tử trong O(1)
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+
+    def remove(self, x):
+        if self.count <= 1:
+            self.count = 0
+            self.mean = 0.0
+            self.m2 = 0.0
+            return
+        self.count -= 1
+        delta = x - self.mean
+        self.mean -= delta / self.count
+        self.m2 = max(self.m2 - delta * (x - self.mean), 0.0)
+
+    def std(self):
+        # ddof=1 như pandas/numpy trong metrics.py
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else np.nan
+
+
+class LiveMetrics:
+    # Metrics cập nhật từng nến / từng lệnh đóng cho paper/live run, O(1) mỗi lần cập nhật,
+    # thay vì tính lại metrics.py trên toàn bộ lịch sử. Cùng quy ước với MetricsReport
+    # (Sharpe/Sortino ddof=1, annualize theo periods_per_year, std = 0 -> 0, profit factor inf khi không lỗ).
+    # window=None: tích luỹ từ đầu; window=int: N nến gần nhất; window='30D'/Timedelta: theo thời gian
+    # (cần truyền time khi update). Bản theo cửa sổ giữ nến/lệnh trong ring buffer và trừ dần khi rời cửa sổ;
+    # max drawdown của cửa sổ chỉ tính lại (numpy trên buffer) khi gọi snapshot().
+    # Nến lỗ từ 100% trở lên (ret <= -1: cháy tài khoản, lỗ hơn vốn khi dùng đòn bẩy/short) không có log(1 + ret):
+    # đếm riêng vào ruined_bars, equity coi như về 0 (total_return = annualized_return = -1, ruined = True)
+    # tới khi nến đó rời cửa sổ (bản tích luỹ: mãi mãi).
+    def __init__(self, window=None, risk_free=0, periods_per_year=252):
+        if window is not None and not isinstance(window, (int, np.integer)):
+            window = pd.Timedelta(window)
+        self.window = window
+        self.risk_free = risk_free
+        self.periods_per_year = periods_per_year
+        self.reset()
+
+    def reset(self):
+        self.returns = _Moments()  # lợi nhuận vượt risk-free của các nến hợp lệ
+        self.downside = _Moments()  # chỉ các lợi nhuận vượt âm (Sortino)
+        self.gross_profit = 0.0
+        self.gross_loss = 0.0
+        self.bars = 0
+        self.bars_in_market = 0
+        self.log_growth = 0.0
+        self.ruined_bars = 0  # số nến ret <= -1 (không cộng vào log_growth)
+        # Drawdown tích luỹ (chỉ dùng khi window=None)
+        self.equity = 1.0
+        self.peak = None  # đỉnh tính từ nến có lợi nhuận đầu tiên, như MetricsReport
+        self.max_dd = 0.0
+        self.dd_duration = 0
+        self.max_dd_duration = 0
+        # Lệnh đã đóng và chuỗi thắng/thua
+        self.num_trades = 0
+        self.num_wins = 0
+        self.trade_ret_sum = 0.0
+        self.win_streak = 0
+        self.loss_streak = 0
+        self.max_win_streak = 0
+        self.max_loss_streak = 0
+        # Ring buffer cho bản theo cửa sổ: (chỉ số nến, thời gian, lợi nhuận, đang giữ lệnh)
+        self._bars_buf = deque(maxlen=self.window if isinstance(self.window, (int, np.integer)) else None)
+        self._trades_buf = deque()  # (chỉ số nến, thời gian, lợi nhuận lệnh)
+        self._bar_idx = 0
+        self._prev_equity = None
+        self._prev_position = 0
+
+    def update(self, ret, in_market=None, time=None):
+        # Thêm lợi nhuận của 1 nến (NaN: nến không có lợi nhuận, vẫn tính vào số nến).
+        # in_market=None: coi nến có lợi nhuận khác 0 là đang giữ lệnh.
+        valid = ret is not None and not math.isnan(ret)
+        if in_market is None:
+            in_market = valid and ret != 0
+        if self.window is not None:
+            self._evict(time)
+            if len(self._bars_buf) == self._bars_buf.maxlen:
+                self._remove_bar(self._bars_buf[0])
+            self._bars_buf.append((self._bar_idx, time, ret if valid else np.nan, bool(in_market)))
+        self._add_bar(ret if valid else np.nan, bool(in_market))
+        if self.window is None and valid:
+            self._update_drawdown(ret)
+        self._bar_idx += 1
+
+    def on_trade(self, ret, time=None):
+        # Thêm 1 lệnh đã đóng; lệnh thắng khi ret > 0, còn lại tính là chuỗi thua (giống TradeLedger)
+        self.num_trades += 1
+        self.trade_ret_sum += ret
+        if ret > 0:
+            self.num_wins += 1
+            self.win_streak += 1
+            self.loss_streak = 0
+            self.max_win_streak = max(self.max_win_streak, self.win_streak)
+        else:
+            self.loss_streak += 1
+            self.win_streak = 0
+            self.max_loss_streak = max(self.max_loss_streak, self.loss_streak)
+        if self.window is not None:
+            self._trades_buf.append((self._bar_idx - 1, time, ret))
+
+    def on_equity(self, update):
+        # Callback cho StreamingBacktestEngine(on_equity=...): lợi nhuận nến theo equity, lệnh đóng khi
+        # vị thế đổi trong lúc đang có vị thế (lợi nhuận lệnh đã trừ phí)
+        equity = update['equity']
+        position = update['position']
+        ret = np.nan if self._prev_equity is None else equity / self._prev_equity - 1
+        self.update(ret, in_market=self._prev_position != 0, time=update.get('time'))
+        if self._prev_position != 0 and position != self._prev_position:
+            self.on_trade(ret, time=update.get('time'))
+        self._prev_equity = equity
+        self._prev_position = position
+
+    def _add_bar(self, ret, in_market):
+        self.bars += 1
+        self.bars_in_market += in_market
+        if math.isnan(ret):
+            return
+        excess = ret - self.risk_free / self.periods_per_year
+        self.returns.add(excess)
+        if excess < 0:
+            self.downside.add(excess)
+        if ret > 0:
+            self.gross_profit += ret
+        elif ret < 0:
+            self.gross_loss -= ret
+        if ret <= -1:
+            self.ruined_bars += 1
+        else:
+            self.log_growth += math.log1p(ret)
+
+    def _remove_bar(self, entry):
+        _, _, ret, in_market = entry
+        self.bars -= 1
+        self.bars_in_market -= in_market
+        if math.isnan(ret):
+            return
+        excess = ret - self.risk_free / self.periods_per_year
+        self.returns.remove(excess)
+        if excess < 0:
+            self.downside.remove(excess)
+        if ret > 0:
+            self.gross_profit = max(self.gross_profit - ret, 0.0)
+        elif ret < 0:
+            self.gross_loss = max(self.gross_loss + ret, 0.0)
+        if ret <= -1:
+            self.ruined_bars -= 1
+        else:
+            self.log_growth -= math.log1p(ret)
+
+    def _evict(self, time):
+        # Bỏ nến/lệnh đã rời cửa sổ (theo số nến: nến cũ nhất bị đẩy ra ở update; theo thời gian: so với time)
+        if isinstance(self.window, pd.Timedelta):
+            if time is None:
+                raise ValueError("[ERROR] LiveMetrics theo thời gian cần truyền time khi update")
+            cutoff = pd.Timestamp(time) - self.window
+            while self._bars_buf and self._bars_buf[0][1] <= cutoff:
+                self._remove_bar(self._bars_buf.popleft())
+            while self._trades_buf and self._trades_buf[0][1] is not None and self._trades_buf[0][1] <= cutoff:
+                self._drop_trade(self._trades_buf.popleft())
+        else:
+            first_idx = self._bar_idx - self.window + 1
+            while self._trades_buf and self._trades_buf[0][0] < first_idx:
+                self._drop_trade(self._trades_buf.popleft())
+
+    def _drop_trade(self, entry):
+        ret = entry[2]
+        self.num_trades -= 1
+        self.num_wins -= ret > 0
+        self.trade_ret_sum -= ret
+
+    def _update_drawdown(self, ret):
+        self.equity = max(self.equity * (1 + ret), 0.0)
+        if self.peak is None or self.equity >= self.peak:
+            self.peak = self.equity
+            self.dd_duration = 0
+        else:
+            self.dd_duration += 1
+            self.max_dd_duration = max(self.max_dd_duration, self.dd_duration)
+        self.max_dd = min(self.max_dd, self._dd())
+
+    def _dd(self):
+        # Drawdown hiện tại; đỉnh = 0 (cháy tài khoản ngay nến đầu) tính là -100%
+        return self.equity / self.peak - 1 if self.peak else -1.0
+
+    def _window_drawdown(self):
+        rets = np.array([entry[2] for entry in self._bars_buf], dtype=float)
+        rets = rets[~np.isnan(rets)]
+        if len(rets) == 0:
+            return 0.0, 0.0, 0, 0
+        equity = np.cumprod(np.maximum(1 + rets, 0.0))
+        peak = np.maximum.accumulate(equity)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            dd = np.where(peak > 0, equity / peak - 1, -1.0)
+        under = np.concatenate(([False], dd < 0, [False]))
+        edges = np.flatnonzero(under[1:] != under[:-1])
+        runs = edges[1::2] - edges[::2]
+        current = len(dd) - edges[-2] if len(edges) and edges[-1] == len(dd) and dd[-1] < 0 else 0
+        return dd.min(), dd[-1], int(runs.max()) if len(runs) else 0, int(current)
+
+    def sharpe_ratio(self):
+        std = self.returns.std()
+        if std == 0:
+            return 0
+        return math.sqrt(self.periods_per_year) * self.returns.mean / std if self.returns.count else np.nan
+
+    def sortino_ratio(self):
+        downside_std = self.downside.std()
+        if downside_std == 0:
+            return 0
+        return math.sqrt(self.periods_per_year) * self.returns.mean / downside_std if self.returns.count else np.nan
+
+    def profit_factor(self):
+        if self.gross_loss == 0:
+            return np.inf
+        return self.gross_profit / self.gross_loss
+
+    def drawdown(self):
+        # (max drawdown, drawdown hiện tại, số nến drawdown dài nhất, số nến đang drawdown)
+        if self.window is not None:
+            return self._window_drawdown()
+        current = self._dd() if self.peak is not None else 0.0
+        return self.max_dd, current, self.max_dd_duration, self.dd_duration
+
+    def _window_streaks(self):
+        wins = np.array([entry[2] > 0 for entry in self._trades_buf], dtype=bool)
+        if len(wins) == 0:
+            return 0, 0
+        change = np.flatnonzero(wins[1:] != wins[:-1]) + 1
+        starts = np.concatenate(([0], change))
+        lengths = np.diff(np.concatenate((starts, [len(wins)])))
+        run_is_win = wins[starts]
+        max_win = lengths[run_is_win].max() if run_is_win.any() else 0
+        max_loss = lengths[~run_is_win].max() if (~run_is_win).any() else 0
+        return int(max_win), int(max_loss)
+
+    def snapshot(self):
+        max_dd, current_dd, max_dd_duration, dd_duration = self.drawdown()
+        if self.window is not None:
+            max_win_streak, max_loss_streak = self._window_streaks()
+        else:
+            max_win_streak, max_loss_streak = self.max_win_streak, self.max_loss_streak
+        n_years = self.returns.count / self.periods_per_year
+        ruined = self.ruined_bars > 0
+        total_return = -1.0 if ruined else _growth_return(self.log_growth)
+        ann_return = -1.0 if ruined else (_growth_return(self.log_growth / n_years) if n_years else 0)
+        return {
+            'bars': self.bars,
+            'ruined': ruined,
+            'total_return': total_return,
+            'sharpe_ratio': self.sharpe_ratio(),
+            'sortino_ratio': self.sortino_ratio(),
+            'profit_factor': self.profit_factor(),
+            'max_drawdown': max_dd,
+            'current_drawdown': current_dd,
+            'max_drawdown_duration': max_dd_duration,
+            'drawdown_duration': dd_duration,
+            'annualized_return': ann_return,
+            'calmar_ratio': ann_return / abs(max_dd) if max_dd != 0 else np.inf,
+            'time_in_market': self.bars_in_market / self.bars if self.bars else np.nan,
+            'num_trades': self.num_trades,
+            'winrate': self.num_wins / self.num_trades if self.num_trades else 0,
+            'expectancy': self.trade_ret_sum / self.num_trades if self.num_trades else 0,
+            'win_streak': self.win_streak,
+            'loss_streak': self.loss_streak,
+            'max_consecutive_win': max_win_streak,
+            'max_consecutive_loss': max_loss_streak,
+        }
+
+
+def metrics_table(trackers):
+    # Bảng metrics hiện tại cho nhiều strategy instance: trackers là dict {tên: LiveMetrics}
+    return pd.DataFrame({name: tracker.snapshot() for name, tracker in trackers.items()}).T
@@ -1,6 +1,8 @@
 import numpy as np
 import pandas as pd
 
+from .ledger import TradeLedger
+
 def calc_pnl(df, price_col='close', signal_col='signal'):
     df = df.copy()
     df['position'] = df[signal_col].replace(0, method='ffill').shift(1).fillna(0)
@@ -9,29 +11,10 @@ def calc_pnl(df, price_col='close', signal_col='signal'):
     total_return = df['equity'].iloc[-1] - 1
     return total_return, df['equity']
 
-def calc_winrate(df, signal_col='signal', price_col='close'):
-    trades = []
-    entry = None
-    entry_price = None
-    for i, row in df.iterrows():
-        if row[signal_col] != 0 and entry is None:
-            entry = row[signal_col]
-            entry_price = row[price_col]
-        elif row[signal_col] != 0 and entry is not None and row[signal_col] != entry:
-            exit_price = row[price_col]
-            trades.append((entry, entry_price, row[signal_col], exit_price))
-            entry = row[signal_col]
-            entry_price = row[price_col]
-    wins = 0
-    total = 0
-    for t in trades:
-        if t[0] == 1 and t[3] > t[1]:
-            wins += 1
-        elif t[0] == -1 and t[3] < t[1]:
-            wins += 1
-        total += 1
-    winrate = wins / total if total > 0 else 0
-    return winrate, total
+def calc_winrate(df, signal_col='signal', price_col='close', ledger=None):
+    if ledger is None:
+        ledger = TradeLedger.from_signals(df, signal_col=signal_col, price_col=price_col)
+    return ledger.winrate()
 
 def calc_max_drawdown(equity):
     roll_max = equity.cummax()
@@ -68,75 +51,20 @@ def profit_factor(df, signal_col='signal', price_col='close'):
         return np.inf
     return gross_profit / gross_loss
 
-def expectancy(df, signal_col='signal', price_col='close'):
-    trades = []
-    entry = None
-    entry_price = None
-    for i, row in df.iterrows():
-        if row[signal_col] != 0 and entry is None:
-            entry = row[signal_col]
-            entry_price = row[price_col]
-        elif row[signal_col] != 0 and entry is not None and row[signal_col] != entry:
-            exit_price = row[price_col]
-            trades.append((entry, entry_price, row[signal_col], exit_price))
-            entry = row[signal_col]
-            entry_price = row[price_col]
-    rets = [(t[3] - t[1])/t[1] if t[0]==1 else (t[1] - t[3])/t[1] for t in trades]
-    return np.mean(rets) if rets else 0
-
-def avg_win_loss(df, signal_col='signal', price_col='close'):
-    trades = []
-    entry = None
-    entry_price = None
-    for i, row in df.iterrows():
-        if row[signal_col] != 0 and entry is None:
-            entry = row[signal_col]
-            entry_price = row[price_col]
-        elif row[signal_col] != 0 and entry is not None and row[signal_col] != entry:
-            exit_price = row[price_col]
-            trades.append((entry, entry_price, row[signal_col], exit_price))
-            entry = row[signal_col]
-            entry_price = row[price_col]
-    win_rets = [(t[3] - t[1])/t[1] if t[0]==1 and t[3]>t[1] else (t[1] - t[3])/t[1] for t in trades if (t[0]==1 and t[3]>t[1]) or (t[0]==-1 and t[3]<t[1])]
-    loss_rets = [(t[3] - t[1])/t[1] if t[0]==1 and t[3]<t[1] else (t[1] - t[3])/t[1] for t in trades if (t[0]==1 and t[3]<t[1]) or (t[0]==-1 and t[3]>t[1])]
-    avg_win = np.mean(win_rets) if win_rets else 0
-    avg_loss = np.mean(loss_rets) if loss_rets else 0
-    return avg_win, avg_loss
-
-def max_consecutive_wins_losses(df, signal_col='signal', price_col='close'):
-    trades = []
-    entry = None
-    entry_price = None
-    for i, row in df.iterrows():
-        if row[signal_col] != 0 and entry is None:
-            entry = row[signal_col]
-            entry_price = row[price_col]
-        elif row[signal_col] != 0 and entry is not None and row[signal_col] != entry:
-            exit_price = row[price_col]
-            trades.append((entry, entry_price, row[signal_col], exit_price))
-            entry = row[signal_col]
-            entry_price = row[price_col]
-    streak = 0
-    max_win = 0
-    max_loss = 0
-    last_result = None
-    for t in trades:
-        win = (t[0] == 1 and t[3] > t[1]) or (t[0] == -1 and t[3] < t[1])
-        if win:
-            if last_result == 'win':
-                streak += 1
-            else:
-                streak = 1
-            max_win = max(max_win, streak)
-            last_result = 'win'
-        else:
-            if last_result == 'loss':
-                streak += 1
-            else:
-                streak = 1
-            max_loss = max(max_loss, streak)
-            last_result = 'loss'
-    return max_win, max_loss
+def expectancy(df, signal_col='signal', price_col='close', ledger=None):
+    if ledger is None:
+        ledger = TradeLedger.from_signals(df, signal_col=signal_col, price_col=price_col)
+    return ledger.expectancy()
+
+def avg_win_loss(df, signal_col='signal', price_col='close', ledger=None):
+    if ledger is None:
+        ledger = TradeLedger.from_signals(df, signal_col=signal_col, price_col=price_col)
+    return ledger.avg_win_loss()
+
+def max_consecutive_wins_losses(df, signal_col='signal', price_col='close', ledger=None):
+    if ledger is None:
+        ledger = TradeLedger.from_signals(df, signal_col=signal_col, price_col=price_col)
+    return ledger.max_consecutive_wins_losses()
 
 def annualized_return(df, price_col='close', signal_col='signal'):
     df = df.copy()
@@ -156,4 +84,201 @@ def calmar_ratio(annual_return, max_drawdown):
 def time_in_market(df, signal_col='signal'):
     df = df.copy()
     df['position'] = df[signal_col].replace(0, method='ffill').shift(1).fillna(0)
-    return (df['position'] != 0).mean() 
\ No newline at end of file
+    return (df['position'] != 0).mean()
+
+def calc_all_metrics(df, ledger=None):
+    # Tính toàn bộ metrics cho kết quả BacktestEngine.run() (cột signal, close) trong 1 lần
+    return compute_all(df, ledger=ledger)
+
+def _ffill(values):
+    # Forward-fill NaN trên mảng numpy 1 chiều
+    idx = np.where(np.isnan(values), -1, np.arange(len(values)))
+    np.maximum.accumulate(idx, out=idx)
+    out = values[np.maximum(idx, 0)]
+    out[idx < 0] = np.nan
+    return out
+
+def _longest_run(mask):
+    # Độ dài đoạn True liên tiếp dài nhất
+    if not mask.any():
+        return 0
+    padded = np.concatenate(([False], mask, [False])).astype(np.int8)
+    edges = np.flatnonzero(np.diff(padded))
+    return int((edges[1::2] - edges[::2]).max())
+
+class MetricsReport:
+    # Tính toàn bộ metrics trong 1 lần: position/returns chỉ tính 1 lần trên mảng numpy, không copy DataFrame.
+    # Cùng quy ước với các hàm riêng lẻ ở trên (position = tín hiệu gần nhất dịch 1 nến, annualize theo 252).
+    def __init__(self, df, price_col='close', signal_col='signal', risk_free=0, ledger=None):
+        signal = df[signal_col].to_numpy(dtype=float)
+        price = df[price_col].to_numpy(dtype=float)
+        n = len(signal)
+        # Vị thế = tín hiệu khác 0 gần nhất, dịch 1 nến
+        last = np.where(signal != 0, np.arange(n), -1)
+        np.maximum.accumulate(last, out=last)
+        held = np.where(last >= 0, signal[np.maximum(last, 0)], 0.0)
+        self.position = np.zeros(n)
+        self.position[1:] = held[:-1]
+        # Lợi nhuận từng nến (pct_change có ffill giá như pandas)
+        price = _ffill(price)
+        self.ret = np.full(n, np.nan)
+        if n > 1:
+            self.ret[1:] = (price[1:] / price[:-1] - 1) * self.position[1:]
+        valid = ~np.isnan(self.ret)
+        growth = np.where(valid, 1 + self.ret, 1.0)
+        self.equity = np.cumprod(growth)
+        self.equity[~valid] = np.nan
+        self.risk_free = risk_free
+        self.ledger = ledger if ledger is not None else TradeLedger.from_signals(df, signal_col=signal_col, price_col=price_col)
+        self._valid_ret = self.ret[valid]
+        self._growth_prod = growth.prod()
+
+    def total_return(self):
+        return self.equity[-1] - 1 if len(self.equity) else np.nan
+
+    def drawdown(self):
+        roll_max = np.fmax.accumulate(np.where(np.isnan(self.equity), -np.inf, self.equity)) if len(self.equity) else self.equity
+        with np.errstate(invalid='ignore'):
+            return (self.equity - roll_max) / roll_max
+
+    def max_drawdown(self):
+        dd = self.drawdown()
+        return np.nanmin(dd) if (~np.isnan(dd)).any() else np.nan
+
+    def max_drawdown_duration(self):
+        # Số nến dài nhất liên tục nằm dưới đỉnh equity trước đó
+        with np.errstate(invalid='ignore'):
+            return _longest_run(self.drawdown() < 0)
+
+    def sharpe_ratio(self):
+        excess = self._valid_ret - self.risk_free / 252
+        std = excess.std(ddof=1) if len(excess) > 1 else np.nan
+        if std == 0:
+            return 0
+        return np.sqrt(252) * excess.mean() / std if len(excess) else np.nan
+
+    def sortino_ratio(self):
+        excess = self._valid_ret - self.risk_free / 252
+        downside = excess[excess < 0]
+        downside_std = downside.std(ddof=1) if len(downside) > 1 else np.nan
+        if downside_std == 0:
+            return 0
+        return np.sqrt(252) * excess.mean() / downside_std if len(excess) else np.nan
+
+    def profit_factor(self):
+        ret = self._valid_ret
+        gross_profit = ret[ret > 0].sum()
+        gross_loss = -ret[ret < 0].sum()
+        if gross_loss == 0:
+            return np.inf
+        return gross_profit / gross_loss
+
+    def annualized_return(self):
+        n_years = len(self._valid_ret) / 252
+        if n_years == 0:
+            return 0
+        return self._growth_prod ** (1 / n_years) - 1
+
+    def time_in_market(self):
+        return (self.position != 0).mean() if len(self.position) else np.nan
+
+    def to_dict(self):
+        winrate, num_trades = self.ledger.winrate()
+        avg_win, avg_loss = self.ledger.avg_win_loss()
+        max_win, max_loss = self.ledger.max_consecutive_wins_losses()
+        max_dd = self.max_drawdown()
+        ann_return = self.annualized_return()
+        return {
+            'total_return': self.total_return(),
+            'winrate': winrate,
+            'num_trades': num_trades,
+            'max_drawdown': max_dd,
+            'max_drawdown_duration': self.max_drawdown_duration(),
+            'sharpe_ratio': self.sharpe_ratio(),
+            'sortino_ratio': self.sortino_ratio(),
+            'profit_factor': self.profit_factor(),
+            'expectancy': self.ledger.expectancy(),
+            'avg_win': avg_win,
+            'avg_loss': avg_loss,
+            'max_consecutive_win': max_win,
+            'max_consecutive_loss': max_loss,
+            'annualized_return': ann_return,
+            'calmar_ratio': calmar_ratio(ann_return, max_dd),
+            'time_in_market': self.time_in_market()
+        }
+
+def compute_all(df, price_col='close', signal_col='signal', risk_free=0, ledger=None):
+    return MetricsReport(df, price_col=price_col, signal_col=signal_col, risk_free=risk_free, ledger=ledger).to_dict()
+
+def batch_metrics(returns, position=None, risk_free=0, periods_per_year=252, chunk_size=256):
+    # Metrics cho nhiều đường lợi nhuận cùng lúc: returns là ma trận (số nến × số lần chạy), NaN được bỏ qua.
+    # position (cùng shape) dùng cho time_in_market; không có thì coi nến có lợi nhuận khác 0 là đang giữ lệnh.
+    # Các cột được xử lý theo khối chunk_size để giới hạn bộ nhớ tạm. Trả về DataFrame, mỗi dòng ứng với 1 cột.
+    returns = np.asarray(returns, dtype=float)
+    if returns.ndim == 1:
+        returns = returns[:, None]
+        position = None if position is None else np.asarray(position)[:, None]
+    parts = []
+    for start in range(0, returns.shape[1], chunk_size):
+        stop = start + chunk_size
+        chunk_position = None if position is None else position[:, start:stop]
+        parts.append(_batch_metrics_chunk(returns[:, start:stop], chunk_position, risk_free, periods_per_year))
+    if not parts:
+        return _batch_metrics_chunk(returns, position, risk_free, periods_per_year)
+    return pd.concat(parts, ignore_index=True)
+
+def _batch_metrics_chunk(returns, position, risk_free, periods_per_year):
+    # Chuyển về (số lần chạy × số nến) liên tục trong bộ nhớ: cumprod/accumulate theo hàng nhanh hơn theo cột.
+    # Luôn copy: bên dưới ghi tại chỗ lên ret, mà returns.T của 1 cột (hoặc mảng Fortran-order) đã liên tục nên
+    # ascontiguousarray trả về view và sẽ ghi đè mảng lợi nhuận của người gọi
+    ret = np.array(returns.T, order='C')
+    valid = ~np.isnan(ret)
+    count = valid.sum(axis=1)
+    ret[~valid] = 0.0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Mean/std (ddof=1) chỉ trên các nến hợp lệ, tính bằng tổng để tránh bản sao của nanmean/nanstd
+        excess = ret - risk_free / periods_per_year
+        excess *= valid
+        mean = excess.sum(axis=1) / count
+        dev = excess - mean[:, None]
+        dev *= valid
+        std = np.sqrt(np.einsum('ij,ij->i', dev, dev) / (count - 1))
+        std[count < 2] = np.nan
+        sharpe = np.where(std == 0, 0.0, np.sqrt(periods_per_year) * mean / std)
+        neg = excess < 0
+        neg_count = neg.sum(axis=1)
+        neg_mean = np.minimum(excess, 0.0).sum(axis=1) / neg_count
+        np.subtract(excess, neg_mean[:, None], out=dev)
+        dev *= neg
+        downside_std = np.sqrt(np.einsum('ij,ij->i', dev, dev) / (neg_count - 1))
+        downside_std[neg_count < 2] = np.nan
+        sortino = np.where(downside_std == 0, 0.0, np.sqrt(periods_per_year) * mean / downside_std)
+        gross_profit = np.maximum(ret, 0.0).sum(axis=1)
+        gross_loss = -np.minimum(ret, 0.0).sum(axis=1)
+        pf = np.where(gross_loss == 0, np.inf, gross_profit / gross_loss)
+        # Equity và drawdown của từng lần chạy, tính tại chỗ trên ma trận ret
+        equity = np.cumprod(np.add(ret, 1.0, out=ret), axis=1, out=ret)
+        n_bars = equity.shape[1]
+        final = equity[:, -1].copy() if n_bars else np.ones(len(equity))
+        # Đỉnh tính từ nến có lợi nhuận hợp lệ đầu tiên như MetricsReport: các nến NaN ở đầu không phải đỉnh 1.0
+        # (đặt 0 -> tỉ lệ 0/0 = NaN, fmin bỏ qua)
+        equity[~np.logical_or.accumulate(valid, axis=1)] = 0.0
+        roll_max = np.maximum.accumulate(equity, axis=1, out=dev)
+        max_dd = np.fmin.reduce(np.divide(equity, roll_max, out=roll_max), axis=1) - 1 if n_bars else np.full(len(equity), np.nan)
+        n_years = count / periods_per_year
+        ann_return = np.where(n_years == 0, 0.0, final ** (1 / n_years) - 1)
+        calmar = np.where(max_dd == 0, np.inf, ann_return / np.abs(max_dd))
+        if position is not None:
+            time_in_market = (position != 0).mean(axis=0)
+        else:
+            time_in_market = ((returns != 0) & ~np.isnan(returns)).mean(axis=0)
+    return pd.DataFrame({
+        'total_return': final - 1,
+        'max_drawdown': max_dd,
+        'sharpe_ratio': sharpe,
+        'sortino_ratio': sortino,
+        'profit_factor': pf,
+        'annualized_return': ann_return,
+        'calmar_ratio': calmar,
+        'time_in_market': time_in_market,
+    })
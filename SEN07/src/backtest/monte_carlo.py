@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+
+from src.utils.ohlcv_frame import OHLCVFrame
+
+PERCENTILES = (1, 5, 25, 50, 75, 95, 99)
+
+
+def trade_returns_from_result(df, position_col='position', equity_col='equity'):
+    # Lấy lợi nhuận (%) của từng lệnh đã đóng từ kết quả BacktestEngine.run()
+    position = df[position_col].to_numpy()
+    equity = df[equity_col].to_numpy(dtype=float)
+    if len(equity) < 2:
+        return np.empty(0)
+    prev_position = position[:-1]
+    is_close = (prev_position != 0) & (position[1:] != prev_position)
+    return (equity[1:] / equity[:-1] - 1)[is_close]
+
+
+def sample_trade_returns(trade_returns, n_paths=10000, method='bootstrap', seed=None):
+    # Lấy mẫu lợi nhuận lệnh cho n_paths đường, trả về ma trận (n_paths × số lệnh).
+    # method='bootstrap': chọn ngẫu nhiên có hoàn lại; method='shuffle': hoán vị thứ tự lệnh.
+    trade_returns = np.asarray(trade_returns, dtype=float)
+    n_trades = len(trade_returns)
+    rng = np.random.default_rng(seed)
+    if method == 'bootstrap':
+        if n_trades == 0:
+            return np.empty((n_paths, 0))
+        return trade_returns[rng.integers(0, n_trades, size=(n_paths, n_trades))]
+    if method == 'shuffle':
+        return rng.permuted(np.broadcast_to(trade_returns, (n_paths, n_trades)), axis=1)
+    raise ValueError(f"[ERROR] Monte Carlo method '{method}' không hợp lệ, chọn 'bootstrap' hoặc 'shuffle'")
+
+
+def paths_from_returns(returns):
+    # Ghép lợi nhuận lệnh thành đường equity bắt đầu từ 1.0, ma trận (n_paths × số lệnh + 1)
+    paths = np.empty((returns.shape[0], returns.shape[1] + 1))
+    paths[:, 0] = 1.0
+    np.add(returns, 1.0, out=paths[:, 1:])
+    np.cumprod(paths, axis=1, out=paths)
+    return paths
+
+
+def simulate_paths(trade_returns, n_paths=10000, method='bootstrap', seed=None):
+    # Sinh n_paths đường equity từ danh sách lợi nhuận lệnh
+    return paths_from_returns(sample_trade_returns(trade_returns, n_paths=n_paths, method=method, seed=seed))
+
+
+def path_max_drawdown(paths):
+    # Max drawdown của từng đường equity (giá trị âm), không tạo thêm bản sao ngoài ma trận đỉnh
+    peaks = np.maximum.accumulate(paths, axis=1)
+    np.divide(paths, peaks, out=peaks)
+    return peaks.min(axis=1) - 1
+
+
+def path_sharpe(rets, periods_per_year=None):
+    # Sharpe theo lợi nhuận từng lệnh (ma trận n_paths × số lệnh); periods_per_year (số lệnh/năm) để quy đổi theo năm
+    if rets.shape[1] < 2:
+        return np.zeros(len(rets))
+    std = rets.std(axis=1, ddof=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(std > 0, rets.mean(axis=1) / std, 0.0)
+    if periods_per_year:
+        sharpe = sharpe * np.sqrt(periods_per_year)
+    return sharpe
+
+
+class MonteCarloResult:
+    def __init__(self, paths, sharpe):
+        self.paths = paths
+        self.final_return = paths[:, -1] - 1
+        self.max_drawdown = path_max_drawdown(paths)
+        self.sharpe = sharpe
+
+    def summary(self, percentiles=PERCENTILES):
+        # Phân phối của final_return, max_drawdown, sharpe: mean, std và các phân vị
+        rows = {}
+        for name in ('final_return', 'max_drawdown', 'sharpe'):
+            values = getattr(self, name)
+            row = {'mean': values.mean(), 'std': values.std()}
+            row.update({f'p{p}': v for p, v in zip(percentiles, np.percentile(values, percentiles))})
+            rows[name] = row
+        return pd.DataFrame(rows).T
+
+    def prob_loss(self):
+        return (self.final_return < 0).mean()
+
+    def prob_drawdown_worse_than(self, level):
+        # Xác suất max drawdown vượt ngưỡng level (vd -0.2 = giảm 20%)
+        return (self.max_drawdown < level).mean()
+
+
+def run_monte_carlo(trade_returns, n_paths=10000, method='bootstrap', seed=None, periods_per_year=None):
+    # trade_returns: mảng lợi nhuận từng lệnh hoặc kết quả BacktestEngine.run() (DataFrame hoặc OHLCVFrame)
+    if isinstance(trade_returns, (pd.DataFrame, OHLCVFrame)):
+        trade_returns = trade_returns_from_result(trade_returns)
+    returns = sample_trade_returns(trade_returns, n_paths=n_paths, method=method, seed=seed)
+    sharpe = path_sharpe(returns, periods_per_year)
+    return MonteCarloResult(paths_from_returns(returns), sharpe)
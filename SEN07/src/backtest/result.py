@@ -2,7 +2,10 @@ import json
 import pandas as pd
 import matplotlib.pyplot as plt
 
+from src.utils.ohlcv_frame import to_frame
+
 def save_result_csv(df, path):
+    df = to_frame(df)
     df.to_csv(path, index=False)
     print(f"[RESULT] Đã lưu kết quả backtest ra file CSV: {path}")
 
@@ -24,6 +27,7 @@ def summary_report(df, metrics):
     return report
 
 def plot_equity_signals(df):
+    df = to_frame(df)
     fig, ax1 = plt.subplots(figsize=(14,6))
     ax1.plot(df['time'], df['close'], label='Close', color='gray')
     ax1.set_ylabel('Price')
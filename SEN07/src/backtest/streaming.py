@@ -0,0 +1,97 @@
+import pandas as pd
+
+from src.utils.ohlcv_frame import OHLCVFrame
+
+
+class StreamingBacktestEngine:
+    # Engine nhận từng nến qua on_bar(bar), chỉ giữ trạng thái cố định (vị thế, giá vào lệnh, equity,
+    # trạng thái indicator trong strategy) nên chạy được cả trên luồng nến realtime lẫn dữ liệu lịch sử.
+    # Logic vào/đóng lệnh và phí giống hệt BacktestEngine.run(mode='loop').
+    def __init__(self, strategy, initial_balance=100000, fee_perc=0, on_fill=None, on_equity=None):
+        self.strategy = strategy
+        self.initial_balance = initial_balance
+        self.fee_perc = fee_perc  # phí giao dịch theo % mỗi lần vào/ra lệnh
+        self.on_fill = on_fill  # callback(fill_dict) khi có lệnh khớp
+        self.on_equity = on_equity  # callback(update_dict) sau mỗi nến
+        self.reset()
+
+    def reset(self):
+        self.strategy.reset()
+        self.position = 0  # 1: long, -1: short, 0: flat
+        self.entry_price = None
+        self.equity = self.initial_balance
+        self.bars_seen = 0
+
+    def state(self):
+        return {
+            'position': self.position,
+            'entry_price': self.entry_price,
+            'equity': self.equity,
+            'bars_seen': self.bars_seen,
+        }
+
+    def on_bar(self, bar):
+        signal = self.strategy.on_bar(bar)
+        price = bar['close']
+        trade_price = None
+        if signal == 1 and self.position <= 0:
+            # Nếu đang short, đóng short trước
+            closed_pnl = self._close(price) if self.position == -1 else 0
+            trade_price = self._open(bar, 1, price, closed_pnl)
+        elif signal == -1 and self.position >= 0:
+            # Nếu đang long, đóng long trước
+            closed_pnl = self._close(price) if self.position == 1 else 0
+            trade_price = self._open(bar, -1, price, closed_pnl)
+        self.bars_seen += 1
+        update = {
+            'time': bar.get('time'),
+            'signal': signal,
+            'position': self.position,
+            'trade_price': trade_price,
+            'equity': self.equity,
+        }
+        if self.on_equity is not None:
+            self.on_equity(update)
+        return update
+
+    def replay(self, bars):
+        # Chạy lại dữ liệu lịch sử: bars là iterable các dict nến (hoặc DataFrame/OHLCVFrame), trả về generator các update
+        if isinstance(bars, (pd.DataFrame, OHLCVFrame)):
+            bars = iter_bars(bars)
+        for bar in bars:
+            yield self.on_bar(bar)
+
+    def _close(self, price):
+        entry_price = self.entry_price
+        if entry_price is None:
+            return 0
+        if self.position == 1:
+            pnl = (price - entry_price) / entry_price * self.equity
+        else:
+            pnl = (entry_price - price) / entry_price * self.equity
+        fee = abs(price - entry_price) * self.fee_perc * self.equity / entry_price
+        self.equity += pnl - fee
+        return pnl - fee
+
+    def _open(self, bar, side, price, closed_pnl):
+        self.position = side
+        self.entry_price = price
+        if self.on_fill is not None:
+            self.on_fill({
+                'time': bar.get('time'),
+                'side': side,
+                'price': price,
+                'closed_pnl': closed_pnl,
+                'equity': self.equity,
+            })
+        return price
+
+
+def iter_bars(df):
+    # Duyệt DataFrame từng nến dưới dạng dict, không tạo bản sao toàn bộ dữ liệu
+    if isinstance(df, OHLCVFrame):
+        yield from df.iter_bars()
+        return
+    columns = list(df.columns)
+    for values in df.itertuples(index=False, name=None):
+        yield dict(zip(columns, values))
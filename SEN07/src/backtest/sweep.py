@@ -0,0 +1,74 @@
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from .engine import BacktestEngine
+from .metrics import calc_all_metrics
+
+# Dữ liệu OHLCV của mỗi worker, nạp 1 lần qua initializer thay vì gửi kèm từng lần chạy
+_WORKER_DF = None
+
+
+def expand_grid(grid):
+    # {'fast': [5, 10], 'slow': [20, 50]} -> [{'fast': 5, 'slow': 20}, {'fast': 5, 'slow': 50}, ...]
+    keys = list(grid.keys())
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def _init_worker(df):
+    global _WORKER_DF
+    _WORKER_DF = df
+
+
+def _run_one(strategy_cls, params, initial_balance, fee_perc):
+    try:
+        strategy = strategy_cls(**params)
+        engine = BacktestEngine(strategy, _WORKER_DF, initial_balance=initial_balance, fee_perc=fee_perc)
+        df_bt = engine.run()
+        return calc_all_metrics(df_bt, ledger=engine.ledger)
+    except Exception as e:
+        print(f"[ERROR] Lỗi khi chạy tham số {params}: {e}")
+        return {}
+
+
+def _print_progress(done, total, started):
+    elapsed = time.time() - started
+    eta = elapsed / done * (total - done) if done else 0
+    print(f"[SWEEP] {done}/{total} ({done / total:.1%}) - đã chạy {elapsed:.0f}s - ETA {eta:.0f}s")
+
+
+def run_sweep(strategy_cls, df, grid, n_jobs=None, initial_balance=100000, fee_perc=0, progress_every=None):
+    # Chạy strategy_cls(**params) cho mọi tổ hợp tham số trong grid, song song trên process pool.
+    # grid: dict {tên tham số: danh sách giá trị} hoặc list các dict tham số.
+    # Trả về DataFrame: mỗi dòng 1 bộ tham số + các cột metrics.
+    param_sets = expand_grid(grid) if isinstance(grid, dict) else list(grid)
+    total = len(param_sets)
+    if total == 0:
+        return pd.DataFrame()
+    n_jobs = n_jobs or os.cpu_count() or 1
+    progress_every = progress_every or max(1, total // 20)
+    results = [None] * total
+    started = time.time()
+    if n_jobs == 1:
+        _init_worker(df)
+        for i, params in enumerate(param_sets):
+            results[i] = _run_one(strategy_cls, params, initial_balance, fee_perc)
+            if (i + 1) % progress_every == 0 or i + 1 == total:
+                _print_progress(i + 1, total, started)
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker, initargs=(df,)) as executor:
+            futures = {
+                executor.submit(_run_one, strategy_cls, params, initial_balance, fee_perc): i
+                for i, params in enumerate(param_sets)
+            }
+            done = 0
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+                done += 1
+                if done % progress_every == 0 or done == total:
+                    _print_progress(done, total, started)
+    rows = [{**params, **metrics} for params, metrics in zip(param_sets, results)]
+    return pd.DataFrame(rows)
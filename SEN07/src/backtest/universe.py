@@ -0,0 +1,100 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+import sqlalchemy
+
+from src.connectors.sql_connector import SQLConnector
+from src.fetchers.sql_fetcher import read_ohlcv_table
+from src.utils.ohlcv_frame import OHLCVFrame
+from .engine import BacktestEngine
+from .metrics import calc_all_metrics
+
+# Chạy 1 strategy trên mọi cặp symbol × timeframe đang active (table_symbols × table_timeframes) bằng process pool.
+# Mỗi worker tạo 1 SQLAlchemy engine (có connection pool) trong initializer và dùng lại cho mọi job của worker đó;
+# process chính chỉ gửi thông tin job và nhận về metrics, không gửi dữ liệu nến qua lại giữa các process.
+
+# Engine SQL của mỗi worker, tạo 1 lần qua initializer
+_WORKER_ENGINE = None
+
+JOB_COLUMNS = ['symbol_id', 'symbol', 'timeframe_id', 'timeframe']
+
+
+def fetch_active_universe(engine, symbols=None, timeframes=None):
+    # Mọi cặp symbol × timeframe có Active = 1; symbols/timeframes: chỉ giữ các tên này (None = tất cả)
+    query = sqlalchemy.text("""
+        SELECT s.Id AS symbol_id, s.Symbol AS symbol, t.Id AS timeframe_id, t.Name AS timeframe
+        FROM table_symbols s CROSS JOIN table_timeframes t
+        WHERE s.Active = 1 AND t.Active = 1
+        ORDER BY t.Minutes, s.Id
+    """)
+    with engine.connect() as conn:
+        jobs = pd.read_sql(query, conn)
+    if symbols is not None:
+        jobs = jobs[jobs['symbol'].isin(symbols)]
+    if timeframes is not None:
+        jobs = jobs[jobs['timeframe'].isin(timeframes)]
+    return jobs.reset_index(drop=True)
+
+
+def _init_worker(sql_cfg):
+    # sql_cfg: mục "sql" của config.json, hoặc chuỗi kết nối SQLAlchemy (vd sqlite:///... để chạy thử không cần SQL Server)
+    global _WORKER_ENGINE
+    _WORKER_ENGINE = sqlalchemy.create_engine(sql_cfg) if isinstance(sql_cfg, str) else SQLConnector(sql_cfg).get_engine()
+
+
+def _run_job(job, strategy_cls, params, provider_id, start, end, initial_balance, fee_perc, compact):
+    started = time.time()
+    try:
+        df = read_ohlcv_table(_WORKER_ENGINE, job['timeframe'], job['symbol_id'], provider_id, start, end,
+                              compact=compact)
+        if df.empty:
+            return {'bars': 0, 'seconds': time.time() - started, 'error': 'không có dữ liệu'}
+        engine = BacktestEngine(strategy_cls(**params), OHLCVFrame.from_frame(df),
+                                initial_balance=initial_balance, fee_perc=fee_perc)
+        metrics = calc_all_metrics(engine.run(), ledger=engine.ledger)
+        return {'bars': len(df), 'seconds': time.time() - started, **metrics}
+    except Exception as e:
+        print(f"[ERROR] Lỗi khi chạy {job['symbol']} {job['timeframe']}: {e}")
+        return {'bars': 0, 'seconds': time.time() - started, 'error': str(e)}
+
+
+def _print_progress(done, total, started):
+    elapsed = time.time() - started
+    eta = elapsed / done * (total - done) if done else 0
+    print(f"[UNIVERSE] {done}/{total} ({done / total:.1%}) - đã chạy {elapsed:.0f}s - ETA {eta:.0f}s")
+
+
+def run_universe(sql_cfg, jobs, strategy_cls, params=None, provider_id=None, start=None, end=None, n_jobs=None,
+                 initial_balance=100000, fee_perc=0, compact=False, progress_every=None):
+    # jobs: DataFrame/list dict các cột JOB_COLUMNS (vd fetch_active_universe). Mỗi job nạp nến từ data_<timeframe>,
+    # chạy strategy_cls(**params) và tính metrics. Trả về DataFrame: mỗi dòng 1 job + bars, seconds, metrics
+    # (job lỗi hoặc không có dữ liệu có cột error).
+    jobs = jobs.to_dict('records') if isinstance(jobs, pd.DataFrame) else list(jobs)
+    params = params or {}
+    total = len(jobs)
+    if total == 0:
+        return pd.DataFrame(columns=JOB_COLUMNS)
+    n_jobs = min(n_jobs or os.cpu_count() or 1, total)
+    progress_every = progress_every or max(1, total // 20)
+    args = (strategy_cls, params, provider_id, start, end, initial_balance, fee_perc, compact)
+    results = [None] * total
+    started = time.time()
+    if n_jobs == 1:
+        _init_worker(sql_cfg)
+        for i, job in enumerate(jobs):
+            results[i] = _run_job(job, *args)
+            if (i + 1) % progress_every == 0 or i + 1 == total:
+                _print_progress(i + 1, total, started)
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker, initargs=(sql_cfg,)) as executor:
+            futures = {executor.submit(_run_job, job, *args): i for i, job in enumerate(jobs)}
+            done = 0
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+                done += 1
+                if done % progress_every == 0 or done == total:
+                    _print_progress(done, total, started)
+    rows = [{**{col: job[col] for col in JOB_COLUMNS}, **result} for job, result in zip(jobs, results)]
+    return pd.DataFrame(rows)
@@ -0,0 +1,120 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .batch import BatchResult
+from .engine import simulate_signals
+
+# Giá và ma trận tín hiệu của mỗi worker, nạp 1 lần qua initializer
+_WORKER_DATA = None
+
+
+def make_windows(n_bars, is_bars, oos_bars, anchored=False):
+    # Chia dữ liệu thành các cửa sổ (is_start, is_end, oos_start, oos_end), chỉ số theo nến, end không tính.
+    # anchored=False: in-sample trượt cố định is_bars nến; anchored=True: in-sample luôn bắt đầu từ nến 0.
+    windows = []
+    start = 0
+    while start + is_bars < n_bars:
+        is_start = 0 if anchored else start
+        is_end = start + is_bars
+        oos_end = min(is_end + oos_bars, n_bars)
+        windows.append((is_start, is_end, is_end, oos_end))
+        start += oos_bars
+    return windows
+
+
+def _init_worker(price, signals, param_sets, initial_balance, fee_perc, objective):
+    global _WORKER_DATA
+    _WORKER_DATA = (price, signals, param_sets, initial_balance, fee_perc, objective)
+
+
+def _run_window(window):
+    price, signals, param_sets, initial_balance, fee_perc, objective = _WORKER_DATA
+    is_start, is_end, oos_start, oos_end = window
+    # Tối ưu trên in-sample: mô phỏng mọi bộ tham số trong 1 lần
+    position, _, equity = simulate_signals(price[is_start:is_end], signals[is_start:is_end], initial_balance, fee_perc)
+    batch = BatchResult(param_sets, position, equity, initial_balance)
+    scores = objective(batch) if callable(objective) else getattr(batch, objective)()
+    scores = np.asarray(scores, dtype=float)
+    best = int(np.nanargmax(scores)) if not np.isnan(scores).all() else 0
+    # Áp dụng bộ tham số tốt nhất cho out-of-sample, bắt đầu từ trạng thái flat
+    oos_price = price[oos_start:oos_end]
+    oos_position, oos_trade_price, oos_equity = simulate_signals(oos_price, signals[oos_start:oos_end, best], 1.0, fee_perc)
+    _close_at_end(oos_price, oos_position, oos_trade_price, oos_equity, fee_perc)
+    return best, scores[best], oos_position, oos_equity
+
+
+def _close_at_end(price, position, trade_price, equity, fee_perc):
+    # Lệnh còn mở ở nến cuối cửa sổ OOS được đóng tại giá nến đó (cùng công thức lãi/phí với simulate_signals):
+    # equity chỉ ghi nhận lệnh đã đóng nên không đóng thì lãi/lỗ của lệnh này bị mất khi cửa sổ sau bắt đầu flat
+    if len(position) == 0 or position[-1] == 0:
+        return
+    entry = trade_price[~np.isnan(trade_price)][-1]
+    exit_ = price[-1]
+    equity[-1] *= 1 + position[-1] * (exit_ - entry) / entry - abs(exit_ - entry) * fee_perc / entry
+    position[-1] = 0
+
+
+class WalkForwardResult:
+    def __init__(self, windows, equity, position, initial_balance):
+        self.windows = windows  # DataFrame: mỗi dòng 1 cửa sổ, bộ tham số tốt nhất, điểm IS, lợi nhuận OOS
+        self.equity = equity  # equity out-of-sample đã nối liền
+        self.position = position
+        self.initial_balance = initial_balance
+
+    def total_return(self):
+        if len(self.equity) == 0:
+            return 0
+        return self.equity.iloc[-1] / self.initial_balance - 1
+
+
+def run_walk_forward(strategy, df, param_sets, is_bars, oos_bars, anchored=False, objective='total_return',
+                     initial_balance=100000, fee_perc=0, n_jobs=None):
+    # Walk-forward: tối ưu tham số trên từng cửa sổ in-sample, áp dụng cho cửa sổ out-of-sample kế tiếp
+    # và nối equity out-of-sample thành 1 đường. objective: tên method của BatchResult hoặc hàm(BatchResult) -> mảng điểm.
+    # Mỗi cửa sổ OOS bắt đầu flat với bộ tham số mới; lệnh còn mở ở nến cuối cửa sổ bị đóng tại giá nến đó
+    # (position = 0) để lãi/lỗ được tính vào cửa sổ, không mang vị thế sang cửa sổ sau.
+    # Tín hiệu cho mọi bộ tham số được tính 1 lần trên toàn bộ lịch sử (indicator chỉ dùng dữ liệu quá khứ),
+    # các cửa sổ chỉ cắt lại ma trận nên phần lịch sử chồng lấn không phải tính lại.
+    param_sets = list(param_sets)
+    signals = strategy.generate_signals_batch(df.copy(), param_sets)
+    # Ma trận tín hiệu được pickle sang từng worker: chỉ giữ 1 / -1 / 0 (như simulate_signals hiểu) dạng int8,
+    # nhỏ hơn 8 lần int64/float64 (5 năm m15 × 160 bộ tham số: ~20 MB thay vì ~160 MB mỗi worker)
+    signals = (signals == 1).astype(np.int8) - (signals == -1)
+    price = df['close'].to_numpy(dtype=float)
+    windows = make_windows(len(df), is_bars, oos_bars, anchored=anchored)
+    if not windows:
+        print(f"[ERROR] Không đủ dữ liệu cho walk-forward: {len(df)} nến, in-sample {is_bars} nến")
+        return WalkForwardResult(pd.DataFrame(), pd.Series(dtype=float), pd.Series(dtype=int), initial_balance)
+    init_args = (price, signals, param_sets, initial_balance, fee_perc, objective)
+    n_jobs = n_jobs or os.cpu_count() or 1
+    if n_jobs == 1:
+        _init_worker(*init_args)
+        results = [_run_window(w) for w in windows]
+    else:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(windows)), initializer=_init_worker, initargs=init_args) as executor:
+            results = list(executor.map(_run_window, windows))
+    times = df['time'] if 'time' in df.columns else pd.Series(df.index, index=df.index)
+    rows = []
+    equity_parts = []
+    position_parts = []
+    balance = initial_balance
+    for (is_start, is_end, oos_start, oos_end), (best, score, oos_position, oos_equity) in zip(windows, results):
+        equity_parts.append(balance * oos_equity)
+        position_parts.append(oos_position)
+        rows.append({
+            'is_start': times.iloc[is_start],
+            'is_end': times.iloc[is_end - 1],
+            'oos_start': times.iloc[oos_start],
+            'oos_end': times.iloc[oos_end - 1],
+            **param_sets[best],
+            'is_score': score,
+            'oos_return': oos_equity[-1] - 1,
+        })
+        balance = balance * oos_equity[-1]
+    oos_index = df.index[windows[0][2]:windows[-1][3]]
+    equity = pd.Series(np.concatenate(equity_parts), index=oos_index, name='equity')
+    position = pd.Series(np.concatenate(position_parts), index=oos_index, name='position')
+    return WalkForwardResult(pd.DataFrame(rows), equity, position, initial_balance)
@@ -0,0 +1,141 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+# Ghi DataFrame vào SQL theo lô thay cho df.to_sql(if_exists='append'): với pyodbc, to_sql mặc định gửi từng dòng
+# 1 lệnh INSERT (1 round-trip mỗi dòng). BulkWriter gửi mỗi lô batch_size dòng bằng 1 lần executemany trong
+# 1 transaction; engine tạo bởi SQLConnector bật fast_executemany nên pyodbc gửi cả lô 1 lần (mảng tham số).
+# upsert() ghi idempotent qua bảng tạm + anti-join trên khóa chính. Mỗi lần ghi in số dòng/giây.
+# Chạy được với mọi engine SQLAlchemy (vd SQLite để benchmark không cần SQL Server).
+
+# Cột bảng data_<timeframe> (xem OHLCV_TEMPLATE trong apps/database/setup_database.py)
+OHLCV_COLUMNS = [
+    'SymbolId', 'DataProviderId', 'TimeframeId', 'TimeStamp',
+    'Open', 'High', 'Low', 'Close', 'Volume', 'Exchange'
+]
+# Khóa chính của bảng data_<timeframe>
+OHLCV_KEY = ['SymbolId', 'DataProviderId', 'TimeframeId', 'TimeStamp']
+DEFAULT_BATCH_SIZE = 5000
+
+_PLACEHOLDERS = {'qmark': '?', 'format': '%s', 'pyformat': '%s'}
+
+
+def to_rows(df):
+    # DataFrame -> list tuple kiểu Python (int/float/datetime/str, NaN -> None) để driver nào cũng nhận được
+    columns = []
+    for col in df.columns:
+        series = df[col]
+        if series.dtype.kind == 'M':
+            values = list(series.dt.to_pydatetime())
+        else:
+            values = series.tolist()
+        if series.hasnans:
+            values = [None if pd.isna(v) else v for v in values]
+        columns.append(values)
+    return list(zip(*columns))
+
+
+class BulkWriter:
+    # writer = BulkWriter(engine, batch_size=5000); writer.write(df, 'data_m5'); writer.upsert(df, 'data_m5', OHLCV_KEY)
+    # Mọi lô của 1 lần write()/upsert() nằm trong 1 transaction (lỗi thì không ghi dòng nào).
+    # last: thống kê lần ghi gần nhất (rows: số dòng nhận, inserted: số dòng thực sự thêm vào bảng)
+    def __init__(self, engine, batch_size=DEFAULT_BATCH_SIZE, verbose=True):
+        if batch_size < 1:
+            raise ValueError(f"[ERROR] batch_size phải >= 1, nhận {batch_size}")
+        self.engine = engine
+        self.batch_size = batch_size
+        self.verbose = verbose
+        self.last = None
+        self.total_rows = 0
+        self.total_seconds = 0.0
+
+    def quote(self, name):
+        return self.engine.dialect.identifier_preparer.quote_identifier(name)
+
+    def insert_sql(self, table, columns):
+        paramstyle = self.engine.dialect.paramstyle
+        if paramstyle not in _PLACEHOLDERS:
+            raise ValueError(f"[ERROR] Driver dùng paramstyle '{paramstyle}', BulkWriter chỉ hỗ trợ qmark/format")
+        placeholders = ', '.join([_PLACEHOLDERS[paramstyle]] * len(columns))
+        return f"INSERT INTO {self.quote(table)} ({', '.join(self.quote(c) for c in columns)}) VALUES ({placeholders})"
+
+    def write(self, df, table, conn=None):
+        # Ghi df vào table, trả về số dòng. conn: ghi trong transaction có sẵn (vd cùng transaction với bước khác)
+        started = time.perf_counter()
+        rows = to_rows(df)
+        batches = self._run(conn, lambda c: self._write_batches(c, self.insert_sql(table, list(df.columns)), rows))
+        self._record('Bulk insert', table, len(rows), len(rows), batches, started)
+        return len(rows)
+
+    def upsert(self, df, table, key_columns=OHLCV_KEY, conn=None):
+        # Ghi idempotent: chỉ thêm các dòng chưa có khóa key_columns trong table (dòng đã có giữ nguyên), trả về
+        # số dòng thêm mới. Dữ liệu được ghi theo lô vào bảng tạm (staging) rồi thêm bằng 1 lệnh INSERT ... SELECT
+        # anti-join (NOT EXISTS) trên khóa chính: SQL chỉ seek index theo khóa của các dòng gửi lên, không đọc
+        # lịch sử của bảng. Trên SQL Server anti-join giữ UPDLOCK, HOLDLOCK tới hết transaction nên nhiều process
+        # ghi đồng thời cùng khoảng thời gian không bị trùng khóa chính (process sau chờ rồi bỏ qua dòng đã có).
+        started = time.perf_counter()
+        df = df.drop_duplicates(subset=list(key_columns), keep='last')
+        rows = to_rows(df)
+        if not rows:
+            self._record('Upsert', table, 0, 0, 0, started)
+            return 0
+        inserted, batches = self._run(conn, lambda c: self._upsert(c, df.columns, rows, table, key_columns))
+        self._record('Upsert', table, len(rows), inserted, batches, started)
+        return inserted
+
+    def _upsert(self, conn, columns, rows, table, key_columns):
+        q = self.quote
+        mssql = self.engine.dialect.name == 'mssql'
+        # Bảng tạm riêng của mỗi kết nối (SQL Server #temp, SQLite TEMP), process khác không thấy
+        stage = f"#stage_{table}" if mssql else f"stage_{table}"
+        column_list = ', '.join(q(c) for c in columns)
+        if mssql:
+            conn.exec_driver_sql(f"SELECT TOP 0 {column_list} INTO {q(stage)} FROM {q(table)}")
+        else:
+            conn.exec_driver_sql(f"CREATE TEMP TABLE {q(stage)} AS SELECT {column_list} FROM {q(table)} WHERE 1 = 0")
+        try:
+            batches = self._write_batches(conn, self.insert_sql(stage, list(columns)), rows)
+            lock = " WITH (UPDLOCK, HOLDLOCK)" if mssql else ""
+            match = ' AND '.join(f"t.{q(c)} = s.{q(c)}" for c in key_columns)
+            result = conn.exec_driver_sql(
+                f"INSERT INTO {q(table)} ({column_list}) "
+                f"SELECT {', '.join(f's.{q(c)}' for c in columns)} FROM {q(stage)} s "
+                f"WHERE NOT EXISTS (SELECT 1 FROM {q(table)} t{lock} WHERE {match})"
+            )
+        finally:
+            conn.exec_driver_sql(f"DROP TABLE {q(stage)}")
+        return result.rowcount, batches
+
+    def _run(self, conn, func):
+        if conn is not None:
+            return func(conn)
+        with self.engine.begin() as own_conn:
+            return func(own_conn)
+
+    def _write_batches(self, conn, sql, rows):
+        batches = 0
+        for start in range(0, len(rows), self.batch_size):
+            conn.exec_driver_sql(sql, rows[start:start + self.batch_size])
+            batches += 1
+        return batches
+
+    def _record(self, action, table, rows, inserted, batches, started):
+        elapsed = time.perf_counter() - started
+        self.last = {
+            'table': table,
+            'rows': rows,
+            'inserted': inserted,
+            'batches': batches,
+            'seconds': elapsed,
+            'rows_per_sec': rows / elapsed if elapsed > 0 else np.inf,
+        }
+        self.total_rows += rows
+        self.total_seconds += elapsed
+        if self.verbose and rows:
+            print(f"[INFO] {action} {rows} dòng vào {table} ({inserted} dòng mới): {batches} lô × {self.batch_size}, "
+                  f"{elapsed:.2f}s ({self.last['rows_per_sec']:,.0f} dòng/s)")
+
+    def rows_per_sec(self):
+        # Tốc độ trung bình của mọi lần write()/upsert() từ khi tạo writer
+        return self.total_rows / self.total_seconds if self.total_seconds > 0 else 0.0
@@ -16,7 +16,8 @@ class SQLConnector:
                 f"mssql+pyodbc://{self.sql_cfg['username']}:{self.sql_cfg['password']}@{self.sql_cfg['server']}/{self.sql_cfg['database']}?"
                 f"driver={self.sql_cfg['driver']}"
             )
-        return sqlalchemy.create_engine(conn_str)
+        # fast_executemany: pyodbc gửi cả lô tham số của executemany (to_sql, BulkWriter) trong 1 lần thay vì từng dòng
+        return sqlalchemy.create_engine(conn_str, fast_executemany=self.sql_cfg.get('fast_executemany', True))
 
     def get_engine(self):
         return self.engine 
\ No newline at end of file
@@ -1,6 +1,14 @@
 import MetaTrader5 as mt5
 import datetime
 from src.connectors.mt5_connector import MT5Connector
+from src.utils.timeframes import TIMEFRAME_MINUTES
+
+# Số nến tối đa mỗi lần gọi MT5 khi backfill (giới hạn bộ nhớ mỗi khối)
+BACKFILL_CHUNK_BARS = 20000
+# Khoảng thời gian tối đa của 1 khối backfill: W/M × 20000 nến vượt giới hạn ~292 năm của pd.Timedelta
+BACKFILL_MAX_SPAN = datetime.timedelta(days=5 * 365)
+# MT5 tính thời gian theo giây epoch, không có nến trước mốc này
+_EPOCH = datetime.datetime(1970, 1, 1)
 
 class MT5Fetcher:
     def __init__(self, mt5_connector):
@@ -42,6 +50,108 @@ class MT5Fetcher:
             print(f"[ERROR] Lỗi khi fetch dữ liệu từ MT5: {e}")
             return None
 
+    def fetch_range(self, symbol, timeframe, start, end):
+        # Nến có thời điểm mở trong [start, end] (cả 2 đầu), start/end là datetime/Timestamp không múi giờ
+        # theo cùng quy ước với cột time (giây epoch MT5 trả về)
+        tf_enum = self.timeframe_str_to_mt5(timeframe)
+        import pandas as pd
+        try:
+            rates = mt5.copy_rates_range(symbol, tf_enum, _utc(start), _utc(end))
+        except Exception as e:
+            print(f"[ERROR] Lỗi khi fetch dữ liệu từ MT5: {e}")
+            return None
+        if rates is None:
+            print(f"[ERROR] Không lấy được dữ liệu từ MT5 cho {symbol} {timeframe}: {mt5.last_error()}")
+            return None
+        df = pd.DataFrame(rates)
+        if df.empty:
+            return df
+        df['time'] = pd.to_datetime(df['time'], unit='s')
+        return df
+
+    def last_bar_before(self, symbol, timeframe, when):
+        # Thời điểm mở của nến gần nhất có time <= when (copy_rates_from lấy nến lùi về quá khứ), None nếu không có
+        tf_enum = self.timeframe_str_to_mt5(timeframe)
+        import pandas as pd
+        try:
+            rates = mt5.copy_rates_from(symbol, tf_enum, _utc(when), 1)
+        except Exception as e:
+            print(f"[ERROR] Lỗi khi fetch dữ liệu từ MT5: {e}")
+            return None
+        if rates is None or len(rates) == 0:
+            return None
+        return pd.to_datetime(int(rates['time'][-1]), unit='s')
+
+    def backfill(self, symbol, timeframe, save, oldest=None, newest=None, since=None, until=None,
+                 chunk_bars=BACKFILL_CHUNK_BARS, direction='both'):
+        # Lấy lịch sử theo khoảng thời gian từ watermark đã lưu (oldest/newest: nến cũ nhất/mới nhất đã có trong DB),
+        # mỗi khối tối đa chunk_bars nến được save(df) ngay rồi bỏ khỏi bộ nhớ. Thứ tự ưu tiên:
+        #   1. forward: từ newest tới hiện tại (nến gần nhất còn thiếu), đi theo thời gian tăng dần
+        #   2. backward: từ oldest lùi về since (hoặc tới khi MT5 hết lịch sử), đi theo thời gian giảm dần. Khối rỗng
+        #      chưa chắc là hết lịch sử (nguồn dữ liệu bị gián đoạn, nghỉ dài): hỏi MT5 nến gần nhất trước khối
+        #      (last_bar_before), còn nến thì nhảy qua khoảng trống, không còn mới là hết lịch sử
+        # Mỗi khối dài chunk_bars nến theo timeframe, tối đa BACKFILL_MAX_SPAN. DB chưa có nến (oldest/newest None)
+        # thì lùi dần từ hiện tại. Khối chạm tới hiện tại bỏ nến cuối (nến đang hình thành). Các khối lặp lại 1 nến
+        # ở biên nên save phải idempotent (upsert). Ngắt giữa chừng: dữ liệu trong DB luôn liền mạch tính từ watermark
+        # (forward lưu theo thời gian tăng dần, backward giảm dần, khoảng trống chỉ có khi MT5 cũng không có nến) nên
+        # chạy lại với watermark mới sẽ tiếp tục đúng chỗ. direction: 'forward', 'backward' hoặc 'both'.
+        # Trả về số nến đã lưu (gồm cả nến trùng ở biên khối).
+        import pandas as pd
+        minutes = TIMEFRAME_MINUTES.get(timeframe) or TIMEFRAME_MINUTES[timeframe.upper()]
+        span = pd.Timedelta(min(datetime.timedelta(minutes=minutes * chunk_bars), BACKFILL_MAX_SPAN))
+        until = pd.Timestamp(until) if until is not None else pd.Timestamp.utcnow().tz_localize(None) + pd.Timedelta(days=1)
+        since = pd.Timestamp(since) if since is not None else None
+        fetched = 0
+        if newest is not None and direction in ('forward', 'both'):
+            cursor = pd.Timestamp(newest)
+            while cursor < until:
+                end = min(cursor + span, until)
+                df = self.fetch_range(symbol, timeframe, cursor, end)
+                if df is None:
+                    return fetched
+                last = df['time'].iloc[-1] if not df.empty else cursor
+                if end >= until:
+                    df = df.iloc[:-1]
+                if not df.empty:
+                    save(df)
+                    fetched += len(df)
+                # Khối có nến mới: tiếp tục từ nến cuối; không có: nhảy qua khoảng trống (nghỉ lễ, cuối tuần)
+                cursor = last if last > cursor else end
+        if direction in ('backward', 'both'):
+            cursor = pd.Timestamp(oldest) if oldest is not None else until
+            floor = max(since, pd.Timestamp(_EPOCH)) if since is not None else pd.Timestamp(_EPOCH)
+            while cursor > floor:
+                start = max(cursor - span, floor)
+                df = self.fetch_range(symbol, timeframe, start, cursor)
+                if df is None:
+                    return fetched
+                first = df['time'].iloc[0] if not df.empty else cursor
+                if oldest is None and cursor == until:
+                    df = df.iloc[:-1]
+                if not df.empty:
+                    save(df)
+                    fetched += len(df)
+                if first < cursor:
+                    cursor = first
+                    if start <= floor:
+                        break
+                    continue
+                # Không có nến nào trong [start, cursor): khoảng trống dữ liệu hay hết lịch sử
+                older = self.last_bar_before(symbol, timeframe, start)
+                if older is None or older >= cursor:
+                    print(f"[INFO] Hết lịch sử MT5 cho {symbol} {timeframe} trước {cursor}")
+                    break
+                if older < floor:
+                    break
+                print(f"[INFO] Khoảng trống dữ liệu {symbol} {timeframe} từ {older} tới {cursor}, bỏ qua")
+                cursor = older
+        return fetched
+
+def _utc(value):
+    # datetime có múi giờ UTC cho copy_rates_range (MT5 coi thời gian truyền vào là UTC)
+    value = value.to_pydatetime() if hasattr(value, 'to_pydatetime') else value
+    return value.replace(tzinfo=datetime.timezone.utc)
+
 def get_mt5_server_offset(symbol="EURUSD"):
     mt5.initialize()
     tick_time = mt5.symbol_info_tick(symbol).time  # timestamp (giây)
@@ -1,6 +1,62 @@
 import pandas as pd
 from sqlalchemy import create_engine, text
 
+from src.utils.memory import read_sql_compact, report_memory, select_columns
+from src.utils.ohlcv_frame import OHLCVFrame
+
+# Tên cột bảng nến trong SQL -> tên cột chuẩn dùng trong backtest
+OHLCV_COLUMN_NAMES = {
+    'TimeStamp': 'time',
+    'Open': 'open',
+    'High': 'high',
+    'Low': 'low',
+    'Close': 'close',
+    'Volume': 'volume'
+}
+
+
+def read_ohlcv_table(engine, timeframe, symbol_id, provider_id, start=None, end=None, compact=False, columns=None):
+    # Nến của 1 symbol từ bảng data_<timeframe> (bảng tạo bởi setup_database), cột chuẩn time/open/high/low/close/volume.
+    # engine: SQLAlchemy engine có pool, dùng lại giữa các lần gọi (vd mỗi worker 1 engine)
+    query = text(f"""
+        SELECT TimeStamp, [Open], [High], [Low], [Close], Volume
+        FROM [data_{timeframe}]
+        WHERE SymbolId = :symbol_id AND DataProviderId = :provider_id
+          AND (:start IS NULL OR TimeStamp >= :start) AND (:end IS NULL OR TimeStamp <= :end)
+        ORDER BY TimeStamp
+    """)
+    params = {"symbol_id": symbol_id, "provider_id": provider_id, "start": start, "end": end}
+    with engine.connect() as conn:
+        if compact:
+            df, _ = read_sql_compact(query, conn, params=params, columns=columns, rename=OHLCV_COLUMN_NAMES)
+        else:
+            df = select_columns(pd.read_sql(query, conn, params=params).rename(columns=OHLCV_COLUMN_NAMES), columns)
+    if 'time' in df.columns:
+        df['time'] = pd.to_datetime(df['time'])
+    return df
+
+
+def load_ohlcv(engine, symbol, timeframe, provider, start=None, end=None, compact=False, columns=None, as_frame=True):
+    # Nến của symbol theo tên (Symbol hoặc RefName) và tên provider, dùng cho các script apps/backtest.
+    # as_frame=True: trả về OHLCVFrame (dữ liệu compact giữ float32/số nguyên), False: DataFrame.
+    # In dung lượng bộ nhớ của đúng đối tượng được trả về (dữ liệu thực sự giữ lại trong process)
+    with engine.connect() as conn:
+        symbol_id = conn.execute(
+            text("SELECT Id FROM table_symbols WHERE Symbol = :symbol OR RefName = :symbol"), {"symbol": symbol}
+        ).scalar()
+        provider_id = conn.execute(
+            text("SELECT Id FROM table_dataproviders WHERE Name = :provider"), {"provider": provider}
+        ).scalar()
+    if symbol_id is None:
+        print(f"[ERROR] Không tìm thấy SymbolId cho {symbol}")
+    if provider_id is None:
+        print(f"[ERROR] Không tìm thấy ProviderId cho {provider}")
+    df = read_ohlcv_table(engine, timeframe, symbol_id, provider_id, start, end, compact=compact, columns=columns)
+    data = OHLCVFrame.from_frame(df) if as_frame else df
+    report_memory(data, f"{symbol} {timeframe}{' (compact)' if compact else ''}")
+    return data
+
+
 class SQLFetcher:
     def __init__(self, conn_str):
         self.engine = create_engine(conn_str)
@@ -11,7 +67,10 @@ class SQLFetcher:
             row = result.fetchone()
             return row[0] if row else None
 
-    def fetch_ohlcv(self, timeframe, symbol_id, timeframe_id, provider_id, start=None, end=None, limit=1000):
+    def fetch_ohlcv(self, timeframe, symbol_id, timeframe_id, provider_id, start=None, end=None, limit=1000,
+                    compact=False, columns=None):
+        # compact=True: nạp gọn bộ nhớ (OHLC float32, Id/volume số nguyên nhỏ, provider/exchange category),
+        # columns: chỉ giữ các cột này. Xem sai số float32 ở src/utils/memory.py
         with self.engine.connect() as conn:
             params = {
                 "Timeframe": timeframe,
@@ -32,9 +91,23 @@ class SQLFetcher:
                     @EndDate=:EndDate,
                     @Limit=:Limit
             """)
-            df = pd.read_sql(query, conn, params=params)
+            if compact:
+                df, raw_bytes = read_sql_compact(query, conn, params=params, columns=columns)
+            else:
+                df = select_columns(pd.read_sql(query, conn, params=params), columns)
+                raw_bytes = None
+            report_memory(df, f"{timeframe} SymbolId={symbol_id}", raw_bytes)
             return df
 
+    def fetch_trading_rules(self, active_only=True):
+        # Thư viện rule giao dịch: DataFrame Id, Name, BuyRule, SellRule, Description, Active.
+        # Mỗi dòng dùng cho RuleStrategy.from_row, hoặc gom BuyRule/SellRule của mọi dòng vào 1 RuleSet
+        query = "SELECT Id, Name, BuyRule, SellRule, Description, Active FROM table_trading_rules"
+        if active_only:
+            query += " WHERE Active = 1"
+        with self.engine.connect() as conn:
+            return pd.read_sql(text(query + " ORDER BY Id"), conn)
+
     # Có thể bổ sung thêm các hàm fetch khác nếu cần
 
 # Ví dụ sử dụng:
@@ -1,15 +1,36 @@
 from .base import Indicator
+from . import kernels
+from .rolling import RollingMean
+import math
+import numpy as np
 import pandas as pd
 
 class ATR(Indicator):
     def __init__(self, period=14):
         super().__init__(period=period)
         self.period = period
+        self.reset()
 
     def calculate(self, df):
         high_low = df['High'] - df['Low']
         high_close = (df['High'] - df['Close'].shift()).abs()
         low_close = (df['Low'] - df['Close'].shift()).abs()
-        tr = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
+        # Lớn nhất của 3 thành phần, bỏ qua NaN (nến đầu chỉ có High - Low); dùng được cho cả Series lẫn DataFrame
+        tr = np.fmax(np.fmax(high_low, high_close), low_close)
         atr = tr.rolling(window=self.period).mean()
-        return atr 
\ No newline at end of file
+        return atr
+
+    def calculate_into(self, df, out=None, workspace=None):
+        high, low, close = (kernels.as_array(df[col]) for col in ('High', 'Low', 'Close'))
+        return kernels.atr(high, low, close, self.period, out=out, workspace=workspace)
+
+    def reset(self):
+        self._mean = RollingMean(self.period)
+        self._prev_close = math.nan
+
+    def update(self, bar):
+        high, low, close = float(bar['High']), float(bar['Low']), float(bar['Close'])
+        # True range bỏ qua thành phần NaN (như max(axis=1) của pandas)
+        parts = [v for v in (high - low, abs(high - self._prev_close), abs(low - self._prev_close)) if v == v]
+        self._prev_close = close
+        return self._mean.update(max(parts) if parts else math.nan)
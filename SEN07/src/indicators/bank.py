@@ -0,0 +1,275 @@
+import numpy as np
+
+# Số nến mỗi khối của tổng tích lũy cục bộ: lũy thừa của 2 >= BLOCK_FACTOR * chu kỳ, tối thiểu MIN_BLOCK_SIZE.
+# Khối nhỏ theo chu kỳ giữ gốc dịch gần giá trị trong cửa sổ (ít triệt tiêu khi tính phương sai),
+# khối đủ lớn so với chu kỳ để ít cửa sổ phải ghép qua 2 khối.
+MIN_BLOCK_SIZE = 256
+BLOCK_FACTOR = 16
+# Phương sai cửa sổ nhỏ hơn cỡ khối / SNAP_DIVISOR * eps * (độ lớn các số hạng tạo ra tổng bình phương) nằm trong
+# sai số làm tròn của tổng tích lũy (đo trên cửa sổ phẳng: tới ~8 lần với khối 256, ~105 lần với khối 4096): coi là 0
+SNAP_DIVISOR = 8
+# Số cửa sổ mỗi đoạn khi tính độ lệch chuẩn: vài mảng tạm cỡ này vừa cache L2
+CHUNK_BARS = 1 << 15
+
+
+class _WindowSums:
+    # Tổng trượt (tổng, tổng bình phương, số giá trị hợp lệ) cho mọi chu kỳ từ tổng tích lũy.
+    # Chống sai số: tổng tích lũy chỉ chạy trong từng khối (độ lớn không tăng theo độ dài dữ liệu) và
+    # giá trị được trừ đi trung bình của khối trước khi cộng/bình phương, nên tổng bình phương không
+    # bị triệt tiêu khi giá lớn so với độ lệch chuẩn. Cửa sổ vắt qua 2 khối được ghép lại với hiệu chỉnh dịch gốc.
+    def __init__(self, values, block_size, squares=True, center=True):
+        values = np.asarray(values, dtype=float)
+        n = len(values)
+        self.n = n
+        self.block_size = block_size
+        n_blocks = max(1, -(-n // block_size))
+        padded = np.full(n_blocks * block_size, np.nan)
+        padded[:n] = values
+        blocks = padded.reshape(n_blocks, block_size)
+        valid = ~np.isnan(blocks)
+        block_count = valid.sum(axis=1)
+        if center:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                shift = np.where(block_count > 0, np.where(valid, blocks, 0.0).sum(axis=1) / block_count, 0.0)
+        else:
+            shift = np.zeros(n_blocks)
+        y = np.where(valid, blocks - shift[:, None], 0.0)
+        self.shift = shift
+        self.shift_at = np.repeat(shift, block_size)[:n]  # gốc dịch của khối chứa từng nến
+        # Tổng tích lũy theo khối giữ dạng (số khối × cỡ khối): cửa sổ vắt khối lấy bằng view theo khối (cross())
+        local = np.cumsum(y, axis=1)
+        self.total = local[:, -1]
+        self.local_blocks = local
+        self.local_prev_blocks = self._exclusive(local)
+        self.local = local.ravel()[:n]
+        self.local_prev = self.local_prev_blocks.ravel()[:n]
+        if squares:
+            local2 = np.cumsum(y * y, axis=1)
+            self.total2 = local2[:, -1]
+            self.local2_blocks = local2
+            self.local2_prev_blocks = self._exclusive(local2)
+            self.local2 = local2.ravel()[:n]
+            self.local2_prev = self.local2_prev_blocks.ravel()[:n]
+            # Ngưỡng sai số làm tròn của phương sai (xem SNAP_DIVISOR), tính 1 lần cho mọi chu kỳ: cửa sổ nằm trong
+            # 1 khối có độ lớn các số hạng local2[cuối] + local2[trước đầu] <= 2 * local2[cuối]
+            self.tol_factor = block_size / SNAP_DIVISOR * np.finfo(float).eps
+            self.tol_end = self.local2 * (2 * self.tol_factor)
+        self.block_count = block_count
+        self.count_prev_blocks = self._exclusive(np.cumsum(valid, axis=1))
+        self.count = np.concatenate(([0], np.cumsum(valid.ravel()[:n])))
+        self.has_nan = bool(self.count[-1] < n)
+
+    @staticmethod
+    def _exclusive(local):
+        # Tổng tích lũy cục bộ không tính nến hiện tại: = giá trị trước đó trong cùng khối, 0 ở đầu khối
+        prev = np.zeros_like(local)
+        prev[:, 1:] = local[:, :-1]
+        return prev
+
+    def cross(self, period, squares=True):
+        # Cửa sổ vắt qua ranh giới khối k*block (nến cuối trong [k*block, k*block + period - 2]): ghép phần cuối khối
+        # trước (A) với phần đầu khối sau, đưa A về gốc dịch của khối sau. Mỗi khối là 1 hàng của view 2 chiều nên
+        # không phải gom theo chỉ số. Trả về (vị trí cửa sổ s tăng dần, tổng, tổng bình phương, độ lớn các số hạng
+        # tạo ra tổng bình phương) hoặc None nếu không có cửa sổ nào vắt khối
+        n, block = self.n, self.block_size
+        k = period - 1
+        if k < 1 or len(self.total) < 2:
+            return None
+        tail = slice(block - k, block)
+        s = ((np.arange(1, len(self.total)) * block)[:, None] + np.arange(-k, 0)).ravel()
+        keep = s + k < n
+        a1 = self.total[:-1, None] - self.local_prev_blocks[:-1, tail]
+        a_count = self.block_count[:-1, None] - self.count_prev_blocks[:-1, tail]
+        d = (self.shift[:-1] - self.shift[1:])[:, None]
+        s1 = a1 + a_count * d + self.local_blocks[1:, :k]
+        if not squares:
+            return s[keep], s1.ravel()[keep], None, None
+        a2 = self.total2[:-1, None] - self.local2_prev_blocks[:-1, tail]
+        s2 = a2 + 2 * d * a1 + a_count * d * d + self.local2_blocks[1:, :k]
+        scale = self.total2[:-1, None] + self.local2_prev_blocks[:-1, tail] + 2 * np.abs(d * a1) + a_count * d * d \
+            + self.local2_blocks[1:, :k]
+        return s[keep], s1.ravel()[keep], s2.ravel()[keep], scale.ravel()[keep]
+
+    def window(self, period, squares=True):
+        # Trả về (số hợp lệ, tổng, tổng bình phương) của cửa sổ kết thúc tại nến period-1..n-1,
+        # tổng tính theo gốc dịch của khối chứa nến cuối cửa sổ (shift_at[period - 1:]).
+        # Số hợp lệ là None khi dữ liệu không có NaN (mọi cửa sổ đều đủ).
+        n = self.n
+        count = self.count[period:] - self.count[:n - period + 1] if self.has_nan else None
+        s1 = self.local[period - 1:] - self.local_prev[:n - period + 1]
+        s2 = self.local2[period - 1:] - self.local2_prev[:n - period + 1] if squares else None
+        cross = self.cross(period, squares=squares)
+        if cross is not None:
+            s1[cross[0]] = cross[1]
+            if squares:
+                s2[cross[0]] = cross[2]
+        return count, s1, s2
+
+
+class IndicatorBank:
+    # SMA, độ lệch chuẩn trượt / Bollinger và RSI cho nhiều chu kỳ trong 1 lần gọi.
+    # Tổng tích lũy (và tổng bình phương) chỉ tính 1 lần cho cả dãy, mỗi chu kỳ chỉ còn vài phép trừ vector.
+    # Trả về ma trận (số nến × số chu kỳ); cửa sổ chưa đủ dữ liệu hoặc có NaN trả về NaN như pandas rolling().
+    def __init__(self, values, min_block_size=MIN_BLOCK_SIZE):
+        self.values = np.asarray(values, dtype=float)
+        self.min_block_size = min_block_size
+        self._sums = {}
+        self._runs = None
+
+    def _window_sums(self, name, values, period, squares, center):
+        # Tổng tích lũy theo khối được tính 1 lần cho mỗi cỡ khối và dùng chung cho các chu kỳ cùng cỡ
+        block_size = max(self.min_block_size, 1 << int(BLOCK_FACTOR * period - 1).bit_length())
+        cached = self._sums.get((name, block_size))
+        if cached is None or (squares and not hasattr(cached, 'local2')):
+            cached = _WindowSums(values, block_size, squares=squares, center=center)
+            self._sums[(name, block_size)] = cached
+        return cached
+
+    def _flat(self, period):
+        # Cửa sổ có mọi giá trị bằng nhau (giá đứng yên): pandas rolling().mean() trả về đúng giá trị đó, tổng tích lũy
+        # có thể lệch 1 ulp và làm đảo so sánh bằng nhau (vd SMA nhanh > SMA chậm). Độ dài chuỗi giá trị bằng nhau
+        # liên tiếp kết thúc tại từng nến, tính 1 lần. None khi không có cửa sổ nào phẳng
+        if self._runs is None:
+            idx = np.arange(len(self.values))
+            start = np.where(np.r_[True, self.values[1:] != self.values[:-1]], idx, 0)
+            self._runs = idx - np.maximum.accumulate(start) + 1
+            self._max_run = int(self._runs.max()) if len(self._runs) else 0
+        if self._max_run < period:
+            return None
+        return self._runs[period - 1:] >= period
+
+    def _output(self, periods):
+        # Ma trận theo cột (order='F') để mỗi chu kỳ ghi vào 1 vùng nhớ liền
+        return np.full((len(self.values), len(periods)), np.nan, order='F')
+
+    def sma(self, periods):
+        periods = list(periods)
+        out = self._output(periods)
+        done = {}
+        for j, period in enumerate(periods):
+            if period in done:
+                out[:, j] = out[:, done[period]]
+                continue
+            done[period] = j
+            if period > len(self.values):
+                continue
+            sums = self._window_sums('price', self.values, period, squares=False, center=True)
+            count, s1, _ = sums.window(period, squares=False)
+            col = out[period - 1:, j]
+            np.divide(s1, period, out=col)
+            col += sums.shift_at[period - 1:]
+            flat = self._flat(period)
+            if flat is not None:
+                col[flat] = self.values[period - 1:][flat]
+            if count is not None:
+                col[count < period] = np.nan
+        return out
+
+    def std(self, periods, ddof=1):
+        return self._mean_std(list(periods), ddof, with_mean=False)[1]
+
+    def bollinger(self, periods, num_std=2):
+        # {'upper', 'middle', 'lower'}, mỗi phần tử (số nến × số chu kỳ)
+        mean, band = self._mean_std(list(periods), 1)
+        # Ma trận độ lệch chuẩn dùng lại làm đường dưới: chỉ cấp thêm 1 ma trận cho đường trên
+        band *= num_std
+        upper = mean + band
+        np.subtract(mean, band, out=band)
+        return {'upper': upper, 'middle': mean, 'lower': band}
+
+    def _mean_std(self, periods, ddof, with_mean=True):
+        # Mỗi chu kỳ tính theo từng đoạn CHUNK_BARS cửa sổ: các bước trung gian nằm trong cache CPU, chỉ đọc tổng
+        # tích lũy và ghi kết quả ra bộ nhớ; bộ nhớ tạm cấp 1 lần dùng lại cho mọi chu kỳ.
+        # with_mean=False (std()) không giữ ma trận trung bình
+        n = len(self.values)
+        mean = self._output(periods) if with_mean else None
+        std = self._output(periods)
+        chunk = min(CHUNK_BARS, n)
+        s1 = np.empty(chunk)
+        m_buf = np.empty(chunk)
+        mask = np.empty(chunk, dtype=bool)
+        done = {}
+        for j, period in enumerate(periods):
+            if period in done:
+                if with_mean:
+                    mean[:, j] = mean[:, done[period]]
+                std[:, j] = std[:, done[period]]
+                continue
+            done[period] = j
+            if period > n or period <= ddof:
+                continue
+            sums = self._window_sums('price', self.values, period, squares=True, center=True)
+            cross = sums.cross(period)
+            k = n - period + 1
+            for lo in range(0, k, chunk):
+                hi = min(lo + chunk, k)
+                w = hi - lo
+                bars = slice(period - 1 + lo, period - 1 + hi)
+                m = mean[bars, j] if with_mean else m_buf[:w]
+                sd = std[bars, j]
+                np.subtract(sums.local[bars], sums.local_prev[lo:hi], out=s1[:w])
+                np.subtract(sums.local2[bars], sums.local2_prev[lo:hi], out=sd)
+                if cross is not None:
+                    i0, i1 = np.searchsorted(cross[0], (lo, hi))
+                    at = cross[0][i0:i1] - lo
+                    s1[at] = cross[1][i0:i1]
+                    sd[at] = cross[2][i0:i1]
+                np.divide(s1[:w], period, out=m)
+                # Phương sai = (tổng bình phương - tổng * trung bình) / (n - ddof). Hiệu này triệt tiêu: sai số tuyệt
+                # đối cỡ eps * tổng bình phương tích lũy của khối nên cửa sổ gần phẳng (chu kỳ ngắn) sai lệch tương
+                # đối lớn, cửa sổ phẳng ra ~1e-9 thay vì 0. Giá trị dưới ngưỡng sai số làm tròn (cả khi ra âm) kẹp về 0
+                s1[:w] *= m
+                sd -= s1[:w]
+                np.less_equal(sd, sums.tol_end[bars], out=mask[:w])
+                if cross is not None:
+                    mask[at] = sd[at] <= cross[3][i0:i1] * sums.tol_factor
+                np.copyto(sd, 0.0, where=mask[:w])
+                sd /= period - ddof
+                np.sqrt(sd, out=sd)
+                if with_mean:
+                    m += sums.shift_at[bars]
+            if with_mean:
+                m = mean[period - 1:, j]
+            sd = std[period - 1:, j]
+            flat = self._flat(period)
+            if flat is not None:
+                if with_mean:
+                    m[flat] = self.values[period - 1:][flat]
+                sd[flat] = 0.0
+            if sums.has_nan:
+                missing = sums.count[period:] - sums.count[:k] < period
+                if with_mean:
+                    m[missing] = np.nan
+                sd[missing] = np.nan
+        return mean, std
+
+    def rsi(self, periods):
+        # RSI theo trung bình trượt đơn của gain/loss như RSI.calculate (nến đầu có delta = 0)
+        periods = list(periods)
+        out = self._output(periods)
+        delta = np.zeros(len(self.values))
+        delta[1:] = np.diff(self.values)
+        delta[np.isnan(delta)] = 0.0
+        gain_values = np.maximum(delta, 0.0)
+        loss_values = np.maximum(-delta, 0.0)
+        done = {}
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for j, period in enumerate(periods):
+                if period in done:
+                    out[:, j] = out[:, done[period]]
+                    continue
+                done[period] = j
+                if period > len(self.values):
+                    continue
+                _, gain, _ = self._window_sums('gain', gain_values, period, False, False).window(period, squares=False)
+                _, loss, _ = self._window_sums('loss', loss_values, period, False, False).window(period, squares=False)
+                # Tổng của các giá trị không âm không được âm do làm tròn (pandas cũng kẹp về 0)
+                col = out[period - 1:, j]
+                np.maximum(gain, 0.0, out=gain)
+                np.maximum(loss, 0.0, out=loss)
+                np.divide(gain, loss, out=col)
+                # 100 - 100 / (1 + rs)
+                col += 1
+                np.divide(100, col, out=col)
+                np.subtract(100, col, out=col)
+        return out
@@ -1,6 +1,58 @@
+from collections import deque
+
+
 class Indicator:
     def __init__(self, **params):
         self.params = params
 
     def calculate(self, df, *args, **kwargs):
-        raise NotImplementedError 
\ No newline at end of file
+        raise NotImplementedError
+
+    def calculate_panel(self, panel, *args, **kwargs):
+        # Tính cho mọi symbol của Panel (thời gian × symbol) trong 1 lần, mỗi symbol chỉ trên nến của chính nó
+        # (Panel.apply dồn nến có thật của từng symbol rồi trải kết quả về mốc gốc, mốc không có nến là NaN).
+        # Mặc định chạy calculate() trên panel (công thức pandas dùng được cho DataFrame thời gian × symbol) và
+        # trả về DataFrame; indicator nhiều đường override để trả về dict {tên đường: DataFrame}
+        return panel.apply(lambda p: self.calculate(p, *args, **kwargs))
+
+    def update(self, bar, *args, **kwargs):
+        # Cập nhật tăng dần với 1 nến mới (dict/Series), trả về giá trị indicator tại nến đó
+        raise NotImplementedError
+
+    def reset(self):
+        # Xóa trạng thái của update()
+        pass
+
+    def get_state(self):
+        # Trạng thái của update() dạng dict/list/số thuần, lưu được bằng json hoặc pickle
+        # để process khởi động lại tiếp tục (warm-start) mà không phải đọc lại lịch sử
+        return dump_state(self)
+
+    def set_state(self, state):
+        load_state(self, state)
+        return self
+
+
+def dump_state(obj):
+    state = {}
+    for key, value in vars(obj).items():
+        if isinstance(value, deque):
+            value = [list(v) if isinstance(v, list) else v for v in value]
+        elif isinstance(value, dict):
+            value = dict(value)
+        elif hasattr(value, '__dict__'):
+            value = dump_state(value)
+        state[key] = value
+    return state
+
+
+def load_state(obj, state):
+    # Nạp lại trạng thái vào object đã khởi tạo cùng tham số (deque giữ nguyên maxlen)
+    for key, value in state.items():
+        current = getattr(obj, key, None)
+        if isinstance(current, deque):
+            setattr(obj, key, deque([list(v) if isinstance(v, list) else v for v in value], maxlen=current.maxlen))
+        elif hasattr(current, '__dict__') and isinstance(value, dict):
+            load_state(current, value)
+        else:
+            setattr(obj, key, value)
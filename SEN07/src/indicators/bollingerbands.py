@@ -1,4 +1,8 @@
 from .base import Indicator
+from . import kernels
+from .bank import IndicatorBank
+from .rolling import RollingMean, RollingVar
+import math
 import pandas as pd
 
 class BollingerBands(Indicator):
@@ -6,10 +10,41 @@ class BollingerBands(Indicator):
         super().__init__(period=period, num_std=num_std)
         self.period = period
         self.num_std = num_std
+        self.reset()
 
     def calculate(self, df, price_col='Close'):
-        ma = df[price_col].rolling(window=self.period).mean()
-        std = df[price_col].rolling(window=self.period).std()
+        return pd.DataFrame(self._bands(df[price_col]))
+
+    def calculate_into(self, df, price_col='Close', out=None, workspace=None):
+        # out: dict {'upper', 'middle', 'lower'} các mảng cấp sẵn (thiếu đường nào thì cấp phát đường đó)
+        out = out or {}
+        return kernels.bollinger(
+            kernels.as_array(df[price_col]), self.period, self.num_std,
+            upper=out.get('upper'), middle=out.get('middle'), lower=out.get('lower'), workspace=workspace,
+        )
+
+    def calculate_panel(self, panel, price_col='Close'):
+        # Trả về dict {'upper', 'middle', 'lower'}, mỗi phần tử là DataFrame (thời gian × symbol)
+        return panel.apply(lambda p: self._bands(p[price_col]))
+
+    def _bands(self, price):
+        ma = price.rolling(window=self.period).mean()
+        std = price.rolling(window=self.period).std()
         upper = ma + self.num_std * std
         lower = ma - self.num_std * std
-        return pd.DataFrame({'upper': upper, 'middle': ma, 'lower': lower}) 
\ No newline at end of file
+        return {'upper': upper, 'middle': ma, 'lower': lower}
+
+    @staticmethod
+    def calculate_many(df, periods, num_std=2, price_col='Close'):
+        # Bollinger cho nhiều chu kỳ trong 1 lần: dict {'upper', 'middle', 'lower'}, mỗi phần tử (số nến × số chu kỳ)
+        return IndicatorBank(df[price_col].to_numpy(dtype=float)).bollinger(periods, num_std=num_std)
+
+    def reset(self):
+        self._mean = RollingMean(self.period)
+        self._var = RollingVar(self.period)
+
+    def update(self, bar, price_col='Close'):
+        price = bar[price_col]
+        ma = self._mean.update(price)
+        std = math.sqrt(self._var.update(price))
+        return {'upper': ma + self.num_std * std, 'middle': ma, 'lower': ma - self.num_std * std}
@@ -0,0 +1,115 @@
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Các cột dữ liệu gốc mà indicator đọc; cột do strategy thêm vào (signal, ...) không ảnh hưởng fingerprint
+PRICE_COLUMNS = ('open', 'high', 'low', 'close', 'volume', 'Open', 'High', 'Low', 'Close', 'Volume')
+FINGERPRINT_SAMPLES = 4096
+
+
+def fingerprint(df, columns=None):
+    # Fingerprint rẻ của dữ liệu đầu vào: số dòng, index đầu/cuối, và với mỗi cột giá: kiểu dữ liệu,
+    # tổng toàn cột (đổi bất kỳ giá trị nào cũng đổi tổng) và ~FINGERPRINT_SAMPLES giá trị lấy mẫu đều
+    h = hashlib.blake2b(digest_size=16)
+    n = len(df)
+    h.update(str(n).encode())
+    if n:
+        h.update(repr((df.index[0], df.index[-1])).encode())
+    step = max(1, n // FINGERPRINT_SAMPLES)
+    columns = [c for c in (columns or PRICE_COLUMNS) if c in df.columns]
+    for col in columns:
+        values = df[col].to_numpy()
+        h.update(col.encode())
+        h.update(str(values.dtype).encode())
+        if values.dtype.kind in 'biuf':
+            h.update(np.asarray(values.sum(dtype=np.float64)).tobytes())
+            h.update(np.ascontiguousarray(values[::step]).tobytes())
+            h.update(np.ascontiguousarray(values[-16:]).tobytes())
+        else:
+            h.update(pd.util.hash_pandas_object(df[col].iloc[::step], index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _nbytes(result):
+    if isinstance(result, pd.DataFrame):
+        return int(result.memory_usage(index=False).sum())
+    if isinstance(result, pd.Series):
+        return int(result.memory_usage(index=False))
+    if isinstance(result, dict):
+        return sum(_nbytes(v) for v in result.values())
+    return int(getattr(result, 'nbytes', 0))
+
+
+def _copy(result):
+    if isinstance(result, dict):
+        return {k: _copy(v) for k, v in result.items()}
+    return result.copy() if hasattr(result, 'copy') else result
+
+
+class IndicatorCache:
+    # Cache kết quả Indicator.calculate() theo (fingerprint dữ liệu, class indicator, tham số, đối số gọi).
+    # Giới hạn bộ nhớ theo LRU (max_bytes), đếm hit/miss. Kết quả trả ra là bản sao nên caller sửa thoải mái.
+    def __init__(self, max_bytes=256 * 2 ** 20):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, indicator, df, *args, **kwargs):
+        params = tuple(sorted(indicator.params.items()))
+        call = (args, tuple(sorted(kwargs.items())))
+        return (type(indicator).__module__, type(indicator).__name__, params, call, fingerprint(df))
+
+    def calculate(self, indicator, df, *args, **kwargs):
+        return self.lookup(self.key(indicator, df, *args, **kwargs), lambda: indicator.calculate(df, *args, **kwargs))
+
+    def lookup(self, key, compute):
+        # Lấy kết quả theo key nếu đã có, nếu không thì gọi compute() và lưu lại
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return _copy(self._entries[key][0])
+        self.misses += 1
+        result = compute()
+        size = _nbytes(result)
+        if size <= self.max_bytes:
+            self._entries[key] = (_copy(result), size)
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.nbytes -= evicted
+                self.evictions += 1
+        return result
+
+    def clear(self):
+        self._entries.clear()
+        self.nbytes = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'nbytes': self.nbytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / total if total else 0,
+        }
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# Cache dùng chung trong process (mỗi worker của process pool có cache riêng)
+default_cache = IndicatorCache()
+
+
+def cached_calculate(indicator, df, *args, cache=None, **kwargs):
+    # Như indicator.calculate(df, ...) nhưng dùng lại kết quả nếu cùng dữ liệu, indicator và tham số
+    if cache is None:
+        cache = default_cache
+    return cache.calculate(indicator, df, *args, **kwargs)
@@ -1,14 +1,31 @@
 from .base import Indicator
+from . import kernels
+from .rolling import RollingMean, safe_div
 import pandas as pd
 
 class CCI(Indicator):
     def __init__(self, period=20):
         super().__init__(period=period)
         self.period = period
+        self.reset()
 
     def calculate(self, df):
         tp = (df['High'] + df['Low'] + df['Close']) / 3
         ma = tp.rolling(window=self.period).mean()
         md = (tp - ma).abs().rolling(window=self.period).mean()
         cci = (tp - ma) / (0.015 * md)
-        return cci 
\ No newline at end of file
+        return cci
+
+    def calculate_into(self, df, out=None, workspace=None):
+        high, low, close = (kernels.as_array(df[col]) for col in ('High', 'Low', 'Close'))
+        return kernels.cci(high, low, close, self.period, out=out, workspace=workspace)
+
+    def reset(self):
+        self._ma = RollingMean(self.period)
+        self._md = RollingMean(self.period)
+
+    def update(self, bar):
+        tp = (float(bar['High']) + float(bar['Low']) + float(bar['Close'])) / 3
+        ma = self._ma.update(tp)
+        md = self._md.update(abs(tp - ma))
+        return safe_div(tp - ma, 0.015 * md)
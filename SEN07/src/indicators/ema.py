@@ -1,10 +1,23 @@
 from .base import Indicator
+from .rolling import EWMean, ewm_mean_many
 import pandas as pd
 
 class EMA(Indicator):
     def __init__(self, period=14):
         super().__init__(period=period)
         self.period = period
+        self.reset()
 
     def calculate(self, df, price_col='close'):
-        return df[price_col].ewm(span=self.period, adjust=False).mean() 
\ No newline at end of file
+        return df[price_col].ewm(span=self.period, adjust=False).mean()
+
+    @staticmethod
+    def calculate_many(df, periods, price_col='close'):
+        # EMA cho nhiều chu kỳ trong 1 lần, trả về mảng (số nến × số chu kỳ)
+        return ewm_mean_many(df[price_col].to_numpy(dtype=float), list(periods))
+
+    def reset(self):
+        self._ewm = EWMean(self.period)
+
+    def update(self, bar, price_col='close'):
+        return self._ewm.update(bar[price_col])
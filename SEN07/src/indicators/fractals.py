@@ -1,13 +1,40 @@
 from .base import Indicator
+from collections import deque
 import pandas as pd
 
 class Fractals(Indicator):
     def __init__(self):
         super().__init__()
+        self.reset()
 
     def calculate(self, df):
+        return pd.DataFrame(self._marks(df))
+
+    def calculate_panel(self, panel):
+        # Trả về dict {'up_fractal', 'down_fractal'}, mỗi phần tử là DataFrame bool (thời gian × symbol)
+        return panel.apply(self._marks)
+
+    def _marks(self, df):
         high = df['High']
         low = df['Low']
         up = (high.shift(2) < high.shift(0)) & (high.shift(1) < high.shift(0)) & (high.shift(-1) < high.shift(0)) & (high.shift(-2) < high.shift(0))
         down = (low.shift(2) > low.shift(0)) & (low.shift(1) > low.shift(0)) & (low.shift(-1) > low.shift(0)) & (low.shift(-2) > low.shift(0))
-        return pd.DataFrame({'up_fractal': up, 'down_fractal': down}) 
\ No newline at end of file
+        return {'up_fractal': up, 'down_fractal': down}
+
+    def reset(self):
+        self._highs = deque(maxlen=5)
+        self._lows = deque(maxlen=5)
+
+    def update(self, bar):
+        # Fractal cần 2 nến sau để xác nhận: giá trị trả về là của nến cách nến hiện tại 2 nến
+        # (None khi chưa có nến đó); 2 nến đầu luôn False như calculate()
+        self._highs.append(float(bar['High']))
+        self._lows.append(float(bar['Low']))
+        if len(self._highs) < 3:
+            return None
+        if len(self._highs) < 5:
+            return {'up_fractal': False, 'down_fractal': False}
+        high, low = self._highs[2], self._lows[2]
+        up = all(self._highs[j] < high for j in (0, 1, 3, 4))
+        down = all(self._lows[j] > low for j in (0, 1, 3, 4))
+        return {'up_fractal': up, 'down_fractal': down}
@@ -0,0 +1,177 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Kernel gộp (fused) cho các indicator nhiều bước: mỗi bước ghi thẳng vào mảng kết quả/bộ nhớ tạm đã cấp phát sẵn
+# (kiểu out= của numpy) thay cho chuỗi phép tính pandas mà mỗi bước tạo 1 Series tạm dài bằng dữ liệu.
+# Tổng/max/min cửa sổ lấy trực tiếp trên view cửa sổ trượt (sliding_window_view, không copy) nên mỗi cửa sổ
+# được cộng lại từ đầu: không tích lũy sai số theo độ dài dữ liệu, cửa sổ có NaN trả về NaN như pandas rolling().
+# Kết quả khớp calculate() (pandas) tới sai số làm tròn ~1e-12 tương đối.
+# Indicator dùng kernel có calculate_into(df, ..., out=None, workspace=None): bản ít cấp phát của calculate(),
+# ghi kết quả vào mảng numpy out cấp sẵn (indicator nhiều đường: dict {tên đường: mảng}), bộ nhớ tạm lấy từ
+# workspace (Workspace), nên gọi lại nhiều lần với cùng out/workspace không cấp phát thêm mảng nào.
+
+
+class Workspace:
+    # Bộ nhớ tạm dùng lại giữa các lần gọi kernel: mỗi tên chỉ cấp phát 1 lần (cấp lại khi dữ liệu dài hơn),
+    # các lần gọi sau trên dữ liệu cùng độ dài hoặc ngắn hơn không cấp phát thêm mảng nào
+    def __init__(self):
+        self._buffers = {}
+        self.allocations = 0
+
+    def get(self, name, n):
+        buf = self._buffers.get(name)
+        if buf is None or len(buf) < n:
+            buf = np.empty(n)
+            self._buffers[name] = buf
+            self.allocations += 1
+        return buf[:n]
+
+    @property
+    def nbytes(self):
+        return sum(buf.nbytes for buf in self._buffers.values())
+
+
+def as_array(values):
+    # Series/DataFrame cột -> mảng float64 (không copy nếu đã là float64)
+    return np.asarray(values.to_numpy(dtype=float) if hasattr(values, 'to_numpy') else values, dtype=float)
+
+
+def output(out, n):
+    # Mảng kết quả: dùng out nếu có (phải đúng độ dài), không thì cấp phát mới
+    if out is None:
+        return np.empty(n)
+    if out.shape != (n,):
+        raise ValueError(f"[ERROR] Mảng out có shape {out.shape}, cần ({n},)")
+    return out
+
+
+def rolling_sum(x, period, out):
+    # Tổng cửa sổ period vào out; period - 1 phần tử đầu là NaN
+    n = len(x)
+    out[:min(period - 1, n)] = np.nan
+    if n >= period:
+        np.add.reduce(sliding_window_view(x, period), axis=1, out=out[period - 1:])
+    return out
+
+
+def rolling_mean(x, period, out):
+    rolling_sum(x, period, out)
+    out /= period
+    return out
+
+
+def rolling_max(x, period, out):
+    n = len(x)
+    out[:min(period - 1, n)] = np.nan
+    if n >= period:
+        np.maximum.reduce(sliding_window_view(x, period), axis=1, out=out[period - 1:])
+    return out
+
+
+def rolling_min(x, period, out):
+    n = len(x)
+    out[:min(period - 1, n)] = np.nan
+    if n >= period:
+        np.minimum.reduce(sliding_window_view(x, period), axis=1, out=out[period - 1:])
+    return out
+
+
+def rolling_std(x, period, out, mean, workspace, ddof=1):
+    # Độ lệch chuẩn cửa sổ (ddof=1 như pandas) vào out; mean: trung bình cửa sổ đã tính sẵn (rolling_mean).
+    # Phương sai = (tổng bình phương - tổng * trung bình) / (period - ddof) trên giá trị đã trừ gốc dịch,
+    # các tổng chỉ trong 1 cửa sổ nên triệt tiêu không tăng theo độ dài dữ liệu
+    n = len(x)
+    shift = x[np.argmax(~np.isnan(x))] if n else 0.0
+    centered = np.subtract(x, shift, out=workspace.get('std_centered', n))
+    squares = np.multiply(centered, centered, out=workspace.get('std_squares', n))
+    rolling_sum(squares, period, out)
+    # tổng * trung bình (theo gốc dịch) = period * (mean - shift)^2
+    np.subtract(mean, shift, out=centered)
+    np.multiply(centered, centered, out=centered)
+    centered *= period
+    out -= centered
+    np.maximum(out, 0.0, out=out)
+    out /= period - ddof
+    np.sqrt(out, out=out)
+    return out
+
+
+def true_range(high, low, close, out, workspace):
+    # max(High - Low, |High - Close trước|, |Low - Close trước|) bỏ qua NaN như ATR.calculate
+    n = len(close)
+    np.subtract(high, low, out=out)
+    if n > 1:
+        part = workspace.get('tr_part', n - 1)
+        np.subtract(high[1:], close[:-1], out=part)
+        np.abs(part, out=part)
+        np.fmax(out[1:], part, out=out[1:])
+        np.subtract(low[1:], close[:-1], out=part)
+        np.abs(part, out=part)
+        np.fmax(out[1:], part, out=out[1:])
+    return out
+
+
+def atr(high, low, close, period, out=None, workspace=None):
+    if workspace is None:
+        workspace = Workspace()
+    n = len(close)
+    out = output(out, n)
+    tr = true_range(high, low, close, workspace.get('atr_tr', n), workspace)
+    return rolling_mean(tr, period, out)
+
+
+def typical_price(high, low, close, out):
+    np.add(high, low, out=out)
+    out += close
+    out /= 3
+    return out
+
+
+def cci(high, low, close, period, out=None, workspace=None):
+    # (tp - ma) / (0.015 * trung bình trượt của |tp - ma|)
+    if workspace is None:
+        workspace = Workspace()
+    n = len(close)
+    out = output(out, n)
+    tp = typical_price(high, low, close, workspace.get('cci_tp', n))
+    ma = rolling_mean(tp, period, workspace.get('cci_ma', n))
+    np.subtract(tp, ma, out=tp)  # tp giờ là tp - ma
+    dev = np.abs(tp, out=workspace.get('cci_dev', n))
+    rolling_mean(dev, period, out)
+    out *= 0.015
+    with np.errstate(divide='ignore', invalid='ignore'):
+        np.divide(tp, out, out=out)
+    return out
+
+
+def bollinger(price, period, num_std=2, upper=None, middle=None, lower=None, workspace=None):
+    # {'upper', 'middle', 'lower'} ghi vào các mảng upper/middle/lower
+    if workspace is None:
+        workspace = Workspace()
+    n = len(price)
+    middle = rolling_mean(price, period, output(middle, n))
+    upper = output(upper, n)
+    lower = output(lower, n)
+    std = rolling_std(price, period, lower, middle, workspace)
+    std *= num_std
+    np.add(middle, std, out=upper)
+    np.subtract(middle, std, out=lower)
+    return {'upper': upper, 'middle': middle, 'lower': lower}
+
+
+def stochastic(high, low, close, k_period, d_period, k_out=None, d_out=None, workspace=None):
+    # {'%K', '%D'}: %K = 100 * (Close - Low thấp nhất) / (High cao nhất - Low thấp nhất), %D = SMA của %K
+    if workspace is None:
+        workspace = Workspace()
+    n = len(close)
+    k = output(k_out, n)
+    d = output(d_out, n)
+    low_min = rolling_min(low, k_period, workspace.get('stoch_low', n))
+    high_max = rolling_max(high, k_period, workspace.get('stoch_high', n))
+    np.subtract(high_max, low_min, out=high_max)
+    np.subtract(close, low_min, out=k)
+    k *= 100
+    with np.errstate(divide='ignore', invalid='ignore'):
+        np.divide(k, high_max, out=k)
+    rolling_mean(k, d_period, d)
+    return {'%K': k, '%D': d}
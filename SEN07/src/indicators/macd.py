@@ -1,4 +1,6 @@
 from .base import Indicator
+from .rolling import EWMean, ewm_mean_many
+import numpy as np
 import pandas as pd
 
 class MACD(Indicator):
@@ -7,11 +9,56 @@ class MACD(Indicator):
         self.fast = fast
         self.slow = slow
         self.signal = signal
+        self.reset()
 
     def calculate(self, df, price_col='close'):
-        fast_ema = df[price_col].ewm(span=self.fast, adjust=False).mean()
-        slow_ema = df[price_col].ewm(span=self.slow, adjust=False).mean()
+        return pd.DataFrame(self._lines(df[price_col]), index=df.index)
+
+    def calculate_panel(self, panel, price_col='close'):
+        # Trả về dict {'macd', 'signal', 'hist'}, mỗi phần tử là DataFrame (thời gian × symbol)
+        return panel.apply(lambda p: self._lines(p[price_col]))
+
+    def _lines(self, price):
+        # Dùng chung cho Series (1 symbol) và DataFrame (nhiều symbol)
+        fast_ema = price.ewm(span=self.fast, adjust=False).mean()
+        slow_ema = price.ewm(span=self.slow, adjust=False).mean()
         macd = fast_ema - slow_ema
         signal = macd.ewm(span=self.signal, adjust=False).mean()
         hist = macd - signal
-        return pd.DataFrame({'macd': macd, 'signal': signal, 'hist': hist}, index=df.index) 
\ No newline at end of file
+        return {'macd': macd, 'signal': signal, 'hist': hist}
+
+    @staticmethod
+    def calculate_many(df, param_sets, price_col='close'):
+        # MACD cho nhiều bộ (fast, slow, signal) trong 1 lần, mỗi EMA chỉ tính 1 lần dù dùng chung.
+        # Trả về dict {'macd', 'signal', 'hist'}, mỗi phần tử là mảng (số nến × số bộ tham số)
+        param_sets = [tuple(p) for p in param_sets]
+        price = df[price_col].to_numpy(dtype=float)
+        spans = sorted({p[0] for p in param_sets} | {p[1] for p in param_sets})
+        ema = dict(zip(spans, ewm_mean_many(price, spans).T))
+        pairs = sorted({(fast, slow) for fast, slow, _ in param_sets})
+        macd = {pair: ema[pair[0]] - ema[pair[1]] for pair in pairs}
+        signal = {}
+        for signal_span in {p[2] for p in param_sets}:
+            group = [pair for pair in pairs if (pair[0], pair[1], signal_span) in param_sets]
+            # Các đường MACD cùng span tín hiệu được làm mượt chung trong 1 lần gọi ewm 2 chiều
+            smoothed = pd.DataFrame(np.column_stack([macd[pair] for pair in group])).ewm(span=signal_span, adjust=False).mean().to_numpy()
+            for k, pair in enumerate(group):
+                signal[pair + (signal_span,)] = smoothed[:, k]
+        n = len(price)
+        out = {key: np.empty((n, len(param_sets))) for key in ('macd', 'signal', 'hist')}
+        for j, p in enumerate(param_sets):
+            out['macd'][:, j] = macd[p[:2]]
+            out['signal'][:, j] = signal[p]
+            out['hist'][:, j] = macd[p[:2]] - signal[p]
+        return out
+
+    def reset(self):
+        self._fast_ewm = EWMean(self.fast)
+        self._slow_ewm = EWMean(self.slow)
+        self._signal_ewm = EWMean(self.signal)
+
+    def update(self, bar, price_col='close'):
+        price = bar[price_col]
+        macd = self._fast_ewm.update(price) - self._slow_ewm.update(price)
+        signal = self._signal_ewm.update(macd)
+        return {'macd': macd, 'signal': signal, 'hist': macd - signal}
@@ -1,17 +1,43 @@
 from .base import Indicator
+import numpy as np
 import pandas as pd
 
+def _obv(close, volume):
+    # OBV = tổng tích luỹ của volume * dấu thay đổi giá đóng cửa (giá không đổi hoặc NaN: giữ nguyên).
+    # close/volume 1 chiều (1 symbol) hoặc 2 chiều (thời gian × symbol), cộng dồn theo trục thời gian
+    # Volume kiểu uint (tick_volume của MT5) phải đổi sang kiểu có dấu trước khi lấy -volume
+    volume = volume.astype(np.result_type(volume.dtype, np.int64), copy=False)
+    step = np.zeros(volume.shape, dtype=volume.dtype)
+    if len(close) > 1:
+        up = close[1:] > close[:-1]
+        down = close[1:] < close[:-1]
+        step[1:] = np.where(up, volume[1:], np.where(down, -volume[1:], 0))
+    return np.cumsum(step, axis=0)
+
 class OBV(Indicator):
     def __init__(self):
         super().__init__()
+        self.reset()
 
     def calculate(self, df):
-        obv = [0]
-        for i in range(1, len(df)):
-            if df['Close'].iloc[i] > df['Close'].iloc[i-1]:
-                obv.append(obv[-1] + df['Volume'].iloc[i])
-            elif df['Close'].iloc[i] < df['Close'].iloc[i-1]:
-                obv.append(obv[-1] - df['Volume'].iloc[i])
-            else:
-                obv.append(obv[-1])
-        return pd.Series(obv, index=df.index) 
\ No newline at end of file
+        return pd.Series(_obv(df['Close'].to_numpy(dtype=float), df['Volume'].to_numpy()), index=df.index)
+
+    def calculate_panel(self, panel):
+        # calculate() trả về Series 1 chiều, panel cần _obv trên mảng 2 chiều (cộng dồn theo trục thời gian)
+        return panel.apply(lambda p: _obv(p['Close'].to_numpy(), p['Volume'].to_numpy()))
+
+    def reset(self):
+        self._obv = 0
+        self._prev_close = None
+
+    def update(self, bar):
+        close = float(bar['Close'])
+        volume = bar['Volume']
+        volume = volume.item() if hasattr(volume, 'item') else volume
+        if self._prev_close is not None:
+            if close > self._prev_close:
+                self._obv += volume
+            elif close < self._prev_close:
+                self._obv -= volume
+        self._prev_close = close
+        return self._obv
@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+
+FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+
+class Panel:
+    # Dữ liệu nhiều symbol căn theo cùng trục thời gian: mỗi field là mảng (số mốc thời gian × số symbol),
+    # NaN ở những mốc symbol không có nến (ngoài phiên, nghỉ lễ...).
+    # panel['close'] / panel['Close'] trả về DataFrame (thời gian × symbol) để dùng chung công thức với indicator.
+    def __init__(self, index, symbols, **fields):
+        self.index = pd.Index(index)
+        self.symbols = list(symbols)
+        shape = (len(self.index), len(self.symbols))
+        self.fields = {}
+        for name, values in fields.items():
+            values = np.asarray(values, dtype=float)
+            if values.shape != shape:
+                raise ValueError(f"[ERROR] Field '{name}' có shape {values.shape}, cần {shape}")
+            self.fields[name.lower()] = values
+
+    @classmethod
+    def from_frames(cls, frames, time_col='time'):
+        # frames: dict {symbol: DataFrame OHLCV của symbol đó}, tên cột chữ thường hoặc chữ hoa đều được.
+        # Trục thời gian là hợp của mọi symbol; mốc symbol không có nến để NaN
+        aligned = {}
+        for symbol, df in frames.items():
+            df = df.rename(columns=str.lower)
+            df = df.loc[:, ~df.columns.duplicated()]
+            aligned[symbol] = df.set_index(pd.to_datetime(df[time_col.lower()])) if time_col.lower() in df.columns else df
+        index = pd.Index(sorted(set().union(*(df.index for df in aligned.values())))) if aligned else pd.Index([])
+        symbols = list(aligned)
+        fields = {}
+        for name in FIELDS:
+            if all(name in df.columns for df in aligned.values()) and aligned:
+                fields[name] = np.column_stack([
+                    df[name].reindex(index).to_numpy(dtype=float) for df in aligned.values()
+                ])
+        return cls(index, symbols, **fields)
+
+    @classmethod
+    def from_long(cls, df, symbol_col='symbol', time_col='time'):
+        # DataFrame dạng dài (mỗi dòng 1 nến của 1 symbol) -> Panel
+        return cls.from_frames({symbol: group for symbol, group in df.groupby(symbol_col, sort=False)}, time_col=time_col)
+
+    def __getitem__(self, name):
+        return pd.DataFrame(self.fields[name.lower()], index=self.index, columns=self.symbols)
+
+    def __contains__(self, name):
+        return name.lower() in self.fields
+
+    @property
+    def shape(self):
+        return len(self.index), len(self.symbols)
+
+    def valid(self):
+        # Mốc có nến của từng symbol (close khác NaN)
+        return ~np.isnan(self.fields['close'])
+
+    def apply(self, func):
+        # Chạy func trên panel đã "nén" theo từng symbol (các nến có thật của mỗi symbol dồn lên đầu cột,
+        # đúng thứ tự thời gian), rồi trải kết quả về đúng mốc thời gian gốc. Nhờ vậy cửa sổ rolling/EMA
+        # của mỗi symbol chỉ tính trên nến của chính symbol đó, khoảng trống phiên không làm NaN cả cửa sổ.
+        # func nhận Panel nén, trả về DataFrame hoặc dict {tên: DataFrame}; mốc không có nến trả về NaN/False.
+        valid = self.valid()
+        # Không có khoảng trống thì tính thẳng, không cần nén/trải
+        order = None if valid.all() else np.argsort(~valid, axis=0, kind='stable')
+        result = func(self if order is None else _CompactPanel(self, order))
+        if isinstance(result, dict):
+            return {key: self._expand(value, order, valid) for key, value in result.items()}
+        return self._expand(result, order, valid)
+
+    def _expand(self, result, order, valid):
+        values = np.asarray(result)
+        if order is None:
+            return pd.DataFrame(values, index=self.index, columns=self.symbols)
+        out = np.empty_like(values)
+        np.put_along_axis(out, order, values, axis=0)
+        out[~valid] = False if out.dtype == bool else np.nan
+        return pd.DataFrame(out, index=self.index, columns=self.symbols)
+
+
+class _CompactPanel(Panel):
+    # Panel nén của Panel.apply: chỉ gom lại field nào được dùng tới
+    def __init__(self, panel, order):
+        self.index = pd.RangeIndex(len(panel.index))
+        self.symbols = panel.symbols
+        self._source = panel.fields
+        self._order = order
+        self.fields = {}
+
+    def __getitem__(self, name):
+        key = name.lower()
+        if key not in self.fields:
+            self.fields[key] = np.take_along_axis(self._source[key], self._order, axis=0)
+        return super().__getitem__(name)
+
+    def __contains__(self, name):
+        return name.lower() in self._source
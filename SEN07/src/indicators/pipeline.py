@@ -0,0 +1,195 @@
+import numpy as np
+import pandas as pd
+
+from .cache import fingerprint
+from .obv import _obv as _obv_values
+
+# Mỗi node của đồ thị là 1 tuple (loại, tham số...), vd ('sma', 20), ('ema', 12), ('macd_hist', 12, 26, 9).
+# NODES[loại](*tham số) trả về (danh sách node phụ thuộc, hàm tính từ giá trị của các node đó).
+# Node trung gian dùng chung (EMA cho MACD, typical price cho CCI, true range cho ATR, SMA cho Bollinger...)
+# chỉ được tính 1 lần trong 1 lần chạy pipeline. Công thức giống hệt các class indicator tương ứng.
+
+
+def _col(name):
+    return [], None
+
+
+def _sma(period, source=('col', 'close')):
+    return [source], lambda s: s.rolling(window=period).mean()
+
+
+def _std(period, source=('col', 'close')):
+    return [source], lambda s: s.rolling(window=period).std()
+
+
+def _ema(span, source=('col', 'close')):
+    return [source], lambda s: s.ewm(span=span, adjust=False).mean()
+
+
+def _macd(fast, slow):
+    return [('ema', fast), ('ema', slow)], lambda f, s: f - s
+
+
+def _macd_signal(fast, slow, signal):
+    return [('ema', signal, ('macd', fast, slow))], lambda s: s
+
+
+def _macd_hist(fast, slow, signal):
+    return [('macd', fast, slow), ('macd_signal', fast, slow, signal)], lambda m, s: m - s
+
+
+def _delta():
+    return [('col', 'close')], lambda c: c.diff()
+
+
+def _rsi(period):
+    def compute(delta):
+        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
+        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
+        return 100 - (100 / (1 + gain / loss))
+    return [('delta',)], compute
+
+
+def _bb_upper(period, num_std=2):
+    return [('sma', period), ('std', period)], lambda m, s: m + num_std * s
+
+
+def _bb_lower(period, num_std=2):
+    return [('sma', period), ('std', period)], lambda m, s: m - num_std * s
+
+
+def _tp():
+    return [('col', 'high'), ('col', 'low'), ('col', 'close')], lambda h, l, c: (h + l + c) / 3
+
+
+def _tr():
+    def compute(h, l, c):
+        prev_close = c.shift()
+        return np.fmax(np.fmax(h - l, (h - prev_close).abs()), (l - prev_close).abs())
+    return [('col', 'high'), ('col', 'low'), ('col', 'close')], compute
+
+
+def _atr(period):
+    return [('sma', period, ('tr',))], lambda s: s
+
+
+def _cci(period):
+    def compute(tp, ma):
+        md = (tp - ma).abs().rolling(window=period).mean()
+        return (tp - ma) / (0.015 * md)
+    return [('tp',), ('sma', period, ('tp',))], compute
+
+
+def _lowest(period, source=('col', 'low')):
+    return [source], lambda s: s.rolling(window=period).min()
+
+
+def _highest(period, source=('col', 'high')):
+    return [source], lambda s: s.rolling(window=period).max()
+
+
+def _stoch_k(k_period):
+    return (
+        [('col', 'close'), ('lowest', k_period), ('highest', k_period)],
+        lambda c, lo, hi: 100 * (c - lo) / (hi - lo),
+    )
+
+
+def _stoch_d(k_period, d_period):
+    return [('sma', d_period, ('stoch_k', k_period))], lambda s: s
+
+
+def _obv():
+    def compute(c, v):
+        return pd.Series(_obv_values(c.to_numpy(dtype=float), v.to_numpy()), index=c.index)
+    return [('col', 'close'), ('col', 'volume')], compute
+
+
+NODES = {
+    'col': _col,
+    'sma': _sma,
+    'std': _std,
+    'ema': _ema,
+    'macd': _macd,
+    'macd_signal': _macd_signal,
+    'macd_hist': _macd_hist,
+    'delta': _delta,
+    'rsi': _rsi,
+    'bb_upper': _bb_upper,
+    'bb_middle': _sma,
+    'bb_lower': _bb_lower,
+    'tp': _tp,
+    'tr': _tr,
+    'atr': _atr,
+    'cci': _cci,
+    'lowest': _lowest,
+    'highest': _highest,
+    'stoch_k': _stoch_k,
+    'stoch_d': _stoch_d,
+    'obv': _obv,
+}
+
+
+def _normalize(node):
+    # 'bb_middle' là SMA cùng chu kỳ: quy về 1 node để không tính 2 lần
+    node = tuple(node)
+    if node[0] == 'bb_middle':
+        return ('sma', node[1])
+    return node
+
+
+def _column(df, name):
+    # Cột dữ liệu gốc, chấp nhận cả tên chữ thường (close) lẫn chữ hoa (Close)
+    for col in (name, name.capitalize(), name.upper()):
+        if col in df.columns:
+            return df[col]
+    raise KeyError(f"[ERROR] Không có cột '{name}' trong dữ liệu")
+
+
+class IndicatorPipeline:
+    # Pipeline indicator khai báo: outputs = {tên cột kết quả: node}, vd {'ma20': ('sma', 20), 'hist': ('macd_hist', 5, 25, 5)}.
+    # Đồ thị phụ thuộc được phân giải 1 lần khi khởi tạo (thứ tự topo), mỗi node trung gian chỉ tính 1 lần,
+    # run() chỉ trả về các cột được yêu cầu. Có cache (IndicatorCache) thì mỗi node còn được dùng lại giữa các lần chạy
+    # trên cùng dữ liệu (vd EMA dùng chung cho nhiều bộ tham số MACD trong sweep).
+    def __init__(self, outputs):
+        self.outputs = {name: _normalize(node) for name, node in outputs.items()}
+        self.order = []
+        self._deps = {}
+        for node in self.outputs.values():
+            self._resolve(node, ())
+        self.computed = []
+
+    def _resolve(self, node, path):
+        if node in self._deps:
+            return
+        if node in path:
+            raise ValueError(f"[ERROR] Vòng lặp phụ thuộc tại node {node}")
+        if node[0] not in NODES:
+            raise ValueError(f"[ERROR] Không có loại indicator '{node[0]}' trong pipeline")
+        deps, _ = NODES[node[0]](*node[1:])
+        deps = [_normalize(dep) for dep in deps]
+        for dep in deps:
+            self._resolve(dep, path + (node,))
+        self._deps[node] = deps
+        self.order.append(node)
+
+    def run(self, df, cache=None):
+        # Trả về DataFrame chỉ gồm các cột được yêu cầu, cùng index với df
+        values = {}
+        self.computed = []
+        fp = fingerprint(df) if cache is not None else None
+        for node in self.order:
+            if node[0] == 'col':
+                values[node] = _column(df, node[1])
+                continue
+            _, compute = NODES[node[0]](*node[1:])
+            args = [values[dep] for dep in self._deps[node]]
+            if cache is None:
+                values[node] = self._compute(node, compute, args)
+            else:
+                values[node] = cache.lookup(('pipeline', node, fp), lambda: self._compute(node, compute, args))
+        return pd.DataFrame({name: values[node] for name, node in self.outputs.items()}, index=df.index)
+
+    def _compute(self, node, compute, args):
+        self.computed.append(node)
+        return compute(*args)
@@ -0,0 +1,235 @@
+import math
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+
+class RollingMean:
+    # Trung bình trượt O(1) mỗi giá trị mới, cộng/trừ Kahan giống hệt pandas rolling().mean()
+    # để update() cho ra đúng giá trị như calculate()
+    def __init__(self, window):
+        self.window = window
+        self.reset()
+
+    def reset(self):
+        self.values = deque(maxlen=self.window)
+        self.nobs = 0
+        self.neg_ct = 0
+        self.sum_x = 0.0
+        self.comp_add = 0.0
+        self.comp_remove = 0.0
+        self.same_ct = 0
+        self.prev_value = None
+
+    def update(self, val):
+        val = float(val)
+        if self.window == 1 or len(self.values) == 0:
+            # pandas khởi tạo lại tổng khi cửa sổ không chồng lên cửa sổ trước
+            self.nobs = self.neg_ct = 0
+            self.sum_x = self.comp_add = self.comp_remove = 0.0
+            self.same_ct = 0
+            self.prev_value = val
+        elif len(self.values) == self.window:
+            self._remove(self.values[0])
+        self.values.append(val)
+        self._add(val)
+        return self.value()
+
+    def value(self):
+        if self.nobs < self.window or self.nobs == 0:
+            return math.nan
+        result = self.sum_x / self.nobs
+        if self.same_ct >= self.nobs:
+            result = self.prev_value
+        elif self.neg_ct == 0 and result < 0:
+            result = 0.0
+        elif self.neg_ct == self.nobs and result > 0:
+            result = 0.0
+        return result
+
+    def _add(self, val):
+        if val != val:
+            return
+        self.nobs += 1
+        y = val - self.comp_add
+        t = self.sum_x + y
+        self.comp_add = t - self.sum_x - y
+        self.sum_x = t
+        if math.copysign(1.0, val) < 0:
+            self.neg_ct += 1
+        if val == self.prev_value:
+            self.same_ct += 1
+        else:
+            self.same_ct = 1
+        self.prev_value = val
+
+    def _remove(self, val):
+        if val != val:
+            return
+        self.nobs -= 1
+        y = -val - self.comp_remove
+        t = self.sum_x + y
+        self.comp_remove = t - self.sum_x - y
+        self.sum_x = t
+        if math.copysign(1.0, val) < 0:
+            self.neg_ct -= 1
+
+
+class RollingVar:
+    # Phương sai trượt O(1) (Welford cộng/trừ có bù sai số) giống pandas rolling().var(), ddof=1
+    def __init__(self, window, ddof=1):
+        self.window = window
+        self.ddof = ddof
+        self.reset()
+
+    def reset(self):
+        self.values = deque(maxlen=self.window)
+        self.nobs = 0
+        self.mean_x = 0.0
+        self.ssqdm_x = 0.0
+        self.comp = 0.0
+        self.same_ct = 0
+        self.prev_value = None
+
+    def update(self, val):
+        val = float(val)
+        if self.window == 1 or len(self.values) == 0:
+            self.nobs = self.same_ct = 0
+            self.mean_x = self.ssqdm_x = self.comp = 0.0
+            self.prev_value = None
+        # pandas cộng giá trị mới trước rồi mới trừ giá trị rời cửa sổ
+        old = self.values[0] if len(self.values) == self.window else None
+        self.values.append(val)
+        self._add(val)
+        if old is not None:
+            self._remove(old)
+        return self.value()
+
+    def value(self):
+        if self.nobs < self.window or self.nobs <= self.ddof:
+            return math.nan
+        if self.nobs == 1 or self.same_ct >= self.nobs:
+            return 0.0
+        return max(self.ssqdm_x / (self.nobs - self.ddof), 0.0)
+
+    def std(self):
+        return math.sqrt(self.value())
+
+    def _add(self, val):
+        if val != val:
+            return
+        if val == self.prev_value:
+            self.same_ct += 1
+        else:
+            self.same_ct = 1
+        self.prev_value = val
+        self.nobs += 1
+        prev_mean = self.mean_x - self.comp
+        y = val - self.comp
+        t = y - self.mean_x
+        self.comp = t + self.mean_x - y
+        self.mean_x += t / self.nobs
+        self.ssqdm_x += (val - prev_mean) * (val - self.mean_x)
+
+    def _remove(self, val):
+        if val != val:
+            return
+        self.nobs -= 1
+        if self.nobs:
+            prev_mean = self.mean_x - self.comp
+            y = val - self.comp
+            t = y - self.mean_x
+            self.comp = t + self.mean_x - y
+            self.mean_x -= t / self.nobs
+            self.ssqdm_x -= (val - prev_mean) * (val - self.mean_x)
+        else:
+            self.mean_x = self.ssqdm_x = 0.0
+
+
+class RollingExtreme:
+    # Min/max trượt O(1) trung bình bằng deque đơn điệu [chỉ số, giá trị];
+    # NaN nếu cửa sổ chưa đủ window giá trị hợp lệ như pandas rolling().min()/max()
+    def __init__(self, window, mode='max'):
+        self.window = window
+        self.mode = mode
+        self.reset()
+
+    def reset(self):
+        self.candidates = deque()
+        self.valid = deque(maxlen=self.window)
+        self.nobs = 0
+        self.idx = 0
+
+    def update(self, val):
+        val = float(val)
+        if len(self.valid) == self.window:
+            self.nobs -= self.valid[0]
+        is_valid = int(val == val)
+        self.valid.append(is_valid)
+        self.nobs += is_valid
+        if is_valid:
+            if self.mode == 'max':
+                while self.candidates and self.candidates[-1][1] <= val:
+                    self.candidates.pop()
+            else:
+                while self.candidates and self.candidates[-1][1] >= val:
+                    self.candidates.pop()
+            self.candidates.append([self.idx, val])
+        while self.candidates and self.candidates[0][0] <= self.idx - self.window:
+            self.candidates.popleft()
+        self.idx += 1
+        return self.value()
+
+    def value(self):
+        return self.candidates[0][1] if self.nobs >= self.window and self.candidates else math.nan
+
+
+class EWMean:
+    # EMA đệ quy O(1), cùng công thức với pandas ewm(span=..., adjust=False).mean()
+    def __init__(self, span):
+        self.span = span
+        com = (span - 1) / 2
+        self.alpha = 1. / (1. + com)
+        self.reset()
+
+    def reset(self):
+        self.weighted = None
+        self.old_wt = 1.
+
+    def update(self, val):
+        cur = float(val)
+        if self.weighted is None:
+            self.weighted = cur
+            self.old_wt = 1.
+        elif self.weighted == self.weighted:
+            # Nến thiếu giá (NaN) vẫn làm suy giảm trọng số cũ (ignore_na=False)
+            self.old_wt *= 1. - self.alpha
+            if cur == cur:
+                if self.weighted != cur:
+                    self.weighted = (self.old_wt * self.weighted + self.alpha * cur) / (self.old_wt + self.alpha)
+                self.old_wt = 1.
+        elif cur == cur:
+            self.weighted = cur
+        return self.weighted
+
+    def value(self):
+        return math.nan if self.weighted is None else self.weighted
+
+
+def safe_div(a, b):
+    # Chia như numpy/pandas: chia cho 0 ra inf/-inf (hoặc NaN nếu 0/0) thay vì ZeroDivisionError
+    if b == 0:
+        if a == 0 or a != a:
+            return math.nan
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+    return a / b
+
+
+def ewm_mean_many(values, spans):
+    # EMA (adjust=False) cho nhiều span, mỗi span khác nhau chỉ tính 1 lần, trả về (số nến × số span)
+    series = pd.Series(np.asarray(values, dtype=float))
+    if len(spans) == 0:
+        return np.empty((len(series), 0))
+    unique = {span: series.ewm(span=span, adjust=False).mean().to_numpy() for span in set(spans)}
+    return np.column_stack([unique[span] for span in spans])
@@ -1,10 +1,14 @@
 from .base import Indicator
+from .bank import IndicatorBank
+from .rolling import RollingMean, safe_div
+import math
 import pandas as pd
 
 class RSI(Indicator):
     def __init__(self, period=14):
         super().__init__(period=period)
         self.period = period
+        self.reset()
 
     def calculate(self, df, price_col='close'):
         delta = df[price_col].diff()
@@ -12,4 +16,24 @@ class RSI(Indicator):
         loss = (-delta.where(delta < 0, 0)).rolling(window=self.period).mean()
         rs = gain / loss
         rsi = 100 - (100 / (1 + rs))
-        return rsi 
\ No newline at end of file
+        return rsi
+
+    @staticmethod
+    def calculate_many(df, periods, price_col='close'):
+        # RSI cho nhiều chu kỳ trong 1 lần, trả về mảng (số nến × số chu kỳ)
+        return IndicatorBank(df[price_col].to_numpy(dtype=float)).rsi(periods)
+
+    def reset(self):
+        self._gain = RollingMean(self.period)
+        self._loss = RollingMean(self.period)
+        self._prev_price = math.nan
+
+    def update(self, bar, price_col='close'):
+        price = float(bar[price_col])
+        # delta NaN (nến đầu, giá thiếu) tính là 0 như delta.where(...)
+        delta = price - self._prev_price
+        self._prev_price = price
+        gain = self._gain.update(delta if delta > 0 else 0.0)
+        loss = self._loss.update(-delta if delta < 0 else 0.0)
+        rs = safe_div(gain, loss)
+        return 100 - safe_div(100, 1 + rs)
@@ -1,10 +1,24 @@
 from .base import Indicator
+from .bank import IndicatorBank
+from .rolling import RollingMean
 import pandas as pd
 
 class SMA(Indicator):
     def __init__(self, period=14):
         super().__init__(period=period)
         self.period = period
+        self.reset()
 
     def calculate(self, df, price_col='close'):
-        return df[price_col].rolling(window=self.period).mean() 
\ No newline at end of file
+        return df[price_col].rolling(window=self.period).mean()
+
+    @staticmethod
+    def calculate_many(df, periods, price_col='close'):
+        # SMA cho nhiều chu kỳ trong 1 lần, trả về mảng (số nến × số chu kỳ)
+        return IndicatorBank(df[price_col].to_numpy(dtype=float)).sma(periods)
+
+    def reset(self):
+        self._mean = RollingMean(self.period)
+
+    def update(self, bar, price_col='close'):
+        return self._mean.update(bar[price_col])
@@ -1,4 +1,6 @@
 from .base import Indicator
+from . import kernels
+from .rolling import RollingExtreme, RollingMean, safe_div
 import pandas as pd
 
 class Stochastic(Indicator):
@@ -6,10 +8,37 @@ class Stochastic(Indicator):
         super().__init__(k_period=k_period, d_period=d_period)
         self.k_period = k_period
         self.d_period = d_period
+        self.reset()
 
     def calculate(self, df):
+        return pd.DataFrame(self._lines(df))
+
+    def calculate_into(self, df, out=None, workspace=None):
+        # out: dict {'%K', '%D'} các mảng cấp sẵn (thiếu đường nào thì cấp phát đường đó)
+        out = out or {}
+        high, low, close = (kernels.as_array(df[col]) for col in ('High', 'Low', 'Close'))
+        return kernels.stochastic(
+            high, low, close, self.k_period, self.d_period, k_out=out.get('%K'), d_out=out.get('%D'), workspace=workspace,
+        )
+
+    def calculate_panel(self, panel):
+        # Trả về dict {'%K', '%D'}, mỗi phần tử là DataFrame (thời gian × symbol)
+        return panel.apply(self._lines)
+
+    def _lines(self, df):
         low_min = df['Low'].rolling(window=self.k_period).min()
         high_max = df['High'].rolling(window=self.k_period).max()
         k = 100 * (df['Close'] - low_min) / (high_max - low_min)
         d = k.rolling(window=self.d_period).mean()
-        return pd.DataFrame({'%K': k, '%D': d}) 
\ No newline at end of file
+        return {'%K': k, '%D': d}
+
+    def reset(self):
+        self._low_min = RollingExtreme(self.k_period, mode='min')
+        self._high_max = RollingExtreme(self.k_period, mode='max')
+        self._d = RollingMean(self.d_period)
+
+    def update(self, bar):
+        low_min = self._low_min.update(bar['Low'])
+        high_max = self._high_max.update(bar['High'])
+        k = safe_div(100 * (float(bar['Close']) - low_min), high_max - low_min)
+        return {'%K': k, '%D': self._d.update(k)}
@@ -1,6 +1,26 @@
+import numpy as np
+
+
 class Strategy:
     def __init__(self, **params):
         self.params = params
 
     def generate_signals(self, df):
-        raise NotImplementedError 
\ No newline at end of file
+        raise NotImplementedError
+
+    def generate_signals_batch(self, df, param_sets):
+        # Sinh ma trận tín hiệu (số nến × số bộ tham số); params của strategy là giá trị mặc định.
+        # Bản mặc định gọi generate_signals cho từng bộ, strategy con nên override bằng phép tính mảng.
+        columns = [
+            type(self)(**{**self.params, **params}).generate_signals(df.copy())['signal'].to_numpy()
+            for params in param_sets
+        ]
+        return np.column_stack(columns) if columns else np.zeros((len(df), 0))
+
+    def on_bar(self, bar):
+        # Sinh tín hiệu cho 1 nến mới (streaming), phải khớp với generate_signals trên toàn bộ lịch sử
+        raise NotImplementedError
+
+    def reset(self):
+        # Xóa trạng thái streaming của on_bar()
+        pass
@@ -1,17 +1,21 @@
+import numpy as np
 import pandas as pd
+from .base import Strategy
 from src.indicators.sma import SMA
 from src.indicators.macd import MACD
+from src.indicators.cache import default_cache
+from src.indicators.pipeline import IndicatorPipeline
 
-class ComboStrategy:
-    def __init__(self):
-        pass
+class ComboStrategy(Strategy):
+    def __init__(self, **params):
+        super().__init__(**params)
+        self.reset()
 
     def generate_signals(self, df):
-        # Tính MA20
-        ma20 = SMA(period=20).calculate(df)
-        # Tính MACD hist (5,25,5)
-        macd_df = MACD(fast=5, slow=25, signal=5).calculate(df)
-        hist = macd_df['hist']
+        # Tính MA (mặc định MA20, tham số ma_period) và MACD hist (mặc định 5,25,5, tham số macd_fast/macd_slow/macd_signal)
+        indicators = self.make_pipeline().run(df, cache=default_cache)
+        ma20 = indicators['ma']
+        hist = indicators['macd_hist']
         # Điều kiện mua
         buy = (df['close'] > df['open']) & (df['close'] > ma20) & (hist > 0)
         # Điều kiện bán
@@ -25,4 +29,64 @@ class ComboStrategy:
         filtered_signal = signal.copy()
         filtered_signal[(signal == 0) | (signal == prev_signal)] = 0
         df['signal'] = filtered_signal
-        return df 
\ No newline at end of file
+        return df
+
+    def generate_signals_batch(self, df, param_sets):
+        # MA và MACD của mọi bộ tham số được tính chung (mỗi chu kỳ chỉ 1 lần), điều kiện mua/bán tính trên ma trận
+        param_sets = [{**self.params, **params} for params in param_sets]
+        ma = SMA.calculate_many(df, [params.get('ma_period', 20) for params in param_sets])
+        hist = MACD.calculate_many(df, [
+            (params.get('macd_fast', 5), params.get('macd_slow', 25), params.get('macd_signal', 5))
+            for params in param_sets
+        ])['hist']
+        close = df['close'].to_numpy(dtype=float)[:, None]
+        open_ = df['open'].to_numpy(dtype=float)[:, None]
+        with np.errstate(invalid='ignore'):
+            buy = (close > open_) & (close > ma) & (hist > 0)
+            sell = (close < open_) & (close < ma) & (hist < 0)
+        signal = np.where(buy, 1, np.where(sell, -1, 0))
+        # Lọc chỉ giữ điểm đảo chiều (không để chuỗi tín hiệu liên tiếp)
+        prev_signal = np.zeros_like(signal)
+        prev_signal[1:] = signal[:-1]
+        return np.where(signal == prev_signal, 0, signal)
+
+    def make_pipeline(self):
+        # Pipeline indicator của strategy: MA và các đường MACD, EMA dùng chung giữa macd/signal/hist
+        fast = self.params.get('macd_fast', 5)
+        slow = self.params.get('macd_slow', 25)
+        signal = self.params.get('macd_signal', 5)
+        return IndicatorPipeline({
+            'ma': ('sma', self.params.get('ma_period', 20)),
+            'macd': ('macd', fast, slow),
+            'macd_signal': ('macd_signal', fast, slow, signal),
+            'macd_hist': ('macd_hist', fast, slow, signal),
+        })
+
+    def _make_sma(self):
+        return SMA(period=self.params.get('ma_period', 20))
+
+    def _make_macd(self):
+        return MACD(
+            fast=self.params.get('macd_fast', 5),
+            slow=self.params.get('macd_slow', 25),
+            signal=self.params.get('macd_signal', 5),
+        )
+
+    def reset(self):
+        self._sma = self._make_sma()
+        self._macd = self._make_macd()
+        self._prev_signal = 0
+
+    def on_bar(self, bar):
+        ma20 = self._sma.update(bar)
+        hist = self._macd.update(bar)['hist']
+        close, open_ = bar['close'], bar['open']
+        signal = 0
+        if close > open_ and close > ma20 and hist > 0:
+            signal = 1
+        elif close < open_ and close < ma20 and hist < 0:
+            signal = -1
+        # Lọc chỉ giữ điểm đảo chiều (không để chuỗi tín hiệu liên tiếp)
+        filtered = 0 if signal == self._prev_signal else signal
+        self._prev_signal = signal
+        return filtered
@@ -1,11 +1,43 @@
 
+import numpy as np
 from .base import Strategy
 from src.indicators.sma import SMA
+from src.indicators.cache import cached_calculate
 
 class MACrossStrategy(Strategy):
+    def __init__(self, **params):
+        super().__init__(**params)
+        self.reset()
+
     def generate_signals(self, df):
-        fast_ma = SMA(period=self.params.get('fast', 10)).calculate(df)
-        slow_ma = SMA(period=self.params.get('slow', 20)).calculate(df)
+        fast_ma = cached_calculate(SMA(period=self.params.get('fast', 10)), df)
+        slow_ma = cached_calculate(SMA(period=self.params.get('slow', 20)), df)
         signal = (fast_ma > slow_ma).astype(int).diff().fillna(0)
         df['signal'] = signal
-        return df 
\ No newline at end of file
+        return df
+
+    def generate_signals_batch(self, df, param_sets):
+        # SMA cho mọi chu kỳ fast/slow được tính chung 1 lần, tín hiệu của mọi bộ tham số tính trên ma trận
+        param_sets = [{**self.params, **params} for params in param_sets]
+        fast_periods = [params.get('fast', 10) for params in param_sets]
+        slow_periods = [params.get('slow', 20) for params in param_sets]
+        periods = sorted(set(fast_periods) | set(slow_periods))
+        ma = dict(zip(periods, SMA.calculate_many(df, periods).T))
+        state = np.empty((len(df), len(param_sets)), dtype=np.int8)
+        with np.errstate(invalid='ignore'):
+            for j, (fast, slow) in enumerate(zip(fast_periods, slow_periods)):
+                np.greater(ma[fast], ma[slow], out=state[:, j], casting='unsafe')
+        signal = np.zeros_like(state)
+        signal[1:] = state[1:] - state[:-1]
+        return signal
+
+    def reset(self):
+        self._fast_sma = SMA(period=self.params.get('fast', 10))
+        self._slow_sma = SMA(period=self.params.get('slow', 20))
+        self._prev_state = None
+
+    def on_bar(self, bar):
+        state = int(self._fast_sma.update(bar) > self._slow_sma.update(bar))
+        signal = 0 if self._prev_state is None else state - self._prev_state
+        self._prev_state = state
+        return signal
@@ -0,0 +1,26 @@
+import numpy as np
+from .base import Strategy
+
+
+class TrendFilterStrategy(Strategy):
+    # Lọc tín hiệu của strategy gốc (params strategy) theo xu hướng timeframe cao hơn (params view: MultiTimeframeView):
+    # chỉ giữ tín hiệu mua khi Close timeframe cao > MA (trend_period) của nó, tín hiệu bán khi Close < MA.
+    # Giá trị timeframe cao lấy từ nến đã đóng (không nhìn trước), được view cache nên sweep/backtest lặp lại
+    # trên cùng dữ liệu gần như không tốn thêm.
+    # Vd: TrendFilterStrategy(strategy=ComboStrategy(), view=view, timeframe='h1', trend_period=50) trên dữ liệu m5
+    def __init__(self, **params):
+        super().__init__(**params)
+        self.strategy = params['strategy']
+        self.view = params['view']
+
+    def generate_signals(self, df):
+        df = self.strategy.generate_signals(df)
+        timeframe = self.params.get('timeframe', 'h1')
+        period = self.params.get('trend_period', 50)
+        close = self.view.aligned(df, timeframe, ('col', 'close')).to_numpy()
+        ma = self.view.aligned(df, timeframe, ('sma', period)).to_numpy()
+        signal = df['signal'].to_numpy()
+        with np.errstate(invalid='ignore'):
+            keep = ((signal > 0) & (close > ma)) | ((signal < 0) & (close < ma))
+        df['signal'] = np.where(keep, signal, 0)
+        return df
@@ -0,0 +1,286 @@
+import ast
+
+import numpy as np
+import pandas as pd
+
+from .base import Strategy
+from src.indicators.cache import default_cache
+from src.indicators.pipeline import NODES, IndicatorPipeline
+
+# Ngôn ngữ rule: biểu thức Python rút gọn trên cột giá và indicator, vd
+#     "close > open and close > sma(20) and macd_hist(5, 25, 5) > 0"
+# - Cột giá: open, high, low, close, volume; số; + - * /; so sánh (> >= < <= == !=, cho phép a < b < c); and/or/not
+# - Indicator: tên node của IndicatorPipeline với tham số là số, vd sma(20), ema(12), rsi(14), macd_hist(12, 26, 9),
+#   bb_upper(20, 2), atr(14), cci(20), stoch_k(14), stoch_d(14, 3), highest(20), lowest(20), obv()
+# - prev(x, k=1): giá trị k nến trước; cross_above(a, b) / cross_below(a, b): a cắt lên/xuống b tại nến hiện tại
+# Mỗi biểu thức con được chuẩn hóa thành 1 key (tuple), vd "sma(20) < close" và "close > sma(20)" cùng key,
+# and/or/+/* không phụ thuộc thứ tự vế. Nhiều rule biên dịch chung thành 1 kế hoạch: mỗi key chỉ tính 1 lần
+# (so sánh, indicator và các node trung gian của indicator đều dùng chung giữa các rule).
+
+PRICE_FIELDS = ('open', 'high', 'low', 'close', 'volume')
+BOOL_OPS = ('and', 'or', 'not', '>', '>=', '==', '!=', 'bool')
+_COMPARE = {ast.Gt: '>', ast.GtE: '>=', ast.Eq: '==', ast.NotEq: '!='}
+# a < b được đổi thành b > a để dùng chung key
+_SWAPPED = {ast.Lt: '>', ast.LtE: '>='}
+_BINARY = {ast.Add: '+', ast.Sub: '-', ast.Mult: '*', ast.Div: '/'}
+_COMMUTATIVE = ('and', 'or', '+', '*', '==', '!=')
+# Node nội bộ của pipeline, không gọi trực tiếp trong rule
+_HIDDEN_NODES = ('col', 'delta', 'tp', 'tr')
+# Vị trí tham số indicator là số thực (số lần độ lệch chuẩn); còn lại là chu kỳ/số nến, phải là số nguyên >= 1
+_REAL_PARAMS = {'bb_upper': (1,), 'bb_lower': (1,)}
+
+
+def _sorted_args(op, args):
+    if op in _COMMUTATIVE:
+        args = sorted(args, key=repr)
+    return (op,) + tuple(args)
+
+
+def _flatten(op, args):
+    # and(a, and(b, c)) -> and(a, b, c), bỏ vế trùng
+    out = []
+    for arg in args:
+        for item in (arg[1:] if arg[0] == op else (arg,)):
+            if item not in out:
+                out.append(item)
+    return _sorted_args(op, out) if len(out) > 1 else out[0]
+
+
+def _shift(key, periods=1):
+    return ('shift', periods, key)
+
+
+def parse_rule(expression):
+    # Biểu thức rule -> key chuẩn hóa (tuple lồng nhau); báo ValueError nếu dùng cú pháp/hàm không hỗ trợ
+    try:
+        tree = ast.parse(expression.strip(), mode='eval')
+    except SyntaxError as e:
+        raise ValueError(f"[ERROR] Rule '{expression}' sai cú pháp: {e.msg}") from None
+    return _to_key(tree.body, expression)
+
+
+def _to_key(node, expression):
+    if isinstance(node, ast.BoolOp):
+        op = 'and' if isinstance(node.op, ast.And) else 'or'
+        return _flatten(op, [_to_key(v, expression) for v in node.values])
+    if isinstance(node, ast.Compare):
+        parts = []
+        left = _to_key(node.left, expression)
+        for op, comparator in zip(node.ops, node.comparators):
+            right = _to_key(comparator, expression)
+            if type(op) in _COMPARE:
+                parts.append(_sorted_args(_COMPARE[type(op)], [left, right]))
+            elif type(op) in _SWAPPED:
+                parts.append((_SWAPPED[type(op)], right, left))
+            else:
+                raise ValueError(f"[ERROR] Rule '{expression}': không hỗ trợ phép so sánh {type(op).__name__}")
+            left = right
+        return _flatten('and', parts)
+    if isinstance(node, ast.UnaryOp):
+        operand = _to_key(node.operand, expression)
+        if isinstance(node.op, ast.Not):
+            return operand[1] if operand[0] == 'not' else ('not', operand)
+        if isinstance(node.op, ast.USub):
+            return ('const', -operand[1]) if operand[0] == 'const' else ('neg', operand)
+        if isinstance(node.op, ast.UAdd):
+            return operand
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY:
+        return _sorted_args(_BINARY[type(node.op)], [_to_key(node.left, expression), _to_key(node.right, expression)])
+    if isinstance(node, ast.Constant) and isinstance(node.value, bool):
+        return ('bool', node.value)
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+        return ('const', float(node.value))
+    if isinstance(node, ast.Name):
+        name = node.id.lower()
+        if name in PRICE_FIELDS:
+            return ('col', name)
+        raise ValueError(f"[ERROR] Rule '{expression}': không có cột '{node.id}' (dùng {', '.join(PRICE_FIELDS)})")
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+        return _call_key(node.func.id.lower(), node.args, expression)
+    raise ValueError(f"[ERROR] Rule '{expression}': không hỗ trợ '{ast.unparse(node)}'")
+
+
+def _call_key(name, args, expression):
+    if name == 'prev':
+        periods = _int_arg(args[1], expression) if len(args) == 2 else 1
+        if len(args) not in (1, 2) or periods < 1:
+            raise ValueError(f"[ERROR] Rule '{expression}': prev(x, k) cần k >= 1")
+        return _shift(_to_key(args[0], expression), periods)
+    if name in ('cross_above', 'cross_below'):
+        if len(args) != 2:
+            raise ValueError(f"[ERROR] Rule '{expression}': {name}(a, b) cần đúng 2 tham số")
+        a, b = (_to_key(arg, expression) for arg in args)
+        if name == 'cross_below':
+            a, b = b, a
+        # a > b ở nến hiện tại và a <= b ở nến trước (b >= a)
+        return _flatten('and', [('>', a, b), ('>=', _shift(b), _shift(a))])
+    if name in NODES and name not in _HIDDEN_NODES:
+        real = _REAL_PARAMS.get(name, ())
+        params = tuple(_number_arg(arg, expression) if i in real else _period_arg(arg, expression)
+                       for i, arg in enumerate(args))
+        try:
+            NODES[name](*params)
+        except TypeError:
+            raise ValueError(f"[ERROR] Rule '{expression}': sai số tham số của {name}{params}") from None
+        return ('ind', (name,) + params)
+    raise ValueError(f"[ERROR] Rule '{expression}': không có hàm/indicator '{name}'")
+
+
+def _number_arg(node, expression):
+    # Số thực nguyên (20.0) đổi về int để sma(20) và sma(20.0) cùng key
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+        return int(node.value) if float(node.value).is_integer() else node.value
+    raise ValueError(f"[ERROR] Rule '{expression}': tham số indicator phải là số, nhận '{ast.unparse(node)}'")
+
+
+def _int_arg(node, expression):
+    value = _number_arg(node, expression)
+    if int(value) != value:
+        raise ValueError(f"[ERROR] Rule '{expression}': số nến phải là số nguyên, nhận {value}")
+    return int(value)
+
+
+def _period_arg(node, expression):
+    value = _number_arg(node, expression)
+    if int(value) != value or value < 1:
+        raise ValueError(f"[ERROR] Rule '{expression}': chu kỳ indicator phải là số nguyên >= 1, nhận {value}")
+    return value
+
+
+def _is_bool(key):
+    # Key cho giá trị đúng/sai: phép so sánh/logic, hoặc prev(...) của 1 key đúng/sai
+    if key[0] == 'shift':
+        return _is_bool(key[2])
+    return key[0] in BOOL_OPS
+
+
+def _pipeline_node(key):
+    return key if key[0] == 'col' else key[1]
+
+
+def _children(key):
+    op = key[0]
+    if op in ('col', 'const', 'bool', 'ind'):
+        return ()
+    if op == 'shift':
+        return (key[2],)
+    return key[1:]
+
+
+class RuleSet:
+    # Biên dịch nhiều rule {tên: biểu thức} thành 1 kế hoạch tính vector hóa dùng chung biểu thức con.
+    # evaluate(df) trả về DataFrame bool (số nến × số rule); df là DataFrame hoặc OHLCVFrame.
+    def __init__(self, rules):
+        self.rules = dict(rules)
+        self.keys = {}
+        for name, expression in self.rules.items():
+            key = parse_rule(expression)
+            if not _is_bool(key):
+                raise ValueError(f"[ERROR] Rule '{name}' không phải điều kiện đúng/sai: {expression}")
+            self.keys[name] = key
+        # Thứ tự tính (topo), mỗi key chỉ 1 lần; references đếm số lần biểu thức con được dùng trước khi gộp
+        self.plan = []
+        self.references = 0
+        seen = set()
+        for key in self.keys.values():
+            self._visit(key, seen)
+        # Cột giá và indicator lấy từ 1 lần chạy IndicatorPipeline (node trung gian của indicator cũng dùng chung)
+        self.pipeline = IndicatorPipeline({repr(key): _pipeline_node(key) for key in self.plan if key[0] in ('col', 'ind')})
+
+    def _visit(self, key, seen):
+        self.references += 1
+        if key in seen:
+            return
+        for child in _children(key):
+            self._visit(child, seen)
+        seen.add(key)
+        self.plan.append(key)
+
+    def stats(self):
+        # Số biểu thức con trong các rule và số node thực sự phải tính sau khi gộp
+        return {'rules': len(self.rules), 'references': self.references, 'nodes': len(self.plan)}
+
+    def evaluate(self, df, cache=default_cache):
+        values = {}
+        if self.pipeline.outputs:
+            inputs = self.pipeline.run(df, cache=cache)
+            for key in self.plan:
+                if key[0] in ('col', 'ind'):
+                    values[key] = inputs[repr(key)].to_numpy(dtype=float)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for key in self.plan:
+                if key not in values:
+                    values[key] = self._compute(key, values, df)
+        return pd.DataFrame({name: values[key] for name, key in self.keys.items()}, index=df.index)
+
+    def _compute(self, key, values, df):
+        op = key[0]
+        if op in ('const', 'bool'):
+            return np.full(len(df), key[1])
+        if op == 'shift':
+            periods, source = key[1], values[key[2]]
+            out = np.full(len(source), False if source.dtype == bool else np.nan, dtype=source.dtype)
+            out[periods:] = source[:len(source) - periods]
+            return out
+        args = [values[child] for child in key[1:]]
+        if op == 'and':
+            return np.logical_and.reduce(args)
+        if op == 'or':
+            return np.logical_or.reduce(args)
+        if op == 'not':
+            return np.logical_not(args[0])
+        if op == 'neg':
+            return np.negative(args[0])
+        return _OPS[op](*args)
+
+
+_OPS = {
+    '>': np.greater,
+    '>=': np.greater_equal,
+    '==': np.equal,
+    '!=': np.not_equal,
+    '+': np.add,
+    '-': np.subtract,
+    '*': np.multiply,
+    '/': np.divide,
+}
+
+
+class RuleStrategy(Strategy):
+    # Strategy từ rule: params buy/sell là biểu thức rule (xem đầu file).
+    # Tín hiệu như ComboStrategy: 1 khi buy đúng, -1 khi sell đúng (sell ưu tiên nếu cả 2), chỉ giữ điểm đảo chiều.
+    def __init__(self, **params):
+        super().__init__(**params)
+        self.rule_set = RuleSet({'buy': params.get('buy', 'False'), 'sell': params.get('sell', 'False')})
+
+    @classmethod
+    def from_row(cls, row):
+        # Dòng của bảng table_trading_rules (SQLFetcher.fetch_trading_rules)
+        return cls(name=row['Name'], buy=row['BuyRule'], sell=row['SellRule'])
+
+    def generate_signals(self, df):
+        masks = self.rule_set.evaluate(df)
+        signal = np.where(masks['sell'].to_numpy(), -1, np.where(masks['buy'].to_numpy(), 1, 0))
+        # Lọc chỉ giữ điểm đảo chiều (không để chuỗi tín hiệu liên tiếp)
+        prev_signal = np.zeros_like(signal)
+        prev_signal[1:] = signal[:-1]
+        df['signal'] = pd.Series(np.where(signal == prev_signal, 0, signal), index=df.index)
+        return df
+
+
+def library_rules(rows):
+    # Dòng của bảng table_trading_rules (DataFrame hoặc list dict) -> {'<Name>.buy': BuyRule, '<Name>.sell': SellRule}
+    if hasattr(rows, 'to_dict'):
+        rows = rows.to_dict('records')
+    rules = {}
+    for row in rows:
+        rules[f"{row['Name']}.buy"] = row['BuyRule']
+        rules[f"{row['Name']}.sell"] = row['SellRule']
+    return rules
+
+
+def evaluate_library(rules, frames, cache=default_cache):
+    # Tính mọi rule của thư viện trên nhiều symbol: rules {tên: biểu thức}, frames {symbol: DataFrame/OHLCVFrame}.
+    # Kế hoạch biên dịch 1 lần, mỗi symbol chạy 1 lần. Trả về {symbol: DataFrame bool (số nến × số rule)}
+    rule_set = rules if isinstance(rules, RuleSet) else RuleSet(rules)
+    return {symbol: rule_set.evaluate(df, cache=cache) for symbol, df in frames.items()}
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# Chế độ nạp dữ liệu gọn bộ nhớ (compact) cho các hàm fetch_ohlcv:
+# - Giá OHLC float32 thay cho float64: 4 byte/giá, ~7 chữ số có nghĩa. Với giá < 1e4 và 5 chữ số thập phân
+#   (EURUSD 1.08345, XAUUSD 2345.67) sai số làm tròn < 1e-3 pip; giá cỡ 1e5 (BTCUSD 65432.12) chỉ còn bước ~0.008
+#   nên chữ số thập phân thứ 2 có thể lệch. Indicator rolling/ewm của pandas vẫn tính và trả về float64,
+#   nhưng kết quả có thể lệch cỡ 1e-7 tương đối so với dữ liệu float64 - không dùng compact khi cần khớp từng bit.
+# - Cột số nguyên (volume, các cột Id) thu về kiểu nguyên nhỏ nhất chứa đủ giá trị.
+# - Cột chuỗi lặp lại nhiều (provider, exchange, symbol...) đổi sang category.
+# - Chỉ giữ các cột được yêu cầu; dữ liệu được đọc theo từng khối để đỉnh bộ nhớ không gồm toàn bộ bảng float64.
+PRICE_COLUMNS = ('open', 'high', 'low', 'close')
+COMPACT_CHUNKSIZE = 200000
+CATEGORY_RATIO = 0.5  # cột chuỗi có số giá trị khác nhau <= 50% số dòng thì đổi sang category
+
+
+def memory_footprint(df):
+    # Số byte DataFrame chiếm (gồm cả chuỗi trong cột object); OHLCVFrame: tổng byte các mảng cột
+    if not hasattr(df, 'memory_usage'):
+        return int(df.nbytes)
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def report_memory(df, label, raw_bytes=None):
+    # In dung lượng bộ nhớ của 1 lần nạp dữ liệu; raw_bytes: dung lượng trước khi nén (nếu có)
+    size = memory_footprint(df)
+    message = f"[INFO] Bộ nhớ {label}: {len(df)} dòng, {size / 2 ** 20:.2f} MB"
+    if raw_bytes:
+        message += f" (trước khi nén {raw_bytes / 2 ** 20:.2f} MB, giảm {1 - size / raw_bytes:.0%})"
+    print(message)
+    return size
+
+
+def select_columns(df, columns=None):
+    # Chỉ giữ các cột được yêu cầu (không phân biệt hoa/thường), columns=None giữ nguyên
+    if columns is None:
+        return df
+    wanted = {c.lower() for c in columns}
+    return df[[c for c in df.columns if c.lower() in wanted]]
+
+
+def compact_frame(df, columns=None):
+    # Nén 1 DataFrame: bỏ cột không yêu cầu, OHLC float32, số nguyên thu nhỏ, chuỗi lặp lại -> category
+    df = select_columns(df, columns)
+    out = {}
+    for col in df.columns:
+        series = df[col]
+        kind = series.dtype.kind
+        if col.lower() in PRICE_COLUMNS and kind in 'fiu':
+            series = series.astype(np.float32)
+        elif kind in 'iu':
+            series = pd.to_numeric(series, downcast='unsigned' if series.min() >= 0 else 'integer')
+        elif kind == 'f' and series.notna().all() and (series % 1 == 0).all():
+            # Volume/Id đọc về dạng float (driver SQL) nhưng chỉ chứa số nguyên
+            series = pd.to_numeric(series.astype(np.int64), downcast='unsigned' if series.min() >= 0 else 'integer')
+        elif kind == 'O' and len(series) and series.nunique() <= CATEGORY_RATIO * len(series):
+            series = series.astype('category')
+        out[col] = series
+    return pd.DataFrame(out, index=df.index)
+
+
+def read_sql_compact(query, conn, params=None, columns=None, rename=None, chunksize=COMPACT_CHUNKSIZE):
+    # pd.read_sql theo từng khối, mỗi khối được đổi tên cột (rename) rồi nén (compact_frame) ngay khi đọc.
+    # Trả về (DataFrame đã nén, số byte nếu nạp bình thường không nén)
+    chunks = []
+    raw_bytes = 0
+    for chunk in pd.read_sql(query, conn, params=params, chunksize=chunksize):
+        raw_bytes += memory_footprint(chunk)
+        if rename:
+            chunk = chunk.rename(columns=rename)
+        chunks.append(compact_frame(chunk, columns))
+    if not chunks:
+        return pd.DataFrame(columns=list(columns or [])), 0
+    return _concat(chunks), raw_bytes
+
+
+def _concat(chunks):
+    # Nối các khối đã nén: cột category được hợp danh mục (pd.concat sẽ trả về object nếu danh mục khác nhau),
+    # cột số nguyên lấy kiểu rộng nhất giữa các khối
+    out = {}
+    for col in chunks[0].columns:
+        parts = [chunk[col] for chunk in chunks]
+        if any(isinstance(part.dtype, pd.CategoricalDtype) for part in parts):
+            # Khối có ít giá trị lặp lại có thể chưa được đổi sang category
+            parts = [part.astype('category') for part in parts]
+            out[col] = pd.Series(union_categoricals(parts), name=col)
+        else:
+            dtype = np.result_type(*(part.dtype for part in parts))
+            out[col] = pd.Series(np.concatenate([part.to_numpy(dtype=dtype) for part in parts]), name=col)
+    return pd.DataFrame(out)
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+
+from src.indicators.cache import default_cache, fingerprint
+from src.indicators.pipeline import IndicatorPipeline
+from .ohlcv_frame import OHLCVFrame, _epoch_ns
+from .timeframes import TIMEFRAME_MINUTES
+
+# Dữ liệu nhiều timeframe cho strategy: nến timeframe cao (h1, h4, D...) nạp 1 lần, ghép vào nến timeframe gốc (m5...)
+# bằng as-of join theo thời điểm đóng nến, không nhìn trước tương lai:
+# - TimeStamp của nến là thời điểm mở nến (như bảng data_<tf> và MT5), nến đóng lúc TimeStamp + độ dài timeframe.
+# - Tín hiệu của nến gốc được tính lúc nến gốc đóng, nên nến gốc chỉ thấy nến timeframe cao đã đóng trước hoặc đúng
+#   lúc đó. Vd nến m5 10:00-10:05 thấy nến h1 09:00 (đóng 10:00), chưa thấy nến h1 10:00 (đóng 11:00);
+#   nến m5 10:55-11:00 thấy nến h1 10:00.
+# - Nến gốc trước nến timeframe cao đầu tiên đã đóng nhận NaN.
+
+_PANDAS_FREQ = {'M': 'MS', 'W': 'W-MON', 'D': 'D'}
+
+
+def bar_close_times(times, timeframe):
+    # Thời điểm đóng nến (int64 ns) từ thời điểm mở nến (int64 ns)
+    times = np.asarray(times, dtype=np.int64)
+    if timeframe == 'M':
+        opened = pd.DatetimeIndex(times.view('datetime64[ns]'))
+        return (opened + pd.DateOffset(months=1)).asi8
+    if timeframe not in TIMEFRAME_MINUTES:
+        raise ValueError(f"[ERROR] Không biết độ dài timeframe '{timeframe}' (có {', '.join(TIMEFRAME_MINUTES)})")
+    return times + TIMEFRAME_MINUTES[timeframe] * 60 * 10 ** 9
+
+
+def asof_index(base_close, higher_close):
+    # Với mỗi nến gốc: vị trí nến timeframe cao cuối cùng đã đóng (higher_close <= base_close), -1 nếu chưa có.
+    # higher_close phải tăng dần
+    return np.searchsorted(higher_close, base_close, side='right') - 1
+
+
+def take_aligned(values, index):
+    # values[index], vị trí -1 (chưa có nến đã đóng) nhận NaN
+    values = np.asarray(values, dtype=float)
+    out = values[np.maximum(index, 0)] if len(values) else np.full(len(index), np.nan)
+    out[index < 0] = np.nan
+    return out
+
+
+def resample_ohlcv(df, timeframe):
+    # Gộp nến timeframe gốc thành timeframe cao hơn (nhãn = thời điểm mở nến), dùng khi chưa có bảng data_<tf>
+    df = df.to_frame() if isinstance(df, OHLCVFrame) else df
+    freq = _PANDAS_FREQ.get(timeframe, f"{TIMEFRAME_MINUTES.get(timeframe, 0)}min")
+    rules = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}
+    out = df.set_index('time').resample(freq, label='left', closed='left').agg(
+        {col: rule for col, rule in rules.items() if col in df.columns}
+    )
+    return out.dropna(subset=['close']).reset_index()
+
+
+def _open_times(df):
+    if isinstance(df, OHLCVFrame):
+        return df.times
+    if 'time' in df.columns:
+        return _epoch_ns(df['time'])
+    return _epoch_ns(pd.Series(df.index))
+
+
+class MultiTimeframeView:
+    # frames = {timeframe: DataFrame/OHLCVFrame nến timeframe cao}, base_timeframe: timeframe của dữ liệu strategy.
+    # aligned(df, timeframe, node) trả về Series (cùng index với df) giá trị của node pipeline tính trên nến timeframe
+    # cao, ghép as-of theo nến đã đóng. Indicator trên timeframe cao tính 1 lần cho toàn bộ dữ liệu, cột đã ghép được
+    # cache theo (timeframe, node, mốc thời gian của df) nên backtest/sweep chạy lại trên cùng dữ liệu gần như
+    # không tốn thêm; df là 1 đoạn (walk-forward) thì chỉ tốn 1 lần searchsorted.
+    def __init__(self, frames, base_timeframe, cache=default_cache):
+        self.base_timeframe = base_timeframe
+        self.cache = cache
+        self.frames = {}
+        self._close = {}
+        self._fingerprints = {}
+        for timeframe, frame in frames.items():
+            frame = frame if isinstance(frame, OHLCVFrame) else OHLCVFrame.from_frame(frame)
+            close = bar_close_times(frame.times, timeframe)
+            if len(close) > 1 and np.any(np.diff(close) <= 0):
+                raise ValueError(f"[ERROR] Nến timeframe {timeframe} phải tăng dần theo thời gian, không trùng lặp")
+            self.frames[timeframe] = frame
+            self._close[timeframe] = close
+            self._fingerprints[timeframe] = fingerprint(frame, columns=('time',) + tuple(frame.columns))
+
+    def __contains__(self, timeframe):
+        return timeframe in self.frames
+
+    def index(self, df, timeframe):
+        # Vị trí nến timeframe cao đã đóng cho từng nến của df (-1 nếu chưa có)
+        if timeframe not in self.frames:
+            raise KeyError(f"[ERROR] Chưa nạp timeframe '{timeframe}' vào MultiTimeframeView")
+        base_close = bar_close_times(_open_times(df), self.base_timeframe)
+        return asof_index(base_close, self._close[timeframe])
+
+    def higher(self, timeframe, node):
+        # Giá trị node (vd ('col', 'close'), ('sma', 50), ('macd_hist', 12, 26, 9)) trên nến timeframe cao
+        pipeline = IndicatorPipeline({'value': node})
+        return pipeline.run(self.frames[timeframe], cache=self.cache)['value'].to_numpy(dtype=float)
+
+    def aligned(self, df, timeframe, node):
+        node = tuple(node)
+        if self.cache is None:
+            return pd.Series(take_aligned(self.higher(timeframe, node), self.index(df, timeframe)), index=df.index)
+        key = ('mtf', timeframe, node, self._fingerprints[timeframe], self.base_timeframe, fingerprint(df, ('time',)))
+        values = self.cache.lookup(key, lambda: take_aligned(self.higher(timeframe, node), self.index(df, timeframe)))
+        return pd.Series(values, index=df.index)
+
+    def add_columns(self, df, columns):
+        # Thêm các cột đã ghép vào df: columns = {tên cột: (timeframe, node)}, vd {'h1_sma50': ('h1', ('sma', 50))}
+        for name, (timeframe, node) in columns.items():
+            df[name] = self.aligned(df, timeframe, node)
+        return df
@@ -0,0 +1,199 @@
+import numpy as np
+import pandas as pd
+
+# Tên cột chuẩn (chữ thường) của OHLCVFrame và các tên khác quy về tên chuẩn.
+# Tra cột không phân biệt hoa/thường: frame['Close'], frame['CLOSE'] đều là cột 'close'
+PRICE_FIELDS = ('open', 'high', 'low', 'close', 'volume')
+ALIASES = {'timestamp': 'time', 'datetime': 'time', 'tick_volume': 'volume'}
+
+
+def canonical_name(name):
+    name = str(name).lower()
+    return ALIASES.get(name, name)
+
+
+def _readonly(values):
+    # View chỉ đọc: frame và các bản copy()/slice dùng chung mảng nên không cho ghi đè tại chỗ
+    values = values.view()
+    values.flags.writeable = False
+    return values
+
+
+class _Bar(dict):
+    # Nến dạng dict của OHLCVFrame.iter_bars(): key chuẩn chữ thường, bar['Close'] vẫn đọc được cột 'close'
+    def __missing__(self, key):
+        name = canonical_name(key)
+        if name != key and name in self:
+            return self[name]
+        raise KeyError(key)
+
+
+class OHLCVFrame:
+    # Khung dữ liệu nến gọn thay cho DataFrame trên đường backtest: mỗi cột là mảng numpy 1 chiều liên tục
+    # (open/high/low/close/volume kiểu float64, hoặc giữ kiểu gọn float32/số nguyên của dữ liệu nạp compact;
+    # time là int64 nanosecond từ epoch UTC), tên cột chuẩn chữ thường.
+    # frame['close'] trả về Series bọc đúng mảng đó (không copy) nên indicator/strategy/metrics dùng như DataFrame;
+    # frame[a:b], slice_time() là view không copy; copy() chỉ copy danh sách cột (cột mới gán vào không ảnh hưởng
+    # frame gốc, mảng dùng chung là chỉ đọc). Chỉ đổi sang DataFrame (to_frame) ở bước xuất báo cáo/file/chart.
+    def __init__(self, columns, index=None):
+        self._columns = {}
+        n = None
+        for name, values in columns.items():
+            values = np.asarray(values)
+            if values.ndim != 1:
+                raise ValueError(f"[ERROR] Cột '{name}' phải là mảng 1 chiều, nhận shape {values.shape}")
+            if n is not None and len(values) != n:
+                raise ValueError(f"[ERROR] Cột '{name}' có {len(values)} dòng, cần {n}")
+            n = len(values)
+            self._columns[canonical_name(name)] = _readonly(values)
+        self._len = n or 0
+        self.index = pd.RangeIndex(self._len) if index is None else pd.Index(index)
+        if len(self.index) != self._len:
+            raise ValueError(f"[ERROR] Index có {len(self.index)} dòng, cần {self._len}")
+
+    @classmethod
+    def from_frame(cls, df, time_col='time'):
+        # DataFrame -> OHLCVFrame: chuẩn hóa tên cột, giá/volume về float64 liên tục, time về int64 ns.
+        # Cột đã nạp compact (giá float32, volume số nguyên, xem src/utils/memory.py) giữ nguyên kiểu, không nở lại
+        # float64; indicator/metrics tự đổi sang float64 khi tính. Cột trùng tên sau khi chuẩn hóa (vd close và Close)
+        # chỉ giữ cột đầu tiên
+        columns = {}
+        for col in df.columns:
+            name = canonical_name(col)
+            if name in columns:
+                continue
+            series = df[col]
+            if name == canonical_name(time_col):
+                columns[name] = _epoch_ns(series)
+            elif name in PRICE_FIELDS:
+                columns[name] = _price_values(series)
+            else:
+                columns[name] = np.ascontiguousarray(series.to_numpy())
+        return cls(columns, index=df.index)
+
+    @classmethod
+    def from_arrays(cls, time=None, time_unit=None, index=None, **columns):
+        # Tạo trực tiếp từ mảng (vd kết quả MT5 copy_rates: time_unit='s'), không qua DataFrame
+        data = {}
+        if time is not None:
+            data['time'] = _epoch_ns(pd.Series(time), unit=time_unit)
+        for name, values in columns.items():
+            dtype = np.float64 if canonical_name(name) in PRICE_FIELDS else None
+            data[name] = np.ascontiguousarray(values, dtype=dtype)
+        return cls(data, index=index)
+
+    @property
+    def columns(self):
+        return pd.Index(list(self._columns))
+
+    @property
+    def times(self):
+        # Mốc thời gian dạng int64 nanosecond từ epoch (không copy)
+        return self._columns['time']
+
+    @property
+    def nbytes(self):
+        return sum(values.nbytes for values in self._columns.values())
+
+    def __len__(self):
+        return self._len
+
+    def __contains__(self, name):
+        return canonical_name(name) in self._columns
+
+    def values(self, name):
+        # Mảng numpy của cột (không copy, chỉ đọc); cột time trả về datetime64[ns]
+        key = self._key(name)
+        values = self._columns[key]
+        return values.view('datetime64[ns]') if key == 'time' else values
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return pd.Series(self.values(key), index=self.index, name=self._key(key), copy=False)
+        if isinstance(key, slice):
+            return self._take(key)
+        if isinstance(key, (list, tuple)):
+            names = [self._key(name) for name in key]
+            return OHLCVFrame({name: self._columns[name] for name in names}, index=self.index)
+        mask = np.asarray(key)
+        if mask.dtype == bool:
+            return self._take(mask)
+        raise KeyError(key)
+
+    def __setitem__(self, name, values):
+        # Thêm/thay cột (signal, position, equity...): chỉ thay mảng trong frame này, không ghi vào mảng dùng chung
+        if isinstance(values, (pd.Series, pd.Index)):
+            values = values.to_numpy()
+        elif np.ndim(values) == 0:
+            values = np.full(self._len, values)
+        values = np.asarray(values)
+        if len(values) != self._len:
+            raise ValueError(f"[ERROR] Cột '{name}' có {len(values)} dòng, cần {self._len}")
+        key = canonical_name(name)
+        if key == 'time':
+            values = _epoch_ns(pd.Series(values))
+        elif key in PRICE_FIELDS:
+            values = np.ascontiguousarray(values, dtype=np.float64)
+        self._columns[key] = _readonly(values)
+
+    def __repr__(self):
+        return f"OHLCVFrame({self._len} nến, cột={list(self._columns)})"
+
+    def _key(self, name):
+        key = canonical_name(name)
+        if key not in self._columns:
+            raise KeyError(name)
+        return key
+
+    def _take(self, rows):
+        # Slice liên tục -> view không copy; mask bool -> bản sao các dòng được chọn
+        return OHLCVFrame({name: values[rows] for name, values in self._columns.items()}, index=self.index[rows])
+
+    def slice_time(self, start=None, end=None):
+        # View các nến có start <= time <= end (cần time tăng dần), tìm bằng searchsorted trên int64
+        times = self.times
+        lo = 0 if start is None else int(np.searchsorted(times, _epoch_ns(pd.Series([start]))[0], side='left'))
+        hi = len(times) if end is None else int(np.searchsorted(times, _epoch_ns(pd.Series([end]))[0], side='right'))
+        return self._take(slice(lo, hi))
+
+    def copy(self, deep=False):
+        # Mặc định chỉ copy danh sách cột: mảng dùng chung là chỉ đọc, gán cột mới không ảnh hưởng frame gốc
+        columns = {name: values.copy() if deep else values for name, values in self._columns.items()}
+        return OHLCVFrame(columns, index=self.index)
+
+    def iter_bars(self):
+        # Duyệt từng nến dạng dict (key chuẩn, đọc được cả bar['Close']); time là pd.Timestamp như DataFrame
+        names = list(self._columns)
+        columns = [self[name].tolist() for name in names]
+        for values in zip(*columns):
+            yield _Bar(zip(names, values))
+
+    def itertuples(self, index=False, name=None):
+        # Tương thích DataFrame.itertuples(index=False, name=None): tuple giá trị theo thứ tự columns
+        return zip(*(self[col].tolist() for col in self._columns))
+
+    def to_frame(self):
+        # Đổi sang DataFrame (bước xuất báo cáo/file/chart), time là datetime64[ns]
+        return pd.DataFrame({name: self.values(name) for name in self._columns}, index=self.index)
+
+
+def to_frame(data):
+    # DataFrame cho bước xuất báo cáo: OHLCVFrame thì đổi sang DataFrame, DataFrame thì giữ nguyên
+    return data.to_frame() if isinstance(data, OHLCVFrame) else data
+
+
+def _price_values(series):
+    # Cột giá/volume: float32 và số nguyên numpy (dữ liệu compact) giữ nguyên kiểu, kiểu khác (float64, object,
+    # Int64 có NA...) về float64
+    dtype = series.dtype
+    if isinstance(dtype, np.dtype) and (dtype == np.float32 or dtype.kind in 'iu'):
+        return np.ascontiguousarray(series.to_numpy())
+    return np.ascontiguousarray(series.to_numpy(dtype=np.float64, na_value=np.nan))
+
+
+def _epoch_ns(values, unit=None):
+    # Cột thời gian (datetime, chuỗi, Timestamp có múi giờ, số theo unit) -> int64 nanosecond từ epoch UTC
+    values = pd.to_datetime(values, unit=unit) if unit else pd.to_datetime(values)
+    if getattr(values.dt, 'tz', None) is not None:
+        values = values.dt.tz_convert('UTC').dt.tz_localize(None)
+    return np.ascontiguousarray(values.to_numpy(dtype='datetime64[ns]').view(np.int64))
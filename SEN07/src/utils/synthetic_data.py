@@ -0,0 +1,21 @@
+import numpy as np
+import pandas as pd
+
+
+def make_ohlcv(n=10000, seed=0, start='2024-01-01', freq='5min', start_price=1.1, vol=0.0005):
+    # Sinh dữ liệu OHLCV giả lập (random walk) để kiểm tra/benchmark, không cần SQL/MT5
+    rng = np.random.default_rng(seed)
+    close = start_price * np.exp(np.cumsum(rng.normal(0, vol, n)))
+    open_ = np.concatenate(([start_price], close[:-1]))[:n]
+    spread = np.abs(rng.normal(0, vol, n)) * close
+    high = np.maximum(open_, close) + spread
+    low = np.minimum(open_, close) - spread
+    volume = rng.integers(1, 1000, n)
+    return pd.DataFrame({
+        'time': pd.date_range(start, periods=n, freq=freq),
+        'open': open_,
+        'high': high,
+        'low': low,
+        'close': close,
+        'volume': volume,
+    })
@@ -0,0 +1,8 @@
+# Hằng số timeframe dùng chung cho phần nạp dữ liệu (fetchers) và backtest, không import gì để module
+# nạp dữ liệu không phải kéo theo indicator/pipeline
+
+# Độ dài timeframe (phút) như cột Minutes của table_timeframes; 'M' (tháng) tính theo lịch
+TIMEFRAME_MINUTES = {
+    'm1': 1, 'm3': 3, 'm5': 5, 'm15': 15, 'm30': 30,
+    'h1': 60, 'h4': 240, 'h8': 480, 'D': 1440, 'W': 10080, 'M': 43200,
+}
@@ -7,12 +7,32 @@ from typing import Optional, Dict, List, Union
 import logging
 from pathlib import Path
 from .config import Config
+from .indicator_pipeline import IndicatorPipeline
 
 logger = logging.getLogger(__name__)
 
 class DataProcessor:
     """Class for processing, validating and storing trading data."""
     
+    # Indicator columns added by add_technical_indicators; shared intermediates
+    # (sma_20 / bb_middle, the MACD EMAs, close diff for RSI) are computed once
+    TECHNICAL_INDICATORS = IndicatorPipeline({
+        'sma_20': ('sma', 20),
+        'sma_50': ('sma', 50),
+        'sma_200': ('sma', 200),
+        'ema_12': ('ema', 12),
+        'ema_26': ('ema', 26),
+        'macd': ('macd', 12, 26),
+        'macd_signal': ('macd_signal', 12, 26, 9),
+        'macd_histogram': ('macd_histogram', 12, 26, 9),
+        'rsi': ('rsi', 14),
+        'bb_middle': ('bb_middle', 20),
+        'bb_upper': ('bb_upper', 20, 2),
+        'bb_lower': ('bb_lower', 20, 2),
+        'price_change': ('price_change',),
+        'price_change_pct': ('price_change_pct',),
+    })
+    
     def __init__(self):
         """Initialize the data processor."""
         self.raw_data_dir = Path(Config.RAW_DATA_DIR)
@@ -116,39 +136,9 @@ class DataProcessor:
             DataFrame with additional technical indicators
         """
         df = data.copy()
-        
-        # Simple Moving Averages
-        df['sma_20'] = df['close'].rolling(window=20).mean()
-        df['sma_50'] = df['close'].rolling(window=50).mean()
-        df['sma_200'] = df['close'].rolling(window=200).mean()
-        
-        # Exponential Moving Averages
-        df['ema_12'] = df['close'].ewm(span=12).mean()
-        df['ema_26'] = df['close'].ewm(span=26).mean()
-        
-        # MACD
-        df['macd'] = df['ema_12'] - df['ema_26']
-        df['macd_signal'] = df['macd'].ewm(span=9).mean()
-        df['macd_histogram'] = df['macd'] - df['macd_signal']
-        
-        # RSI
-        delta = df['close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        df['rsi'] = 100 - (100 / (1 + rs))
-        
-        # Bollinger Bands
-        bb_period = 20
-        bb_std = 2
-        df['bb_middle'] = df['close'].rolling(window=bb_period).mean()
-        bb_std_dev = df['close'].rolling(window=bb_period).std()
-        df['bb_upper'] = df['bb_middle'] + (bb_std_dev * bb_std)
-        df['bb_lower'] = df['bb_middle'] - (bb_std_dev * bb_std)
-        
-        # Price change and returns
-        df['price_change'] = df['close'].diff()
-        df['price_change_pct'] = df['close'].pct_change() * 100
+        indicators = self.TECHNICAL_INDICATORS.run(df)
+        for column in indicators.columns:
+            df[column] = indicators[column]
         
         return df
     
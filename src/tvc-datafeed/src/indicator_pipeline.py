@@ -0,0 +1,122 @@
+import pandas as pd
+from typing import Callable, Dict, List, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+Node = Tuple
+
+CLOSE = ("column", "close")
+
+
+def _node_spec(node: Node) -> Tuple[List[Node], Callable]:
+    """
+    Resolve a node into its dependencies and the function computing it.
+
+    Args:
+        node: Node key, e.g. ("sma", 20) or ("macd_signal", 12, 26, 9)
+
+    Returns:
+        Tuple of (dependency nodes, function taking the dependency values)
+    """
+    kind, params = node[0], node[1:]
+    if kind == "sma":
+        return [CLOSE], lambda close: close.rolling(window=params[0]).mean()
+    if kind == "std":
+        return [CLOSE], lambda close: close.rolling(window=params[0]).std()
+    if kind == "ema":
+        source = params[1] if len(params) > 1 else CLOSE
+        return [source], lambda values: values.ewm(span=params[0]).mean()
+    if kind == "macd":
+        fast, slow = params
+        return [("ema", fast), ("ema", slow)], lambda ema_fast, ema_slow: ema_fast - ema_slow
+    if kind == "macd_signal":
+        fast, slow, signal = params
+        return [("ema", signal, ("macd", fast, slow))], lambda values: values
+    if kind == "macd_histogram":
+        fast, slow, signal = params
+        return [("macd", fast, slow), ("macd_signal", fast, slow, signal)], lambda macd, signal_line: macd - signal_line
+    if kind == "price_change":
+        return [CLOSE], lambda close: close.diff()
+    if kind == "price_change_pct":
+        return [CLOSE], lambda close: close.pct_change() * 100
+    if kind == "rsi":
+        period = params[0]
+
+        def rsi(delta: pd.Series) -> pd.Series:
+            gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
+            loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
+            return 100 - (100 / (1 + gain / loss))
+
+        return [("price_change",)], rsi
+    if kind in ("bb_upper", "bb_lower"):
+        period, num_std = params
+        sign = 1 if kind == "bb_upper" else -1
+        return [("sma", period), ("std", period)], lambda middle, std: middle + sign * (std * num_std)
+    raise ValueError(f"Unknown indicator node: {node}")
+
+
+def _normalize(node: Node) -> Node:
+    """Map aliases onto their canonical node so they share one computation."""
+    node = tuple(node)
+    if node[0] == "bb_middle":
+        return ("sma", node[1])
+    if node[0] == "ema" and len(node) > 2 and node[2] == CLOSE:
+        return node[:2]
+    return node
+
+
+class IndicatorPipeline:
+    """
+    Declarative indicator pipeline.
+
+    Outputs are declared as {column: node}; the dependency graph is resolved once
+    and every intermediate (EMAs feeding MACD, the rolling mean shared by an SMA and
+    the Bollinger middle band, the close diff shared by RSI and price change) is
+    computed exactly once per run.
+    """
+
+    def __init__(self, outputs: Dict[str, Node]):
+        """
+        Initialize the pipeline.
+
+        Args:
+            outputs: Mapping of output column name to node, e.g. {"sma_20": ("sma", 20)}
+        """
+        self.outputs = {name: _normalize(node) for name, node in outputs.items()}
+        self.order: List[Node] = []
+        self._dependencies: Dict[Node, List[Node]] = {}
+        for node in self.outputs.values():
+            self._resolve(node, ())
+
+    def _resolve(self, node: Node, path: Tuple[Node, ...]):
+        """Add node and its dependencies to the evaluation order (depth-first)."""
+        if node in self._dependencies:
+            return
+        if node in path:
+            raise ValueError(f"Dependency cycle at indicator node: {node}")
+        dependencies = [] if node[0] == "column" else [_normalize(dep) for dep in _node_spec(node)[0]]
+        for dependency in dependencies:
+            self._resolve(dependency, path + (node,))
+        self._dependencies[node] = dependencies
+        self.order.append(node)
+
+    def run(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Compute the requested indicators.
+
+        Args:
+            data: DataFrame with OHLCV data
+
+        Returns:
+            DataFrame holding only the requested columns, aligned with data
+        """
+        values: Dict[Node, pd.Series] = {}
+        for node in self.order:
+            if node[0] == "column":
+                values[node] = data[node[1]]
+                continue
+            _, compute = _node_spec(node)
+            values[node] = compute(*(values[dep] for dep in self._dependencies[node]))
+        logger.debug(f"Computed {len(self.order)} indicator nodes for {len(self.outputs)} columns")
+        return pd.DataFrame({name: values[node] for name, node in self.outputs.items()}, index=data.index)